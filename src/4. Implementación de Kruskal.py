@@ -1,40 +1,35 @@
+import os
 import networkx as nx
 import matplotlib.pyplot as plt
+from lector_topologia import cargar
+from mst_arreglos import kruskal
 
-def generar_topologia():
-    #Conexiones entre nodos con su respectivo ancho de banda remplezar con las ip a ver que se nos ocurre
-    edges = [
-        ("A", "B", 90),
-        ("A", "C", 40),
-        ("B", "C", 70),
-        ("B", "D", 20),
-        ("C", "D", 50),
-        ("C", "E", 60),
-        ("D", "E", 30)
-    ]
+#Conexiones entre nodos con su ancho de banda (origen,destino,ancho_mbps), en un CSV para cambiarlas sin tocar el código
+ARCHIVO_TOPOLOGIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topologia_kruskal.csv")
+
+def generar_topologia(ruta=ARCHIVO_TOPOLOGIA):
+    #La topología se lee a arreglos (u, v, ancho); la lista de tuplas solo se arma para graficar
+    topologia = cargar(ruta)
+    edges = topologia.enlaces()
 
     #Grafo original con los anchos de banda reales
     G_original = nx.Graph()
     for u, v, bandwidth in edges:
         G_original.add_edge(u, v, weight=bandwidth)
 
-    #Se invierten los pesos para elegir los mayores anchos de banda
-    G_invertido = nx.Graph()
-    for u, v, bandwidth in edges:
-        G_invertido.add_edge(u, v, weight=-bandwidth)
-
-    #Se aplica Kruskal sobre los pesos invertiso
-    mst_invertido = nx.minimum_spanning_tree(G_invertido, algorithm='kruskal')
+    #Se aplica Kruskal sobre los arreglos pidiendo el árbol máximo, así no hace falta invertir los pesos
+    nodos, origen, destino = topologia.nombres, topologia.u, topologia.v
+    seleccion = kruskal(origen, destino, topologia.ancho, topologia.num_nodos(), maximo=True)
 
-    #Recuperamos los valores originales de los pesos en positivos
+    #Grafo con las aristas elegidas para graficarlo
     mst = nx.Graph()
-    for u, v, data in mst_invertido.edges(data=True):
-        mst.add_edge(u, v, weight=-data["weight"])
+    for e in seleccion.tolist():
+        mst.add_edge(nodos[origen[e]], nodos[destino[e]], weight=edges[e][2])
 
     #Imprimir las conexiones elegidas por Kruskal
     print("\nTopología optimizada (Kruskal):")
     for u, v, data in mst.edges(data=True):
-        print(f"{u} - {v}: {data['weight']} Mbps")
+        print(f"{u} - {v}: {data['weight']:g} Mbps")
 
     pos = nx.spring_layout(G_original, seed=42)
 
@@ -42,14 +37,14 @@ def generar_topologia():
     plt.figure(figsize=(12, 6))
     plt.subplot(1, 2, 1)
     nx.draw(G_original, pos, with_labels=True, node_color='skyblue', node_size=800, font_size=10)
-    labels_original = {(u, v): f"{d['weight']} Mbps" for u, v, d in G_original.edges(data=True)}
+    labels_original = {(u, v): f"{d['weight']:g} Mbps" for u, v, d in G_original.edges(data=True)}
     nx.draw_networkx_edge_labels(G_original, pos, edge_labels=labels_original)
     plt.title("Topología de la red (original)")
 
     #MST con Kruskal
     plt.subplot(1, 2, 2)
     nx.draw(mst, pos, with_labels=True, node_color='lightgreen', node_size=800, font_size=10, edge_color='green')
-    labels_mst = {(u, v): f"{d['weight']} Mbps" for u, v, d in mst.edges(data=True)}
+    labels_mst = {(u, v): f"{d['weight']:g} Mbps" for u, v, d in mst.edges(data=True)}
     nx.draw_networkx_edge_labels(mst, pos, edge_labels=labels_mst)
     plt.title("Topología optimizada (Kruskal)")
 
@@ -0,0 +1,426 @@
+import atexit
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from mmap import mmap
+
+import numpy as np
+
+# Almacén de métricas en un archivo binario de tamaño fijo, en lugar de líneas de texto en el log.
+#  - Los registros tienen tamaño fijo y van a un anillo: cuando se llena, los nuevos pisan a los
+#    más viejos, así el archivo no crece nunca
+#  - registrar() solo deja la muestra en una cola en memoria; un hilo de fondo las escribe en
+#    lotes cada `intervalo` segundos, así que registrar una métrica no espera al disco
+#  - Cada `periodo_resumen` segundos se guarda un resumen por tipo y clave (cantidad, media,
+#    mínimo, máximo, p50, p99, bytes) en un segundo anillo, que dura mucho más que los registros
+#  - Los nombres de las claves (destinos, enlaces) van en un archivo de texto al lado
+# Un archivo tiene un solo proceso escritor (cliente, servidor y monitor usan archivos distintos).
+#
+# Significado de las columnas según el tipo:
+#   TRANSFERENCIA  valor = velocidad en KB/s, auxiliar = duración en s, tamano = bytes
+#   LATENCIA       valor = RTT en ms (nan si la sonda se perdió)
+#   MST            valor = ancho de banda del cuello de botella del árbol, auxiliar = suma de
+#                  los anchos, tamano = aristas del árbol
+
+TRANSFERENCIA, LATENCIA, MST = 1, 2, 3
+NOMBRES_TIPO = {TRANSFERENCIA: "transferencia", LATENCIA: "latencia", MST: "mst"}
+
+CAPACIDAD = 262144  # registros que caben en el anillo (~10 MB)
+CAPACIDAD_RESUMENES = 65536  # resúmenes que caben en su anillo (~4 MB)
+PERIODO_RESUMEN = 60.0  # segundos que cubre cada resumen
+INTERVALO_ESCRITURA = 1.0  # segundos entre escrituras del hilo de fondo
+MAX_PENDIENTES = 100000  # muestras en memoria a la espera de escribirse; las que sobran se descartan
+SUFIJO_CLAVES = ".claves"
+
+MAGIA = b"METR"
+VERSION = 1
+# magia, versión, capacidad, capacidad de resúmenes, registros escritos, resúmenes escritos
+CABECERA = struct.Struct("<4sB3xIIQQ")
+REGISTRO = np.dtype([("tiempo", "<f8"), ("tipo", "u1"), ("clave", "<u4"), ("valor", "<f8"),
+                     ("auxiliar", "<f8"), ("tamano", "<u8")])
+RESUMEN = np.dtype([("inicio", "<f8"), ("tipo", "u1"), ("clave", "<u4"), ("cantidad", "<u4"),
+                    ("perdidos", "<u4"), ("media", "<f8"), ("minimo", "<f8"), ("maximo", "<f8"),
+                    ("p50", "<f8"), ("p99", "<f8"), ("bytes", "<u8")])
+
+
+class AlmacenMetricas:
+    def __init__(self, ruta, capacidad=CAPACIDAD, capacidad_resumenes=CAPACIDAD_RESUMENES,
+                 periodo_resumen=PERIODO_RESUMEN, intervalo=INTERVALO_ESCRITURA,
+                 max_pendientes=MAX_PENDIENTES):
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.capacidad_resumenes = capacidad_resumenes
+        self.periodo_resumen = periodo_resumen
+        self.intervalo = intervalo
+        # Cola de muestras sin escribir; al llenarse se pierden las más viejas y se cuentan
+        self.pendientes = deque(maxlen=max_pendientes)
+        self.omitidos = 0
+        self.lock = threading.Lock()
+        # El archivo se abre en la primera escritura o consulta, no al crear el objeto
+        self.lock_archivo = threading.Lock()
+        self.archivo = None
+        self.mapa = None
+        self.registros = None
+        self.resumenes = None
+        self.total_registros = 0
+        self.total_resumenes = 0
+        self.claves = []
+        self.id_clave = {}
+        self.abiertos = {}  # (tipo, clave, inicio del periodo) -> lista de arreglos del lote
+        self.hilo = None
+        self.detener = threading.Event()
+        self.en_atexit = False
+
+    # Deja una muestra en la cola; nunca toca el disco
+    def registrar(self, tipo, clave, valor, auxiliar=0.0, tamano=0, tiempo=None):
+        if tiempo is None:
+            tiempo = time.time()
+        with self.lock:
+            if len(self.pendientes) == self.pendientes.maxlen:
+                self.omitidos += 1
+            self.pendientes.append((tiempo, tipo, str(clave), valor, auxiliar, tamano))
+            if self.hilo is None:
+                self._iniciar()
+
+    def registrar_transferencia(self, clave, tamano_bytes, duracion_s, tiempo=None):
+        duracion_s = max(duracion_s, 1e-9)
+        self.registrar(TRANSFERENCIA, clave, (tamano_bytes / 1024) / duracion_s, duracion_s, tamano_bytes, tiempo)
+
+    def registrar_latencia(self, clave, rtt_ms, tiempo=None):
+        self.registrar(LATENCIA, clave, math.nan if rtt_ms is None else rtt_ms, tiempo=tiempo)
+
+    # Foto del árbol: aristas como (nodo1, nodo2, ancho de banda)
+    def registrar_mst(self, aristas, clave="mst", tiempo=None):
+        anchos = [ancho for _, _, ancho in aristas]
+        cuello = min(anchos) if anchos else math.nan
+        self.registrar(MST, clave, cuello, float(sum(anchos)), len(anchos), tiempo)
+
+    def _iniciar(self):
+        self.detener.clear()
+        self.hilo = threading.Thread(target=self._bucle, daemon=True)
+        self.hilo.start()
+        if not self.en_atexit:
+            atexit.register(self.cerrar)
+            self.en_atexit = True
+
+    def _bucle(self):
+        while not self.detener.wait(self.intervalo):
+            self.vaciar()
+
+    # Escribe en el archivo todo lo que está en la cola y guarda los resúmenes de los periodos
+    # ya cerrados (o de todos, con cerrar_periodos)
+    def vaciar(self, cerrar_periodos=False):
+        with self.lock:
+            muestras = list(self.pendientes)
+            self.pendientes.clear()
+        with self.lock_archivo:
+            if not muestras and not self.abiertos:
+                return
+            self._abrir()
+            if muestras:
+                lote = np.empty(len(muestras), dtype=REGISTRO)
+                tiempos, tipos, claves, valores, auxiliares, tamanos = zip(*muestras)
+                lote["tiempo"] = tiempos
+                lote["tipo"] = tipos
+                lote["clave"] = [self._id(clave) for clave in claves]
+                lote["valor"] = valores
+                lote["auxiliar"] = auxiliares
+                lote["tamano"] = tamanos
+                self._escribir_registros(lote)
+                self._acumular(lote)
+            limite = math.inf if cerrar_periodos else time.time() - self.periodo_resumen - 2 * self.intervalo
+            self._resumir(limite)
+
+    def cerrar(self):
+        if self.hilo is not None:
+            self.detener.set()
+            self.hilo.join()
+            self.hilo = None
+        self.vaciar(cerrar_periodos=True)
+        with self.lock_archivo:
+            if self.mapa is not None:
+                self.mapa.flush()
+                self.registros = self.resumenes = None
+                self.mapa.close()
+                self.archivo.close()
+                self.mapa = self.archivo = None
+
+    def _abrir(self):
+        if self.mapa is not None:
+            return
+        tamano = CABECERA.size + self.capacidad * REGISTRO.itemsize + self.capacidad_resumenes * RESUMEN.itemsize
+        if not os.path.exists(self.ruta) or os.path.getsize(self.ruta) == 0:
+            with open(self.ruta, "wb") as f:
+                f.write(CABECERA.pack(MAGIA, VERSION, self.capacidad, self.capacidad_resumenes, 0, 0))
+                f.truncate(tamano)
+        self.archivo = open(self.ruta, "r+b")
+        self.mapa = mmap(self.archivo.fileno(), 0)
+        magia, version, capacidad, capacidad_resumenes, total, total_resumenes = (
+            CABECERA.unpack_from(self.mapa) if len(self.mapa) >= CABECERA.size else (b"", 0, 0, 0, 0, 0))
+        tamano = CABECERA.size + capacidad * REGISTRO.itemsize + capacidad_resumenes * RESUMEN.itemsize
+        if magia != MAGIA or version != VERSION or len(self.mapa) != tamano:
+            self.mapa.close()
+            self.archivo.close()
+            self.mapa = self.archivo = None
+            raise ValueError(f"{self.ruta} no es un almacén de métricas")
+        # Un archivo existente conserva sus capacidades
+        self.capacidad = capacidad
+        self.capacidad_resumenes = capacidad_resumenes
+        self.total_registros = total
+        self.total_resumenes = total_resumenes
+        self.registros = np.frombuffer(self.mapa, REGISTRO, capacidad, CABECERA.size)
+        self.resumenes = np.frombuffer(self.mapa, RESUMEN, capacidad_resumenes,
+                                       CABECERA.size + capacidad * REGISTRO.itemsize)
+        self.claves = []
+        self.id_clave = {}
+        self._leer_claves()
+
+    def _leer_claves(self):
+        try:
+            with open(self.ruta + SUFIJO_CLAVES, encoding="utf-8") as f:
+                for linea in f:
+                    clave = linea.rstrip("\n")
+                    self.id_clave.setdefault(clave, len(self.claves))
+                    self.claves.append(clave)
+        except FileNotFoundError:
+            pass
+
+    # Número de una clave; las nuevas se agregan al archivo de claves antes que sus registros
+    def _id(self, clave):
+        numero = self.id_clave.get(clave)
+        if numero is None:
+            clave = _normalizar_clave(clave)
+            numero = self.id_clave.get(clave)
+        if numero is None:
+            with open(self.ruta + SUFIJO_CLAVES, "a", encoding="utf-8") as f:
+                f.write(clave + "\n")
+            numero = self.id_clave[clave] = len(self.claves)
+            self.claves.append(clave)
+        return numero
+
+    def _escribir_registros(self, lote):
+        self.total_registros = _escribir_anillo(self.registros, self.total_registros, lote)
+        self._escribir_cabecera()
+
+    def _escribir_cabecera(self):
+        CABECERA.pack_into(self.mapa, 0, MAGIA, VERSION, self.capacidad, self.capacidad_resumenes,
+                           self.total_registros, self.total_resumenes)
+
+    # Agrega los valores del lote a los periodos abiertos de su tipo y clave
+    def _acumular(self, lote):
+        # Se agrupa por números enteros (ordenar el arreglo estructurado es mucho más lento)
+        series, por_serie = np.unique(lote["tipo"].astype(np.int64) << 32 | lote["clave"], return_inverse=True)
+        inicios, por_inicio = np.unique(np.floor(lote["tiempo"] / self.periodo_resumen), return_inverse=True)
+        grupos, por_grupo = np.unique(por_serie * len(inicios) + por_inicio, return_inverse=True)
+        orden = np.argsort(por_grupo, kind="stable")
+        limites = np.searchsorted(por_grupo[orden], np.arange(len(grupos) + 1))
+        for i, grupo in enumerate(grupos.tolist()):
+            serie = int(series[grupo // len(inicios)])
+            inicio = float(inicios[grupo % len(inicios)]) * self.periodo_resumen
+            muestras = lote[orden[limites[i]:limites[i + 1]]]
+            self.abiertos.setdefault((serie >> 32, serie & 0xFFFFFFFF, inicio), []).append(muestras)
+
+    # Guarda el resumen de cada periodo abierto que terminó antes de `limite`
+    def _resumir(self, limite):
+        cerrados = [grupo for grupo in self.abiertos if grupo[2] + self.periodo_resumen <= limite]
+        if not cerrados:
+            return
+        filas = np.zeros(len(cerrados), dtype=RESUMEN)
+        for fila, grupo in zip(filas, cerrados):
+            tipo, clave, inicio = grupo
+            muestras = np.concatenate(self.abiertos.pop(grupo))
+            valores = muestras["valor"]
+            validos = valores[np.isfinite(valores)]
+            fila["inicio"] = inicio
+            fila["tipo"] = tipo
+            fila["clave"] = clave
+            fila["cantidad"] = len(valores)
+            fila["perdidos"] = len(valores) - len(validos)
+            fila["bytes"] = int(muestras["tamano"].sum())
+            if len(validos):
+                fila["media"] = validos.mean()
+                fila["minimo"] = validos.min()
+                fila["maximo"] = validos.max()
+                fila["p50"], fila["p99"] = np.percentile(validos, (50, 99))
+            else:
+                fila["media"] = fila["minimo"] = fila["maximo"] = fila["p50"] = fila["p99"] = math.nan
+        self.total_resumenes = _escribir_anillo(self.resumenes, self.total_resumenes, filas)
+        self._escribir_cabecera()
+
+    # --- Consultas (incluyen lo que todavía estaba en la cola) ---
+
+    # Registros en orden de llegada, filtrados por tipo, clave y rango de tiempo
+    def consultar(self, tipo=None, clave=None, desde=None, hasta=None):
+        self.vaciar()
+        with self.lock_archivo:
+            self._abrir()
+            registros = _leer_anillo(self.registros, self.total_registros)
+            return self._filtrar(registros, "tiempo", tipo, clave, desde, hasta)
+
+    # Resúmenes guardados (puede haber más de uno por periodo si el proceso se reinició en medio)
+    def resumenes_guardados(self, tipo=None, clave=None, desde=None, hasta=None):
+        self.vaciar()
+        with self.lock_archivo:
+            self._abrir()
+            resumenes = _leer_anillo(self.resumenes, self.total_resumenes)
+            return self._filtrar(resumenes, "inicio", tipo, clave, desde, hasta)
+
+    # Percentiles de `campo` en los últimos `ventana_s` segundos (o en todo el anillo)
+    def percentiles(self, tipo, clave=None, ventana_s=None, ps=(50, 90, 99), campo="valor"):
+        desde = time.time() - ventana_s if ventana_s is not None else None
+        valores = self.consultar(tipo, clave, desde)[campo].astype(float)
+        validos = valores[np.isfinite(valores)]
+        resultado = {"cantidad": len(valores), "perdidos": len(valores) - len(validos)}
+        if len(validos):
+            resultado.update(zip(ps, np.percentile(validos, ps).tolist()))
+        return resultado
+
+    # Evolución en pasos de `paso_s` segundos dentro de los últimos `ventana_s` segundos.
+    # Con pasos que son múltiplos del periodo de resumen y ventanas más largas que lo que guarda
+    # el anillo de registros conviene usar resumenes_guardados
+    def tendencia(self, tipo, clave=None, ventana_s=3600, paso_s=None):
+        paso_s = paso_s or self.periodo_resumen
+        registros = self.consultar(tipo, clave, time.time() - ventana_s)
+        pasos = np.floor(registros["tiempo"] / paso_s) * paso_s
+        resultado = []
+        for inicio in np.unique(pasos).tolist():
+            muestras = registros[pasos == inicio]
+            valores = muestras["valor"]
+            validos = valores[np.isfinite(valores)]
+            fila = {"inicio": inicio, "cantidad": len(valores), "bytes": int(muestras["tamano"].sum()),
+                    "media": math.nan, "p50": math.nan, "p99": math.nan}
+            if len(validos):
+                fila["media"] = float(validos.mean())
+                fila["p50"], fila["p99"] = np.percentile(validos, (50, 99)).tolist()
+            resultado.append(fila)
+        return resultado
+
+    def _filtrar(self, filas, columna, tipo, clave, desde, hasta):
+        seleccion = np.ones(len(filas), dtype=bool)
+        if tipo is not None:
+            seleccion &= filas["tipo"] == tipo
+        if clave is not None:
+            numero = self.id_clave.get(_normalizar_clave(clave))
+            if numero is None:
+                return filas[:0]
+            seleccion &= filas["clave"] == numero
+        if desde is not None:
+            seleccion &= filas[columna] >= desde
+        if hasta is not None:
+            seleccion &= filas[columna] < hasta
+        return filas[seleccion]
+
+    def nombre_clave(self, numero):
+        return self.claves[numero]
+
+
+# Forma en que se guarda una clave: una por línea en el archivo de claves, así que sin saltos
+# de línea. Se usa al escribir y al consultar para que las dos vean la misma clave
+def _normalizar_clave(clave):
+    return str(clave).replace("\r", " ").replace("\n", " ")
+
+
+# Copia `lote` en el anillo `destino` a partir de la posición total % capacidad; devuelve el nuevo total
+def _escribir_anillo(destino, total, lote):
+    capacidad = len(destino)
+    if len(lote) > capacidad:
+        total += len(lote) - capacidad
+        lote = lote[-capacidad:]
+    posicion = total % capacidad
+    primero = min(len(lote), capacidad - posicion)
+    destino[posicion:posicion + primero] = lote[:primero]
+    destino[:len(lote) - primero] = lote[primero:]
+    return total + len(lote)
+
+
+# Contenido válido del anillo, del más viejo al más nuevo
+def _leer_anillo(origen, total):
+    capacidad = len(origen)
+    if total <= capacidad:
+        return origen[:total].copy()
+    posicion = total % capacidad
+    return np.concatenate((origen[posicion:], origen[:posicion]))
+
+
+# Costo de registrar() frente a una línea de logging, y de las consultas sobre el anillo lleno
+def benchmark(muestras=500000, claves=20):
+    import logging
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "metricas.bin")
+        almacen = AlmacenMetricas(ruta, max_pendientes=muestras)
+        inicio = time.perf_counter()
+        for i in range(muestras):
+            almacen.registrar_transferencia(f"10.0.0.{i % claves}", 1048576 + i, 0.5 + (i % 100) / 100)
+        registrar = (time.perf_counter() - inicio) / muestras
+        inicio = time.perf_counter()
+        almacen.vaciar()
+        vaciar = time.perf_counter() - inicio
+
+        registro = logging.getLogger("benchmark_metricas")
+        registro.propagate = False
+        manejador = logging.FileHandler(os.path.join(directorio, "log.txt"))
+        manejador.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        registro.addHandler(manejador)
+        registro.setLevel(logging.INFO)
+        lineas = min(muestras, 50000)
+        inicio = time.perf_counter()
+        for i in range(lineas):
+            registro.info(f"Archivo x enviado a 10.0.0.{i % claves} - Tamaño: {1024 + i / 1024:.2f} KB - "
+                          f"Tiempo: {0.5 + (i % 100) / 100:.2f}s - Velocidad: {2048 / (0.5 + (i % 100) / 100):.2f} KB/s")
+        texto = (time.perf_counter() - inicio) / lineas
+        manejador.close()
+
+        inicio = time.perf_counter()
+        p = almacen.percentiles(TRANSFERENCIA)
+        consulta = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        almacen.percentiles(TRANSFERENCIA, clave="10.0.0.3", ventana_s=3600)
+        consulta_clave = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        pasos = almacen.tendencia(TRANSFERENCIA, ventana_s=3600, paso_s=0.1)
+        consulta_tendencia = time.perf_counter() - inicio
+        almacen.cerrar()
+
+        print(f"registrar(): {registrar * 1e6:.2f} µs por muestra (logging a texto: {texto * 1e6:.2f} µs por línea)")
+        print(f"Escritura en lote de {muestras} muestras (en el hilo de fondo): {vaciar:.3f} s")
+        print(f"Archivo: {os.path.getsize(ruta) / 1024 / 1024:.1f} MB fijos, "
+              f"{min(muestras, almacen.capacidad)} registros en el anillo de {almacen.capacidad}")
+        print(f"Percentiles sobre el anillo completo: {consulta * 1000:.1f} ms "
+              f"(p50 {p[50]:.0f}, p99 {p[99]:.0f} KB/s); una clave: {consulta_clave * 1000:.1f} ms; "
+              f"tendencia en {len(pasos)} pasos: {consulta_tendencia * 1000:.1f} ms")
+
+
+# Resumen por tipo y clave de un archivo de métricas
+def mostrar(ruta, ventana_s=None):
+    if not os.path.exists(ruta):
+        print(f"Error: El archivo {ruta} no existe")
+        return
+    almacen = AlmacenMetricas(ruta)
+    try:
+        registros = almacen.consultar()
+        for tipo, clave in sorted(set(zip(registros["tipo"].tolist(), registros["clave"].tolist()))):
+            p = almacen.percentiles(tipo, almacen.nombre_clave(clave), ventana_s)
+            if not p["cantidad"]:
+                continue
+            partes = [f"{NOMBRES_TIPO.get(tipo, tipo)} {almacen.nombre_clave(clave)}: {p['cantidad']} muestras"]
+            if 50 in p:
+                partes.append(f"p50 {p[50]:.2f}  p90 {p[90]:.2f}  p99 {p[99]:.2f}")
+            if p["perdidos"]:
+                partes.append(f"{p['perdidos']} perdidas")
+            print(" - ".join(partes))
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    # almacen_metricas.py archivo [ventana_s]: resumen de un archivo; sin argumentos, benchmark
+    if len(sys.argv) > 1:
+        mostrar(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else None)
+    else:
+        benchmark()
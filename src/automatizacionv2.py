@@ -1,66 +1,40 @@
 import networkx as nx
-import matplotlib.pyplot as plt
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes
 import time
 import json
 import os
-from datetime import datetime
 import random  
-# Generar claves RSA (pública/privada)
-def generate_keys():
-    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-    public_key = private_key.public_key()
-
-    # Serializar las claves
-    private_pem = private_key.private_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PrivateFormat.PKCS8,
-        encryption_algorithm=serialization.NoEncryption()
-    )
-
-    public_pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
-    )
-
-    return private_pem, public_pem
-
+from mst_dinamico import MSTDinamico
+from cifrado_hibrido import CacheSesion, cifrar_bytes, descifrar_bytes
+from gestor_claves import GestorClaves
+from lector_topologia import cargar
+from renderizador_grafo import RenderizadorGrafo
+from almacen_metricas import AlmacenMetricas
+
+# Configuración de claves RSA (se guardan en disco y se rotan en segundo plano)
+KEYS_DIR = 'claves'
+KEY_ROTATION_SECONDS = 24 * 3600  # 1 día
+METRICS_FILE = 'monitor_metrics.bin'  # una foto del MST por ciclo (ver almacen_metricas.py)
+# Conexiones entre los PCs (origen,destino); se vuelven a leer en cada ciclo, así que se pueden
+# cambiar con el monitor en marcha
+CONNECTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topologia_pcs.csv")
 # Cifrar datos con clave pública
-def encrypt_data(data, public_key):
-    encrypted = public_key.encrypt(
-        json.dumps(data).encode(),
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
-    return encrypted
+# RSA-OAEP solo admite unos 190 bytes, así que se usa un sobre híbrido: AES-GCM para los datos
+# y RSA solo para la clave de sesión, que la caché reutiliza durante muchos ciclos
+def encrypt_data(data, public_key, session_cache=None):
+    if session_cache is None:
+        session_cache = CacheSesion()
+    return cifrar_bytes(json.dumps(data).encode(), public_key, session_cache)
 
 # Descifrar datos con clave privada
-def decrypt_data(encrypted_data, private_key):
-    decrypted = private_key.decrypt(
-        encrypted_data,
-        padding.OAEP(
-            mgf=padding.MGF1(algorithm=hashes.SHA256()),
-            algorithm=hashes.SHA256(),
-            label=None
-        )
-    )
+def decrypt_data(encrypted_data, private_key, session_cache=None):
+    if session_cache is None:
+        session_cache = CacheSesion()
+    decrypted = descifrar_bytes(encrypted_data, private_key, session_cache)
     return json.loads(decrypted.decode())
 
 # Simular datos de red con valores aleatorios para los anchos de banda 
-def fetch_network_data():
-    connections = [
-        ("PC1", "PC2"),
-        ("PC1", "PC3"),
-        ("PC2", "PC3"),
-        ("PC3", "PC4"),
-        ("PC2", "PC4"),
-        ("PC1", "PC4")
-    ]
+def fetch_network_data(connections_file=CONNECTIONS_FILE):
+    connections = [(n1, n2) for n1, n2, _ in cargar(connections_file).enlaces()]
 
     # Generacion de valores para actualizar el grafo (10-100 Mbps)
     network_data = []
@@ -70,65 +44,57 @@ def fetch_network_data():
     
     return network_data
 
-# Construir grafo y calcular MST
-def build_and_optimize_network(data):
+# Grafos de networkx solo para graficar: el MST ya lo mantiene MSTDinamico
+def graphs_from_dynamic_mst(mst_dinamico):
     G = nx.Graph()
-    for n1, n2, ancho in data:
-        peso = 1 / ancho
-        G.add_edge(n1, n2, weight=peso, bandwidth=ancho)
+    for n1, n2, ancho in mst_dinamico.aristas_grafo():
+        G.add_edge(n1, n2, weight=1 / ancho, bandwidth=ancho)
 
-    mst = nx.minimum_spanning_tree(G, weight="weight")
+    mst = nx.Graph()
+    for n1, n2, ancho in mst_dinamico.aristas_arbol():
+        mst.add_edge(n1, n2, weight=1 / ancho, bandwidth=ancho)
     return G, mst
 
 # Guardar gráfico en un archivo para verificar que se actualiza 
-def save_graph_plot(G, mst, filename="network_plot.png"):
-    plt.figure(figsize=(10, 3))
-
-    # Grafo original
-    plt.subplot(1, 2, 1)
-    pos = nx.spring_layout(G, seed=42)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray')
-    nx.draw_networkx_edge_labels(G, pos, edge_labels={(u, v): f'{d["bandwidth"]}Mbps' for u, v, d in G.edges(data=True)})
-    plt.title("Topología Original")
-
-    # Kruskal MST
-    plt.subplot(1, 2, 2)
-    nx.draw(mst, pos, with_labels=True, node_color='lightgreen', edge_color='blue')
-    nx.draw_networkx_edge_labels(mst, pos, edge_labels={(u, v): f'{d["bandwidth"]}Mbps' for u, v, d in mst.edges(data=True)})
-    plt.title("Topología Optimizada (Kruskal)")
-
-    plt.tight_layout()
-    plt.savefig(filename)
-    plt.close()
+# Con un renderizador (ver renderizador_grafo.py) la disposición y la figura se reutilizan entre
+# ciclos; sin nombre de archivo se usa uno con marca de tiempo y se conservan solo los últimos
+def save_graph_plot(G, mst, filename="network_plot.png", renderer=None):
+    if renderer is None:
+        renderer = RenderizadorGrafo()
+    return renderer.guardar(G, mst, filename)
 
 # Función principal ejecutandose en bucle
-def main():
-    # Generar claves RSA
-    private_pem, public_pem = generate_keys()
-    private_key = serialization.load_pem_private_key(private_pem, password=None)
-    public_key = serialization.load_pem_public_key(public_pem)
+# El MST se mantiene entre ciclos en mst_dinamico y solo recibe los enlaces que cambiaron;
+# session_cache guarda la clave de sesión del sobre cifrado entre ciclos y key_manager
+# entrega las claves RSA ya cargadas (sin generarlas ni interpretar PEM en cada ciclo);
+# renderer conserva la figura y la disposición de los nodos entre ciclos y metrics guarda
+# una foto del MST en cada ciclo
+def main(mst_dinamico, session_cache, key_manager, renderer, metrics):
+    # Obtener claves RSA vigentes
+    private_key, public_key = key_manager.claves()
 
     # Obtener datos de red (ahora con valores aleatorios)
     network_data = fetch_network_data()
     print("Datos de red generados:", network_data)
 
     # Cifrar datos antes de procesar 
-    encrypted_data = encrypt_data(network_data, public_key)
+    encrypted_data = encrypt_data(network_data, public_key, session_cache)
     print("Datos cifrados correctamente.")
 
     # Descifrar datos
-    decrypted_data = decrypt_data(encrypted_data, private_key)
+    decrypted_data = decrypt_data(encrypted_data, private_key, session_cache)
     print("Datos descifrados correctamente.")
 
-    # Construir grafo y calcular MST
-    G, mst = build_and_optimize_network(decrypted_data)
+    # Actualizar el MST con los cambios de ancho de banda (sin reconstruir desde cero)
+    cambios = mst_dinamico.aplicar_datos(decrypted_data)
+    print(f"Enlaces con cambios en este ciclo: {cambios}")
+    metrics.registrar_mst(mst_dinamico.aristas_arbol())
+    G, mst = graphs_from_dynamic_mst(mst_dinamico)
 
-    # Guardar gráfico con timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    plot_filename = f"network_plot_{timestamp}.png"
-    save_graph_plot(G, mst, plot_filename)
+    # Guardar gráfico con timestamp (se borran los más viejos)
+    plot_filename = save_graph_plot(G, mst, None, renderer)
 
-    print(f"Grafo actualizado y guardado")
+    print(f"Grafo actualizado y guardado en {plot_filename}")
 
     # Mostrar resumen de las conexiones
     print("\nResumen de conexiones óptimas (MST):")
@@ -137,7 +103,12 @@ def main():
 
 if __name__ == "__main__":
     print("Iniciando monitor de red...")
+    mst_dinamico = MSTDinamico()
+    session_cache = CacheSesion()
+    key_manager = GestorClaves(KEYS_DIR, KEY_ROTATION_SECONDS).iniciar()
+    renderer = RenderizadorGrafo()
+    metrics = AlmacenMetricas(METRICS_FILE)
     while True:
-        main()
+        main(mst_dinamico, session_cache, key_manager, renderer, metrics)
         print("\nEsperando 5 minutos para la próxima actualización...")
         time.sleep(10)  # 300 segundos = 5 minutos
\ No newline at end of file
@@ -0,0 +1,191 @@
+import math
+import threading
+from collections import OrderedDict
+from motor_rutas import GrafoCSR, dijkstra, reconstruir_ruta
+from rutas_dinamicas import reparar_arbol
+
+# Árbol de rutas más cortas desde un origen, calculado para una versión concreta del grafo
+class ArbolRutas:
+    __slots__ = ("origen", "version", "distancias", "predecesores")
+
+    def __init__(self, origen, version, distancias, predecesores):
+        self.origen = origen
+        self.version = version
+        self.distancias = distancias
+        self.predecesores = predecesores
+
+    # Memoria aproximada que ocupan los arreglos del árbol
+    def tamano_bytes(self):
+        return (self.distancias.itemsize * len(self.distancias)
+                + self.predecesores.itemsize * len(self.predecesores))
+
+
+# Caché LRU de árboles de rutas más cortas indexada por nodo origen y versión del grafo
+# Cada cambio de una arista sube la versión; los árboles que el cambio no afecta se
+# conservan con la nueva versión y solo se descartan los que realmente cambian.
+# En modo dinámico los árboles afectados no se descartan: se reparan en su sitio
+# (ver rutas_dinamicas.py), que es mucho más barato que repetir Dijkstra completo.
+# Los cambios pueden llegar en lotes (actualizar_aristas): el lote entero es una sola versión
+# y los árboles se revisan una vez; si el lote toca más de `umbral_lote` de las aristas
+# sale más barato descartar los árboles y recalcularlos cuando se pidan
+class CacheRutas:
+    def __init__(self, grafo, max_arboles=64, limite_memoria_bytes=64 * 1024 * 1024, modo_dinamico=False,
+                 umbral_lote=0.1):
+        self.grafo = grafo  # diccionario de adyacencia {nodo: {vecino: latencia}}
+        self.grafo_csr = GrafoCSR.desde_diccionario(grafo)
+        self.version = 0
+        self.max_arboles = max_arboles
+        self.limite_memoria_bytes = limite_memoria_bytes
+        self.arboles = OrderedDict()  # origen -> ArbolRutas (el más reciente al final)
+        self.memoria_bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.modo_dinamico = modo_dinamico
+        self.reparaciones = 0
+        self.umbral_lote = umbral_lote
+        self.lock = threading.Lock()
+
+    # Devuelve el árbol desde el índice origen, calculándolo solo si no está en caché
+    # Los hilos de un mismo lote esperan al primero y reutilizan su árbol
+    def arbol(self, origen):
+        with self.lock:
+            return self._arbol(origen)
+
+    def _arbol(self, origen):
+        arbol = self.arboles.get(origen)
+        if arbol is not None and arbol.version == self.version:
+            self.arboles.move_to_end(origen)
+            self.aciertos += 1
+            return arbol
+        self.fallos += 1
+        distancias, predecesores = dijkstra(self.grafo_csr, origen)
+        arbol = ArbolRutas(origen, self.version, distancias, predecesores)
+        self._guardar(arbol)
+        return arbol
+
+    # Ruta óptima por nombre con el contrato de find_optimal_path: (latencia, [nodos])
+    def ruta(self, nodo_inicio, nodo_destino):
+        indices = self.grafo_csr.indices
+        if nodo_inicio not in indices or nodo_destino not in indices:
+            return math.inf, []
+        origen = indices[nodo_inicio]
+        destino = indices[nodo_destino]
+        # La ruta se reconstruye con el lock tomado porque en modo dinámico el árbol se repara en su sitio
+        with self.lock:
+            arbol = self._arbol(origen)
+            if arbol.distancias[destino] == math.inf:
+                return math.inf, []
+            ruta = reconstruir_ruta(arbol.predecesores, origen, destino)
+            return arbol.distancias[destino], [self.grafo_csr.nombres[i] for i in ruta]
+
+    # Cambia (o crea) la latencia de la arista dirigida u -> v; math.inf la elimina
+    def actualizar_arista(self, nodo_u, nodo_v, latencia):
+        self.actualizar_aristas({(nodo_u, nodo_v): latencia})
+
+    # Aplica un lote de cambios {(u, v): latencia} como una sola versión del grafo
+    def actualizar_aristas(self, cambios):
+        with self.lock:
+            anteriores = {}
+            for (nodo_u, nodo_v), latencia in cambios.items():
+                peso_anterior = self.grafo.get(nodo_u, {}).get(nodo_v, math.inf)
+                if latencia == peso_anterior:
+                    continue
+                if latencia == math.inf:
+                    self.grafo[nodo_u].pop(nodo_v, None)
+                else:
+                    self.grafo.setdefault(nodo_u, {})[nodo_v] = latencia
+                    self.grafo.setdefault(nodo_v, {})
+                anteriores[(nodo_u, nodo_v)] = (peso_anterior, latencia)
+            if not anteriores:
+                return
+            self.version += 1
+
+            csr = self.grafo_csr
+            aristas = []  # (u, v, posición en el CSR, peso anterior, peso nuevo)
+            for (nodo_u, nodo_v), (peso_anterior, latencia) in anteriores.items():
+                u = csr.indices.get(nodo_u)
+                v = csr.indices.get(nodo_v)
+                k = csr.posicion_arista(u, v) if u is not None and v is not None else -1
+                if k == -1:
+                    # Nodo o arista nueva: cambian los arreglos y ningún árbol guardado sirve
+                    self.grafo_csr = GrafoCSR.desde_diccionario(self.grafo)
+                    self._vaciar()
+                    return
+                aristas.append((u, v, k, peso_anterior, latencia))
+            if len(aristas) > self.umbral_lote * max(1, csr.num_aristas()):
+                for u, v, k, _, latencia in aristas:
+                    csr.pesos[k] = latencia
+                self._vaciar()
+                return
+            self._invalidar_afectados(aristas)
+
+    def _vaciar(self):
+        self.invalidaciones += len(self.arboles)
+        self.arboles.clear()
+        self.memoria_bytes = 0
+
+    # Aplica los pesos nuevos al CSR y recorre los árboles guardados descartando solo los que
+    # el lote altera. En modo dinámico las aristas se aplican de una en una y cada árbol se
+    # repara en su sitio tras cada una
+    def _invalidar_afectados(self, aristas):
+        csr = self.grafo_csr
+        if self.modo_dinamico:
+            for u, v, k, peso_anterior, peso_nuevo in aristas:
+                csr.pesos[k] = peso_nuevo
+                for arbol in self.arboles.values():
+                    if reparar_arbol(csr, arbol.distancias, arbol.predecesores,
+                                     u, v, peso_anterior, peso_nuevo):
+                        self.reparaciones += 1
+            for arbol in self.arboles.values():
+                arbol.version = self.version
+            return
+
+        for u, v, k, _, peso_nuevo in aristas:
+            csr.pesos[k] = peso_nuevo
+        for origen in list(self.arboles):
+            arbol = self.arboles[origen]
+            if any(self._afecta(arbol, u, v, peso_anterior, peso_nuevo)
+                   for u, v, _, peso_anterior, peso_nuevo in aristas):
+                self._descartar(origen)
+                self.invalidaciones += 1
+            else:
+                arbol.version = self.version
+
+    # Indica si el cambio de u -> v altera el árbol (calculado con los pesos anteriores)
+    def _afecta(self, arbol, u, v, peso_anterior, peso_nuevo):
+        distancias = arbol.distancias
+        if distancias[u] == math.inf:
+            return False  # u no es alcanzable desde este origen
+        if peso_nuevo < peso_anterior:
+            return distancias[u] + peso_nuevo < distancias[v]
+        return arbol.predecesores[v] == u  # solo importa si la arista es del árbol
+
+    def _guardar(self, arbol):
+        if arbol.origen in self.arboles:
+            self._descartar(arbol.origen)
+        self.arboles[arbol.origen] = arbol
+        self.memoria_bytes += arbol.tamano_bytes()
+        # Expulsa los menos usados recientemente hasta respetar los límites (siempre queda el nuevo)
+        while len(self.arboles) > 1 and (len(self.arboles) > self.max_arboles
+                                         or self.memoria_bytes > self.limite_memoria_bytes):
+            self._descartar(next(iter(self.arboles)))
+
+    def _descartar(self, origen):
+        arbol = self.arboles.pop(origen)
+        self.memoria_bytes -= arbol.tamano_bytes()
+
+    # Contadores de la caché para mostrarlos en la interfaz o en los logs
+    def estadisticas(self):
+        with self.lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'invalidaciones': self.invalidaciones,
+                'reparaciones': self.reparaciones,
+                'arboles': len(self.arboles),
+                'memoria_bytes': self.memoria_bytes,
+                'version': self.version
+            }
@@ -0,0 +1,180 @@
+import io
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+# Sobre híbrido para las capturas de red: los datos se cifran por bloques con AES-GCM
+# (o ChaCha20-Poly1305) y solo la clave de sesión se cifra con RSA-OAEP.
+#
+# Formato del sobre:
+#   cabecera: MAGICO | algoritmo (1 byte) | largo de la clave envuelta (2 bytes) |
+#             clave envuelta con RSA | prefijo del nonce (8 bytes)
+#   bloques:  largo del bloque cifrado (4 bytes) | bloque cifrado con su etiqueta
+# El nonce de cada bloque es prefijo + contador y el último bloque (siempre vacío) va
+# marcado en los datos asociados, así un sobre truncado no se puede descifrar.
+
+MAGICO = b"SH1"
+ALGORITMOS = {1: AESGCM, 2: ChaCha20Poly1305}
+ALGORITMO_POR_NOMBRE = {"aes-gcm": 1, "chacha20": 2}
+TAMANO_BLOQUE = 256 * 1024  # 256 KB de texto plano por bloque
+
+OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+
+# Caché de claves de sesión: una sola operación RSA (envolver o desenvolver) sirve para
+# muchos ciclos del monitor hasta que la clave rota por número de usos o por tiempo
+class CacheSesion:
+    def __init__(self, max_usos=1000, max_segundos=3600, max_claves_descifradas=16):
+        self.max_usos = max_usos
+        self.max_segundos = max_segundos
+        self.max_claves_descifradas = max_claves_descifradas
+        self.clave = None
+        self.envuelta = None
+        self.huella_publica = None
+        self.usos = 0
+        self.creada = 0.0
+        self.descifradas = OrderedDict()  # clave envuelta -> clave de sesión
+        self.operaciones_rsa = 0
+        self.lock = threading.Lock()
+
+    # Clave de sesión vigente para la clave pública dada (y su versión envuelta con RSA)
+    def clave_para(self, clave_publica):
+        huella = clave_publica.public_numbers().n
+        with self.lock:
+            vencida = (self.clave is None or self.huella_publica != huella
+                       or self.usos >= self.max_usos
+                       or time.monotonic() - self.creada >= self.max_segundos)
+            if vencida:
+                self.clave = os.urandom(32)
+                self.envuelta = clave_publica.encrypt(self.clave, OAEP)
+                self.huella_publica = huella
+                self.usos = 0
+                self.creada = time.monotonic()
+                self.operaciones_rsa += 1
+            self.usos += 1
+            return self.clave, self.envuelta
+
+    # Recupera la clave de sesión de un sobre; solo la primera vez usa la clave privada
+    def clave_desde(self, envuelta, clave_privada):
+        with self.lock:
+            clave = self.descifradas.get(envuelta)
+            if clave is not None:
+                self.descifradas.move_to_end(envuelta)
+                return clave
+            clave = clave_privada.decrypt(envuelta, OAEP)
+            self.operaciones_rsa += 1
+            self.descifradas[envuelta] = clave
+            if len(self.descifradas) > self.max_claves_descifradas:
+                self.descifradas.popitem(last=False)
+            return clave
+
+
+def _leer_exacto(entrada, n):
+    datos = entrada.read(n)
+    if len(datos) != n:
+        raise ValueError("Sobre cifrado incompleto")
+    return datos
+
+
+def _nonce(prefijo, contador):
+    return prefijo + struct.pack(">I", contador)
+
+
+# Cifra todo lo que se lee de `entrada` y lo escribe como sobre en `salida`, bloque a bloque,
+# sin cargar el contenido completo en memoria. Devuelve los bytes escritos
+def cifrar_flujo(entrada, salida, clave_publica, cache, algoritmo="aes-gcm", tamano_bloque=TAMANO_BLOQUE):
+    id_algoritmo = ALGORITMO_POR_NOMBRE[algoritmo]
+    clave, envuelta = cache.clave_para(clave_publica)
+    cifrador = ALGORITMOS[id_algoritmo](clave)
+    prefijo = os.urandom(8)
+    cabecera = MAGICO + struct.pack(">BH", id_algoritmo, len(envuelta)) + envuelta + prefijo
+    salida.write(cabecera)
+    escritos = len(cabecera)
+
+    contador = 0
+    while True:
+        bloque = entrada.read(tamano_bloque)
+        final = not bloque
+        cifrado = cifrador.encrypt(_nonce(prefijo, contador), bloque, cabecera + (b"\x01" if final else b"\x00"))
+        salida.write(struct.pack(">I", len(cifrado)))
+        salida.write(cifrado)
+        escritos += 4 + len(cifrado)
+        contador += 1
+        if final:
+            return escritos
+
+
+# Descifra un sobre leído de `entrada` y escribe el texto plano en `salida`
+def descifrar_flujo(entrada, salida, clave_privada, cache):
+    if _leer_exacto(entrada, len(MAGICO)) != MAGICO:
+        raise ValueError("El contenido no es un sobre cifrado")
+    id_algoritmo, largo_envuelta = struct.unpack(">BH", _leer_exacto(entrada, 3))
+    if id_algoritmo not in ALGORITMOS:
+        raise ValueError(f"Algoritmo de cifrado desconocido: {id_algoritmo}")
+    envuelta = _leer_exacto(entrada, largo_envuelta)
+    prefijo = _leer_exacto(entrada, 8)
+    cabecera = MAGICO + struct.pack(">BH", id_algoritmo, largo_envuelta) + envuelta + prefijo
+    cifrador = ALGORITMOS[id_algoritmo](cache.clave_desde(envuelta, clave_privada))
+
+    contador = 0
+    escritos = 0
+    while True:
+        (largo,) = struct.unpack(">I", _leer_exacto(entrada, 4))
+        cifrado = _leer_exacto(entrada, largo)
+        nonce = _nonce(prefijo, contador)
+        contador += 1
+        if largo == 16:
+            # Un bloque sin datos solo puede ser el bloque final
+            cifrador.decrypt(nonce, cifrado, cabecera + b"\x01")
+            return escritos
+        bloque = cifrador.decrypt(nonce, cifrado, cabecera + b"\x00")
+        salida.write(bloque)
+        escritos += len(bloque)
+
+
+def cifrar_bytes(datos, clave_publica, cache, algoritmo="aes-gcm"):
+    salida = io.BytesIO()
+    cifrar_flujo(io.BytesIO(datos), salida, clave_publica, cache, algoritmo)
+    return salida.getvalue()
+
+
+def descifrar_bytes(sobre, clave_privada, cache):
+    salida = io.BytesIO()
+    descifrar_flujo(io.BytesIO(sobre), salida, clave_privada, cache)
+    return salida.getvalue()
+
+
+# Rendimiento en MB/s del sobre para distintos tamaños de captura
+def benchmark(tamanos_mb=(0.001, 0.1, 1, 16, 64), ciclos=5):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    clave_privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    clave_publica = clave_privada.public_key()
+    for algoritmo in ALGORITMO_POR_NOMBRE:
+        cache_emisor = CacheSesion()
+        cache_receptor = CacheSesion()
+        print(f"\n{algoritmo}:")
+        print(f"{'Tamaño (MB)':>12} {'Cifrar (MB/s)':>14} {'Descifrar (MB/s)':>17}")
+        for tamano_mb in tamanos_mb:
+            datos = os.urandom(int(tamano_mb * 1024 * 1024))
+            inicio = time.perf_counter()
+            for _ in range(ciclos):
+                sobre = cifrar_bytes(datos, clave_publica, cache_emisor, algoritmo)
+            tiempo_cifrar = (time.perf_counter() - inicio) / ciclos
+            inicio = time.perf_counter()
+            for _ in range(ciclos):
+                recuperado = descifrar_bytes(sobre, clave_privada, cache_receptor)
+            tiempo_descifrar = (time.perf_counter() - inicio) / ciclos
+            assert recuperado == datos
+            print(f"{tamano_mb:>12} {tamano_mb / tiempo_cifrar:14.1f} {tamano_mb / tiempo_descifrar:17.1f}")
+        print(f"Operaciones RSA: {cache_emisor.operaciones_rsa} al cifrar, "
+              f"{cache_receptor.operaciones_rsa} al descifrar")
+
+
+if __name__ == "__main__":
+    benchmark()
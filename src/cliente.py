@@ -1,70 +1,317 @@
 import socket
 import os
 import time
+import sys
 import logging
+import threading
+import queue
+from transferencia import send_file_data
+from protocolo import (FRAME_FILE, FRAME_END, FRAME_ACK, FRAME_QUERY, FRAME_STATUS, FRAME_RANGE,
+                       FRAME_HELLO, FRAME_DIGEST, ACK_OK, ACK_CORRUPT, pack_frame, read_frame, unpack_bitmap)
+from compresion import CODEC_NONE, CODEC_NAMES, available_codecs, choose_codec, send_compressed
+from integridad import CHECKSUM_NAMES, default_checksum, new_checksum
+from almacen_metricas import AlmacenMetricas
 
 # Configuración
 SERVER_IP = '100.115.229.55'  # Cambiar por IP del servidor
 PORT = 5001
-BUFFER_SIZE = 4096  # 4KB
+DATA_BUFFER_SIZE = None  # None = autoajustado según el socket; o un tamaño fijo en bytes
+USE_SENDFILE = True  # sendfile(2): el kernel copia del archivo al socket sin pasar por Python
+PARALLEL_STREAMS = 4  # conexiones simultáneas en send_file_parallel
+RANGE_SIZE = 8 * 1024 * 1024  # 8MB por rango
+RANGE_RETRIES = 3  # reintentos por rango (ACK de error o conexión caída) antes de darlo por faltante
+COMPRESSION = True  # negociar compresión con el servidor (zstd si está instalado, si no zlib)
+CHECKSUM_ALGORITHM = default_checksum()  # xxh3 si está instalado, si no crc32; 0 para desactivar
 LOG_FILE = 'client_log.txt'
+METRICS_FILE = 'client_metrics.bin'  # velocidad y tamaño de cada transferencia (ver almacen_metricas.py)
 
 # Configurar logging
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO, 
                    format='%(asctime)s - %(message)s')
+# Las métricas se escriben en lotes desde un hilo de fondo; registrarlas no frena el envío
+metrics = AlmacenMetricas(METRICS_FILE)
+
+# Negocia la sesión al abrirla; devuelve los códecs que también soporta el servidor y la
+# suma de verificación que se usará
+def negotiate_session(s):
+    codecs = available_codecs() if COMPRESSION else []
+    s.sendall(pack_frame(FRAME_HELLO, name=bytes(codecs), flags=CHECKSUM_ALGORITHM))
+    frame = read_frame(s)
+    if frame is None or frame.frame_type != FRAME_HELLO:
+        raise ConnectionError("El servidor no respondió a la negociación de la sesión")
+    return list(frame.name), frame.flags
+
+# Envía la suma de los datos recién enviados, si se negoció una; devuelve la suma
+def send_digest(s, file_id, checksum_algorithm, checksum):
+    if checksum is None:
+        return b""
+    digest = checksum.digest()
+    s.sendall(pack_frame(FRAME_DIGEST, file_id, name=digest, flags=checksum_algorithm))
+    return digest
+
+# Envía varios archivos por una sola conexión persistente con el protocolo de tramas.
+# Los archivos se envían uno tras otro sin esperar confirmaciones; un hilo lector recoge
+# los ACK a medida que llegan. Devuelve un resultado por archivo, en el mismo orden
+def send_files(file_paths):
+    results = [None] * len(file_paths)
+    start_times = {}
+    sent = {}  # file_id -> (códec, bytes enviados por la red, suma de verificación)
+    checksum_algorithm = 0
+    acks = {}
+
+    def read_acks(s):
+        try:
+            while True:
+                frame = read_frame(s)
+                if frame is None:
+                    break
+                if frame.frame_type == FRAME_ACK:
+                    acks[frame.file_id] = (frame.flags, frame.size, time.time(), frame.name)
+        except Exception as e:
+            logging.error(f"Error al leer confirmaciones de {SERVER_IP}: {str(e)}")
+
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.connect((SERVER_IP, PORT))
+            # Cabeceras pequeñas seguidas de datos: sin Nagle para no esperar ACK retrasados
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            negotiated, checksum_algorithm = negotiate_session(s)
+            reader = threading.Thread(target=read_acks, args=(s,), daemon=True)
+            reader.start()
+
+            for file_id, file_path in enumerate(file_paths):
+                try:
+                    file_name = os.path.basename(file_path)
+                    file_size = os.path.getsize(file_path)
+                    codec = choose_codec(file_path, file_size, negotiated)
+                    f = open(file_path, 'rb')
+                except Exception as e:
+                    results[file_id] = _error_result(file_path, e)
+                    continue
+                with f:
+                    start_times[file_id] = (time.time(), file_name, file_size)
+                    # Cabecera con longitudes, nombre y códec, seguida de los datos del archivo
+                    # La suma se calcula en el mismo bucle que envía los datos
+                    s.sendall(pack_frame(FRAME_FILE, file_id, file_size, file_name.encode(), flags=codec))
+                    checksum = new_checksum(checksum_algorithm) if checksum_algorithm else None
+                    if codec == CODEC_NONE:
+                        wire_size = send_file_data(s, f, file_size, DATA_BUFFER_SIZE, USE_SENDFILE,
+                                                   checksum=checksum)
+                    else:
+                        wire_size = send_compressed(s, f, file_size, codec, checksum=checksum)
+                    digest = send_digest(s, file_id, checksum_algorithm, checksum)
+                    sent[file_id] = (codec, wire_size, digest)
+
+            s.sendall(pack_frame(FRAME_END))
+            reader.join()
+    except Exception as e:
+        for file_id, file_path in enumerate(file_paths):
+            if results[file_id] is None and file_id not in acks:
+                results[file_id] = _error_result(file_path, e)
+
+    for file_id, (start_time, file_name, file_size) in start_times.items():
+        if results[file_id] is not None:
+            continue
+        if file_id not in acks:
+            results[file_id] = _error_result(file_paths[file_id], "El servidor no confirmó la recepción")
+            continue
+        status, received, end_time, server_digest = acks[file_id]
+        codec, wire_size, digest = sent[file_id]
+        checksum_info = {
+            'checksum_algorithm': CHECKSUM_NAMES[checksum_algorithm],
+            'checksum': digest.hex(),
+            'checksum_match': digest == server_digest if digest else None
+        }
+        if status == ACK_CORRUPT:
+            results[file_id] = _error_result(
+                file_paths[file_id], f"La suma de verificación no coincide (servidor: {server_digest.hex()})")
+            results[file_id].update(checksum_info)
+            continue
+        if status != ACK_OK:
+            results[file_id] = _error_result(
+                file_paths[file_id], f"El servidor recibió {received} de {file_size} bytes")
+            continue
+
+        # Calcular métricas; la velocidad efectiva cuenta los bytes originales del archivo
+        transfer_time = max(end_time - start_time, 1e-9)
+        speed = (file_size / 1024) / transfer_time  # KB/s
+        ratio = file_size / wire_size if wire_size else 1.0
+
+        log_msg = (f"Archivo {file_name} enviado a {SERVER_IP} - "
+                  f"Tamaño: {file_size/1024:.2f} KB - "
+                  f"Compresión: {CODEC_NAMES[codec]} ({ratio:.2f}x) - "
+                  f"Suma {CHECKSUM_NAMES[checksum_algorithm]}: {digest.hex() or '-'} - "
+                  f"Tiempo: {transfer_time:.2f}s - "
+                  f"Velocidad: {speed:.2f} KB/s")
+
+        print(log_msg)
+        logging.info(log_msg)
+        metrics.registrar_transferencia(SERVER_IP, file_size, transfer_time, end_time)
+
+        results[file_id] = {
+            'status': 'success',
+            'file_name': file_name,
+            'file_size': file_size,
+            'transfer_time': transfer_time,
+            'speed': speed,
+            'codec': CODEC_NAMES[codec],
+            'wire_size': wire_size,
+            'compression_ratio': ratio,
+            'wire_speed': (wire_size / 1024) / transfer_time,  # KB/s por la red
+            **checksum_info,
+            'response': "Archivo recibido exitosamente"
+        }
+    return results
+
+def _error_result(file_path, error):
+    error_msg = f"Error al enviar {file_path}: {str(error)}"
+    print(error_msg)
+    logging.error(error_msg)
+    return {'status': 'error', 'message': str(error)}
 
 def send_file(file_path):
+    return send_files([file_path])[0]
+
+# Envía un archivo partido en rangos por varias conexiones a la vez. El servidor escribe
+# cada rango en su posición y lleva un manifiesto de rangos completos, así que si la
+# transferencia se corta basta con volver a llamar a esta función para enviar lo que falta
+def send_file_parallel(file_path, streams=PARALLEL_STREAMS, range_size=RANGE_SIZE):
     try:
         file_name = os.path.basename(file_path)
         file_size = os.path.getsize(file_path)
-        
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            start_time = time.time()
-            s.connect((SERVER_IP, PORT))
-            
-            # Enviar metadatos primero
-            s.sendall(f"{file_name}<SEPARATOR>{file_size}".encode())
-            
-            # Enviar archivo por chunks
-            with open(file_path, 'rb') as f:
-                while True:
-                    bytes_read = f.read(BUFFER_SIZE)
-                    if not bytes_read:
-                        break
-                    s.sendall(bytes_read)
-            
-            # Recibir confirmación
-            response = s.recv(BUFFER_SIZE).decode()
-            end_time = time.time()
-            
-            # Calcular métricas
-            transfer_time = end_time - start_time
-            speed = (file_size / 1024) / transfer_time  # KB/s
-            
-            log_msg = (f"Archivo {file_name} enviado a {SERVER_IP} - "
-                      f"Tamaño: {file_size/1024:.2f} KB - "
-                      f"Tiempo: {transfer_time:.2f}s - "
-                      f"Velocidad: {speed:.2f} KB/s")
-            
-            print(log_msg)
-            logging.info(log_msg)
-            
-            return {
-                'status': 'success',
-                'file_name': file_name,
-                'file_size': file_size,
-                'transfer_time': transfer_time,
-                'speed': speed,
-                'response': response
-            }
-            
+        name = file_name.encode()
+        start_time = time.time()
+
+        # Preguntar qué rangos tiene ya el servidor
+        with socket.create_connection((SERVER_IP, PORT)) as s:
+            s.sendall(pack_frame(FRAME_QUERY, size=range_size, total=file_size, name=name))
+            status = read_frame(s)
+            s.sendall(pack_frame(FRAME_END))
+        if status is None or status.frame_type != FRAME_STATUS:
+            raise ConnectionError("El servidor no respondió a la consulta de rangos")
+        range_count = status.size
+        already_done = unpack_bitmap(status.name, range_count)
+
+        pending = queue.Queue()
+        for index in range(range_count):
+            if index not in already_done:
+                pending.put(index)
+        acked = set()
+        errors = []
+        attempts = {}  # índice -> veces que se volvió a poner en la cola
+        lock = threading.Lock()
+
+        # Devuelve un rango a la cola si todavía le quedan reintentos
+        def retry(index):
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] <= RANGE_RETRIES:
+                pending.put(index)
+
+        # Cada conexión toma rangos de la cola mientras otro hilo recoge sus ACK. Los rangos
+        # rechazados por el servidor, y los que quedaron sin ACK porque la conexión se cortó,
+        # vuelven a la cola
+        def stream_worker():
+            outstanding = set()  # rangos tomados de la cola que todavía no tienen ACK
+            try:
+                with socket.create_connection((SERVER_IP, PORT)) as s, open(file_path, 'rb') as f:
+                    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    _, checksum_algorithm = negotiate_session(s)
+
+                    def read_acks():
+                        try:
+                            while True:
+                                frame = read_frame(s)
+                                if frame is None:
+                                    break
+                                if frame.frame_type != FRAME_ACK:
+                                    continue
+                                with lock:
+                                    outstanding.discard(frame.file_id)
+                                    if frame.flags == ACK_OK:
+                                        acked.add(frame.file_id)
+                                    else:
+                                        retry(frame.file_id)
+                        except OSError:
+                            pass  # los rangos sin ACK se reintentan al terminar el hilo
+
+                    reader = threading.Thread(target=read_acks, daemon=True)
+                    reader.start()
+                    while True:
+                        try:
+                            index = pending.get_nowait()
+                        except queue.Empty:
+                            break
+                        with lock:
+                            outstanding.add(index)
+                        offset = index * range_size
+                        length = min(range_size, file_size - offset)
+                        s.sendall(pack_frame(FRAME_RANGE, index, length, name, offset=offset, total=file_size))
+                        # Cada rango lleva su propia suma: el servidor solo marca rangos verificados
+                        checksum = new_checksum(checksum_algorithm) if checksum_algorithm else None
+                        send_file_data(s, f, length, DATA_BUFFER_SIZE, USE_SENDFILE, offset, checksum)
+                        send_digest(s, index, checksum_algorithm, checksum)
+                    s.sendall(pack_frame(FRAME_END))
+                    reader.join()
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+            finally:
+                with lock:
+                    for index in outstanding:
+                        retry(index)
+
+        # Se lanzan conexiones mientras queden rangos en la cola (los reintentos vuelven a ella);
+        # como cada rango se reintenta a lo sumo RANGE_RETRIES veces, alcanza con esas rondas
+        connections = 0
+        for _ in range(RANGE_RETRIES + 1):
+            if pending.empty():
+                break
+            workers = [threading.Thread(target=stream_worker) for _ in range(min(streams, pending.qsize()))]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            connections = max(connections, len(workers))
+
+        missing = range_count - len(already_done) - len(acked)
+        if missing > 0:
+            raise ConnectionError(f"Faltan {missing} de {range_count} rangos (se pueden reanudar): "
+                                  f"{'; '.join(errors) or 'sin confirmación del servidor'}")
+
+        transfer_time = max(time.time() - start_time, 1e-9)
+        sent_bytes = sum(min(range_size, file_size - i * range_size) for i in acked)
+        speed = (sent_bytes / 1024) / transfer_time  # KB/s
+
+        log_msg = (f"Archivo {file_name} enviado a {SERVER_IP} en {connections} conexiones - "
+                  f"Tamaño: {file_size/1024:.2f} KB - "
+                  f"Rangos reanudados: {len(already_done)}/{range_count} - "
+                  f"Tiempo: {transfer_time:.2f}s - "
+                  f"Velocidad: {speed:.2f} KB/s")
+        print(log_msg)
+        logging.info(log_msg)
+        metrics.registrar_transferencia(SERVER_IP, sent_bytes, transfer_time)
+
+        return {
+            'status': 'success',
+            'file_name': file_name,
+            'file_size': file_size,
+            'transfer_time': transfer_time,
+            'speed': speed,
+            'streams': connections,
+            'resumed_ranges': len(already_done),
+            'response': "Archivo recibido exitosamente"
+        }
+
     except Exception as e:
-        error_msg = f"Error al enviar {file_path}: {str(e)}"
-        print(error_msg)
-        logging.error(error_msg)
-        return {'status': 'error', 'message': str(e)}
+        return _error_result(file_path, e)
 
 if __name__ == "__main__":
+    # Con varias rutas como argumentos se envían todas en una misma sesión
+    if len(sys.argv) > 1:
+        for result in send_files(sys.argv[1:]):
+            print(result)
+        sys.exit(0)
+
     file_to_send = input("Ingrese la ruta del archivo a enviar: ")
     if os.path.exists(file_to_send):
         result = send_file(file_to_send)
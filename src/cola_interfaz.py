@@ -0,0 +1,106 @@
+import sys
+import threading
+import time
+from collections import deque
+
+# Cola de actualizaciones de la interfaz. Los hilos de trabajo nunca tocan Tk: dejan aquí las
+# líneas de log, el progreso y el contador, y el bucle de Tk las recoge con tomar() en un
+# temporizador fijo (unas 30 veces por segundo). Entre dos recogidas:
+#  - las líneas se acumulan y se insertan juntas con un solo insert
+#  - del progreso y del contador solo importa el último valor
+#  - si llegan más líneas de las que el log puede mostrar, las más viejas se descartan aquí
+#    (el widget las borraría igual) y se cuenta cuántas se omitieron
+
+MAX_LINEAS = 5000  # líneas que conserva el log de la interfaz
+INTERVALO_MS = 33  # ~30 Hz
+
+
+class ActualizacionesInterfaz:
+    def __init__(self, max_lineas=MAX_LINEAS):
+        self.lineas = deque(maxlen=max_lineas)
+        self.omitidas = 0
+        self.progreso_pendiente = None
+        self.contador_pendiente = None
+        self.lock = threading.Lock()
+
+    def log(self, mensaje):
+        with self.lock:
+            if len(self.lineas) == self.lineas.maxlen:
+                self.omitidas += 1
+            self.lineas.append(mensaje)
+
+    def progreso(self, valor):
+        with self.lock:
+            self.progreso_pendiente = valor
+
+    def contador(self, valor):
+        with self.lock:
+            self.contador_pendiente = valor
+
+    # Devuelve (texto a insertar o "", progreso o None, contador o None) y vacía la cola
+    def tomar(self):
+        with self.lock:
+            lineas = list(self.lineas)
+            self.lineas.clear()
+            omitidas, self.omitidas = self.omitidas, 0
+            progreso, self.progreso_pendiente = self.progreso_pendiente, None
+            contador, self.contador_pendiente = self.contador_pendiente, None
+        if omitidas:
+            lineas.insert(0, f"... ({omitidas} líneas omitidas)")
+        texto = "\n".join(lineas) + "\n" if lineas else ""
+        return texto, progreso, contador
+
+
+# 10 000 transferencias simuladas (100 pasos de progreso y 10 líneas de log cada una) desde
+# varios hilos mientras un "bucle de interfaz" recoge a 30 Hz y mantiene un log limitado.
+# Mide cuánto trabajo hace cada tick: si se mantiene estable, la interfaz no se congela
+def benchmark(transferencias=10000, hilos=8, pasos=100, lineas_por_transferencia=10):
+    actualizaciones = ActualizacionesInterfaz()
+    log = deque(maxlen=MAX_LINEAS)  # hace de ScrolledText con el límite de líneas
+    ticks = []
+    terminado = threading.Event()
+
+    def trabajador(primera):
+        for t in range(primera, transferencias, hilos):
+            for linea in range(lineas_por_transferencia):
+                actualizaciones.log(f"transferencia {t}: línea {linea}")
+            for paso in range(pasos):
+                actualizaciones.progreso(100.0 * (t * pasos + paso) / (transferencias * pasos))
+            actualizaciones.contador(t)
+
+    productores = [threading.Thread(target=trabajador, args=(i,)) for i in range(hilos)]
+    inicio = time.perf_counter()
+    for productor in productores:
+        productor.start()
+
+    def interfaz():
+        while True:
+            final = terminado.is_set()
+            tick = time.perf_counter()
+            texto, _, _ = actualizaciones.tomar()
+            if texto:
+                log.extend(texto.splitlines())
+            ticks.append((time.perf_counter() - tick, texto.count("\n")))
+            if final:
+                break
+            time.sleep(INTERVALO_MS / 1000)
+
+    consumidor = threading.Thread(target=interfaz)
+    consumidor.start()
+    for productor in productores:
+        productor.join()
+    produccion = time.perf_counter() - inicio
+    terminado.set()
+    consumidor.join()
+
+    tiempos = sorted(t for t, _ in ticks)
+    eventos = transferencias * (pasos + lineas_por_transferencia + 1)
+    print(f"{transferencias} transferencias, {eventos} actualizaciones desde {hilos} hilos en {produccion:.2f} s")
+    print(f"  ticks de interfaz: {len(ticks)} (uno cada {INTERVALO_MS} ms en lugar de uno por actualización)")
+    print(f"  trabajo por tick: mediana {1000 * tiempos[len(tiempos) // 2]:.2f} ms, "
+          f"máximo {1000 * tiempos[-1]:.2f} ms; líneas insertadas por tick como mucho "
+          f"{max(n for _, n in ticks)}; líneas en el log {len(log)}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
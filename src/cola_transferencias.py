@@ -0,0 +1,175 @@
+import heapq
+import itertools
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Planificador de transferencias con un número fijo de hilos. Los trabajos esperan en un
+# montículo ordenado por prioridad (tamaño del archivo, plazo, ...; menor = antes) y no en la
+# cola del ThreadPoolExecutor: cada hilo saca el siguiente trabajo al terminar el anterior,
+# así un lote de 10 000 archivos ocupa 10 000 tuplas en el montículo y no 10 000 hilos, y un
+# lote nuevo con trabajos más urgentes se adelanta a los que ya estaban esperando.
+# Cada lote devuelve un Future que se completa cuando terminan (o se cancelan) todos sus
+# trabajos. Si `activo()` pasa a ser falso (la ventana se cerró) los trabajos en espera se
+# cancelan sin ejecutarse.
+
+MAX_TRABAJADORES = 8
+
+
+# Trabajos de un envío a la cola; futuro.result() es el resumen
+# {'total', 'completados', 'errores', 'cancelados', 'ultimo_error'}
+class LoteTransferencias:
+    def __init__(self, total):
+        self.total = total
+        self.completados = 0
+        self.errores = 0
+        self.cancelados = 0
+        self.ultimo_error = None
+        self.futuro = Future()
+        self.lock = threading.Lock()
+        if total == 0:
+            self.futuro.set_result(self.resumen())
+
+    def _terminar(self, error=None, cancelado=False):
+        with self.lock:
+            if cancelado:
+                self.cancelados += 1
+            elif error is not None:
+                self.errores += 1
+                self.ultimo_error = error
+            else:
+                self.completados += 1
+            listo = self.completados + self.errores + self.cancelados == self.total
+        # El resultado se fija fuera del lock: los callbacks del Future corren en este hilo
+        if listo:
+            self.futuro.set_result(self.resumen())
+
+    def resumen(self):
+        return {'total': self.total, 'completados': self.completados, 'errores': self.errores,
+                'cancelados': self.cancelados, 'ultimo_error': self.ultimo_error}
+
+
+class ColaTransferencias:
+    def __init__(self, trabajadores=MAX_TRABAJADORES, activo=None):
+        self.trabajadores = trabajadores
+        self.activo = activo  # función sin argumentos; si devuelve False se deja de planificar
+        self.executor = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="transferencia")
+        self.cola = []  # montículo de (prioridad, secuencia, lote, funcion, args)
+        self.secuencia = itertools.count()  # desempata por orden de llegada
+        self.bucles = 0  # hilos del pool sacando trabajos ahora mismo
+        self.lock = threading.Lock()
+
+    # Encola trabajos (prioridad, funcion, args) y devuelve su LoteTransferencias
+    def enviar_lote(self, trabajos):
+        trabajos = list(trabajos)
+        lote = LoteTransferencias(len(trabajos))
+        with self.lock:
+            entradas = [(prioridad, next(self.secuencia), lote, funcion, args)
+                        for prioridad, funcion, args in trabajos]
+            # Un lote grande se reordena entero de una vez; uno pequeño se inserta en su sitio
+            if len(entradas) > len(self.cola):
+                self.cola.extend(entradas)
+                heapq.heapify(self.cola)
+            else:
+                for entrada in entradas:
+                    heapq.heappush(self.cola, entrada)
+            nuevos = min(self.trabajadores - self.bucles, len(self.cola))
+            self.bucles += nuevos
+        for _ in range(nuevos):
+            self.executor.submit(self._bucle)
+        return lote
+
+    # Cada hilo ejecuta trabajos del montículo hasta vaciarlo o hasta que se cancele
+    def _bucle(self):
+        while True:
+            with self.lock:
+                if not self.cola or (self.activo is not None and not self.activo()):
+                    self.bucles -= 1
+                    descartados = self._vaciar_cola()
+                    break
+                _, _, lote, funcion, args = heapq.heappop(self.cola)
+            try:
+                funcion(*args)
+            except Exception as e:
+                lote._terminar(error=e)
+            else:
+                lote._terminar()
+        for lote in descartados:
+            lote._terminar(cancelado=True)
+
+    # Saca todos los trabajos en espera (con el lock tomado); devuelve sus lotes para cancelarlos
+    def _vaciar_cola(self):
+        descartados = [entrada[2] for entrada in self.cola]
+        self.cola.clear()
+        return descartados
+
+    # Cancela los trabajos que aún no empezaron; los que están en curso terminan solos
+    def cancelar(self):
+        with self.lock:
+            descartados = self._vaciar_cola()
+        for lote in descartados:
+            lote._terminar(cancelado=True)
+
+    def pendientes(self):
+        with self.lock:
+            return len(self.cola)
+
+    def cerrar(self, esperar=False):
+        self.cancelar()
+        self.executor.shutdown(wait=esperar)
+
+
+# Memoria residente del proceso en MB (Linux)
+def _memoria_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+# Un hilo por archivo frente a la cola con hilos fijos. Los trabajos esperan a que se haya
+# lanzado el lote entero (como una transferencia simulada, que dura segundos), así se ve
+# cuántos hilos llegan a estar vivos a la vez. Se mide el tiempo de lanzar el lote, los hilos
+# y la memoria residente con el lote en marcha, y el tiempo de vaciarlo una vez liberado
+def benchmark(tamanos=(1000, 10000, 20000), trabajadores=MAX_TRABAJADORES):
+    print(f"{'archivos':>9} {'modo':<17} {'lanzar (ms)':>12} {'µs/archivo':>11} {'hilos vivos':>12} "
+          f"{'memoria +MB':>12} {'vaciar (s)':>11}")
+    for n in tamanos:
+        for modo in ("hilo por archivo", "cola"):
+            liberar = threading.Event()
+            base_hilos = threading.active_count()
+            base_memoria = _memoria_mb()
+            inicio = time.perf_counter()
+            if modo == "cola":
+                cola = ColaTransferencias(trabajadores)
+                lote = cola.enviar_lote((i, liberar.wait, ()) for i in range(n))
+            else:
+                hilos = []
+                for _ in range(n):
+                    hilo = threading.Thread(target=liberar.wait, daemon=True)
+                    hilo.start()
+                    hilos.append(hilo)
+            lanzar = time.perf_counter() - inicio
+            time.sleep(0.2)
+            hilos_vivos = threading.active_count() - base_hilos
+            memoria = _memoria_mb() - base_memoria
+            inicio = time.perf_counter()
+            liberar.set()
+            if modo == "cola":
+                lote.futuro.result()
+                cola.cerrar(esperar=True)
+            else:
+                for hilo in hilos:
+                    hilo.join()
+            vaciar = time.perf_counter() - inicio
+            print(f"{n:>9} {modo:<17} {1000 * lanzar:12.1f} {1e6 * lanzar / n:11.1f} {hilos_vivos:12d} "
+                  f"{memoria:12.1f} {vaciar:11.2f}")
+
+
+if __name__ == "__main__":
+    benchmark(tuple(int(n) for n in sys.argv[1:]) or (1000, 10000, 20000))
@@ -0,0 +1,230 @@
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from protocolo import recv_exact
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional; sin él se negocia solo zlib
+    zstandard = None
+
+# Compresión en streaming para las transferencias. El archivo se parte en bloques que se
+# comprimen de forma independiente en un grupo de hilos (zlib y zstd liberan el GIL), así
+# la CPU trabaja mientras el socket envía los bloques anteriores. Cada bloque viaja como:
+#   largo comprimido (4) | largo original (4) | guardado sin comprimir (1) | datos
+# y un bloque con largo 0 marca el final del archivo.
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_NONE: "ninguno", CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+
+CHUNK = struct.Struct(">IIB")
+COMPRESS_CHUNK_SIZE = 1024 * 1024  # 1MB por bloque
+ZLIB_LEVEL = 1  # nivel rápido: en red importa más la velocidad que el último punto de compresión
+ZSTD_LEVEL = 3
+MIN_COMPRESS_SIZE = 4096  # los archivos más chicos se envían tal cual
+MIN_RATIO = 1.1  # por debajo de esta relación no vale la pena comprimir
+SAMPLE_SIZE = 64 * 1024
+
+# Formatos que ya vienen comprimidos
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".mp3", ".mp4", ".mkv", ".avi", ".mov", ".pdf"
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_zstd = threading.local()
+
+
+def available_codecs():
+    codecs = [CODEC_ZLIB]
+    if zstandard is not None:
+        codecs.insert(0, CODEC_ZSTD)
+    return codecs
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+        return _executor
+
+
+def compress(codec, data):
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == CODEC_ZSTD:
+        # Los compresores de zstd no se comparten entre hilos
+        compressor = getattr(_zstd, "compressor", None)
+        if compressor is None:
+            compressor = _zstd.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return compressor.compress(data)
+    raise ValueError(f"Códec desconocido: {codec}")
+
+
+def decompress(codec, data, raw_length):
+    if codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj()
+        result = decompressor.decompress(data, raw_length)
+    elif codec == CODEC_ZSTD:
+        result = zstandard.ZstdDecompressor().decompress(data, max_output_size=raw_length)
+    else:
+        raise ValueError(f"Códec desconocido: {codec}")
+    if len(result) != raw_length:
+        raise ValueError("El bloque descomprimido no tiene el tamaño anunciado")
+    return result
+
+
+# Política adaptativa: elige el códec para un archivo entre los negociados con el servidor.
+# No comprime archivos pequeños, formatos ya comprimidos ni datos cuya muestra no mejora
+def choose_codec(file_path, file_size, negotiated):
+    codecs = [codec for codec in available_codecs() if codec in negotiated]
+    if not codecs or file_size < MIN_COMPRESS_SIZE:
+        return CODEC_NONE
+    if os.path.splitext(file_path)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        return CODEC_NONE
+    with open(file_path, "rb") as f:
+        sample = f.read(SAMPLE_SIZE)
+    if len(sample) / max(1, len(zlib.compress(sample, 1))) < MIN_RATIO:
+        return CODEC_NONE
+    return codecs[0]
+
+
+def _compress_chunk(codec, block, skip):
+    if not skip:
+        compressed = compress(codec, block)
+        if len(compressed) * MIN_RATIO <= len(block):
+            return compressed, len(block), 0
+    return block, len(block), 1
+
+
+# Envía `size` bytes de `f` comprimidos por bloques. Mantiene una ventana de bloques en
+# compresión en paralelo y los envía en orden. Si los primeros bloques no comprimen, el
+# resto se envía sin comprimir para no gastar CPU. Con `checksum` se suman los bytes
+# originales a medida que se leen. Devuelve los bytes enviados por la red
+def send_compressed(sock, f, size, codec, chunk_size=COMPRESS_CHUNK_SIZE, checksum=None):
+    executor = _get_executor()
+    window = 2 * (os.cpu_count() or 2)
+    pending = deque()
+    stats = {"wire": 0, "raw": 0, "checked": 0}
+    skip = False
+
+    def send_next():
+        data, raw_length, stored = pending.popleft().result()
+        sock.sendall(CHUNK.pack(len(data), raw_length, stored))
+        sock.sendall(data)
+        stats["wire"] += CHUNK.size + len(data)
+        stats["raw"] += raw_length
+        stats["checked"] += 1
+
+    read = 0
+    while read < size:
+        block = f.read(min(chunk_size, size - read))
+        if not block:
+            break
+        read += len(block)
+        if checksum is not None:
+            checksum.update(block)
+        pending.append(executor.submit(_compress_chunk, codec, block, skip))
+        while len(pending) >= window:
+            send_next()
+        if not skip and stats["checked"] >= 4 and stats["raw"] < MIN_RATIO * stats["wire"]:
+            skip = True
+    while pending:
+        send_next()
+    sock.sendall(CHUNK.pack(0, 0, 0))
+    return stats["wire"] + CHUNK.size
+
+
+# Recibe un archivo comprimido por bloques y lo escribe descomprimido en `path`.
+# Con `checksum` se suman los bytes ya descomprimidos. Devuelve los bytes originales escritos
+def receive_compressed(conn, path, size, codec, checksum=None):
+    written = 0
+    with open(path, "wb") as f:
+        while True:
+            header = recv_exact(conn, CHUNK.size)
+            if not header:
+                break  # conexión cerrada: el llamador ve que faltan bytes
+            length, raw_length, stored = CHUNK.unpack(header)
+            if length == 0:
+                break
+            if written + raw_length > size:
+                raise ValueError("El archivo comprimido supera el tamaño anunciado")
+            data = recv_exact(conn, length)
+            if len(data) != length:
+                break
+            block = data if stored else decompress(codec, data, raw_length)
+            if checksum is not None:
+                checksum.update(block)
+            f.write(block)
+            written += len(block)
+    return written
+
+
+# Relación de compresión y velocidad efectiva (bytes originales por segundo) enviando
+# datos comprimibles y aleatorios por loopback con cada códec
+def benchmark(size_mb=64):
+    import socket
+    import tempfile
+    import time
+
+    folder = tempfile.mkdtemp(prefix="compresion_")
+    size = size_mb * 1024 * 1024
+    lines = [f"{i};10.0.{i % 256}.{i % 7};latencia={i % 97}ms;estado=OK\n".encode() for i in range(20000)]
+    log_block = b"".join(lines)
+    samples = {
+        "texto (registros)": (log_block * (size // len(log_block) + 1))[:size],
+        "aleatorio": os.urandom(size),
+    }
+    try:
+        for kind, data in samples.items():
+            source = os.path.join(folder, "origen.bin")
+            target = os.path.join(folder, "destino.bin")
+            with open(source, "wb") as f:
+                f.write(data)
+            print(f"\n{kind}, {size_mb} MB:")
+            for codec in [CODEC_NONE] + available_codecs():
+                sender, receiver = socket.socketpair()
+                result = {}
+
+                def receive():
+                    if codec == CODEC_NONE:
+                        received = 0
+                        with open(target, "wb") as out:
+                            while received < size:
+                                chunk = receiver.recv(1024 * 1024)
+                                out.write(chunk)
+                                received += len(chunk)
+                    else:
+                        result["received"] = receive_compressed(receiver, target, size, codec)
+
+                thread = threading.Thread(target=receive)
+                thread.start()
+                start = time.perf_counter()
+                with open(source, "rb") as f:
+                    if codec == CODEC_NONE:
+                        wire = sender.sendfile(f, 0, size)
+                    else:
+                        wire = send_compressed(sender, f, size, codec)
+                thread.join()
+                elapsed = time.perf_counter() - start
+                sender.close()
+                receiver.close()
+                assert os.path.getsize(target) == size
+                print(f"  {CODEC_NAMES[codec]:<8} relación {size / wire:6.2f}x  "
+                      f"{size_mb / elapsed:8.1f} MB/s efectivos")
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
@@ -4,6 +4,21 @@ import time
 import math
 import os
 import threading
+from cola_interfaz import ActualizacionesInterfaz, INTERVALO_MS, MAX_LINEAS
+from cola_transferencias import ColaTransferencias
+from malla_latencia import MeshProber
+from lector_topologia import cargar
+from motor_simulacion import MotorSimulacion, MULTIPATH_RUTAS
+
+# Enlaces medidos por el sondeo de latencia: (nodo_a, nodo_b) -> (host, puerto) del servidor
+# de sondas (latencia_server.py) que mide ese enlace. Vacío = se usan las latencias fijas del grafo
+PROBE_LINKS = {}
+PROBE_INTERVAL_S = 1.0  # segundos entre rondas de sondeo
+TRANSFER_WORKERS = 8  # simulaciones de transferencia a la vez; el resto espera en la cola
+TRANSFER_PRIORITY = "size"  # orden de la cola: "size" (archivo más pequeño primero) o "fifo"
+# Topología de la red (latencias y anchos de banda de cada enlace); el mismo archivo que usa
+# motor_simulacion.py desde la línea de comandos
+TOPOLOGY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topologia.json")
 
 # Define la clase principal de la aplicación de transferencia de archivos VPN
 class VPNFileTransferApp:
@@ -13,20 +28,20 @@ class VPNFileTransferApp:
         self.root.title("Implementación de Dijkstra (File Transfer Optimizer)")  # Título de la ventana
         self.root.geometry("800x600")  # Dimensiones iniciales de la ventana
 
-        # Grafo de conexiones: representa la red con nodos y latencias (pesos en ms)
-        self.graph = {
-            "Dispositivo": {"ClienteRemotoVPN": 8.84, "Speedtest": 7.594},
-            "ClienteRemotoVPN": {"Dispositivo": 8.84, "Speedtest": 15.0},
-            "Speedtest": {"Dispositivo": 7.594, "ClienteRemotoVPN": 15.0}
-        }
-        # Asegura que todos los nodos mencionados en las conexiones internas
-        # también sean claves de primer nivel en el grafo para consistencia.
-        all_nodes = set(self.graph.keys())
-        for node in self.graph:
-            all_nodes.update(self.graph[node].keys())
-        for node in all_nodes:
-            if node not in self.graph:
-                self.graph[node] = {}  # Añade nodos faltantes con conexiones vacías
+        # Grafo de conexiones: representa la red con nodos y latencias (pesos en ms), y el ancho
+        # de banda de cada enlace (Mbps) con la misma forma. Se leen de TOPOLOGY_FILE; todos los
+        # nodos son claves de primer nivel aunque no tengan enlaces
+        self.graph, self.bandwidth = cargar(TOPOLOGY_FILE).diccionarios()
+        # Motor de simulación sin interfaz (motor_simulacion.py): rutas, estimaciones de tiempo
+        # y sus cachés. La interfaz solo le pide resultados y los muestra
+        self.engine = MotorSimulacion(self.graph, self.bandwidth, origen="Dispositivo")
+        # Caché de árboles de rutas del motor; en modo dinámico los cambios de latencia reparan
+        # los árboles en lugar de recalcularlos
+        self.route_cache = self.engine.cache_rutas
+        # Sondeo de la malla en segundo plano: cada ronda actualiza los pesos de una sola vez
+        self.mesh_prober = None
+        if PROBE_LINKS:
+            self.mesh_prober = MeshProber(PROBE_LINKS, self.update_edge_latencies).start(PROBE_INTERVAL_S)
 
         self.selected_files = []  # Lista para almacenar las rutas de los archivos seleccionados
         self.selected_device = tk.StringVar()  # Variable para almacenar el dispositivo destino seleccionado
@@ -35,44 +50,73 @@ class VPNFileTransferApp:
         self.total_progress = 0.0  # Progreso total acumulado para la barra de progreso (usa float para precisión)
         self.progress_lock = threading.Lock()  # Objeto Lock para sincronizar el acceso a variables compartidas por hilos
         self.running = True #variable para controlar el hilo
+        # Cola de simulaciones con un número fijo de hilos; al cerrar la ventana (running = False)
+        # los archivos que aún esperan se cancelan
+        self.transfer_queue = ColaTransferencias(TRANSFER_WORKERS, activo=lambda: self.running)
+        # Log, progreso y contador pasan por esta cola: los hilos nunca llaman a Tk y la interfaz
+        # los recoge juntos cada INTERVALO_MS (ver drain_ui_updates)
+        self.ui_updates = ActualizacionesInterfaz(MAX_LINEAS)
 
         # Llama al método para crear los elementos de la interfaz gráfica
         # Esta llamada se mantiene aquí para asegurar que la GUI se construya al instanciar la clase.
         self.create_widgets()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(INTERVALO_MS, self.drain_ui_updates)
 
     # Método para encontrar la ruta óptima (menor latencia) usando el algoritmo de Dijkstra
+    # La búsqueda la hace el motor de rutas (montículo binario sobre arreglos CSR) y el árbol
+    # resultante se guarda en caché para el resto de archivos que salen del mismo origen
     def find_optimal_path(self, start_node, destination_node):
-        if start_node not in self.graph or destination_node not in self.graph:
-            return math.inf, []
-
-        shortest_paths = {node: (math.inf, []) for node in self.graph}
-        shortest_paths[start_node] = (0, [start_node])
-        unvisited_nodes = set(self.graph.keys())
-
-        while unvisited_nodes:
-            if not self.running:
-                return math.inf, []
-            current_node = min(unvisited_nodes, key=lambda node: shortest_paths[node][0])
-            
-            if shortest_paths[current_node][0] == math.inf:
-                break
-            
-            unvisited_nodes.remove(current_node)
-
-            for neighbor, latency in self.graph.get(current_node, {}).items():
-                if neighbor not in shortest_paths:
-                    continue
-
-                potential_latency = shortest_paths[current_node][0] + latency
-                if potential_latency < shortest_paths[neighbor][0]:
-                    shortest_paths[neighbor] = (potential_latency, shortest_paths[current_node][1] + [neighbor])
-        
-        path_info = shortest_paths.get(destination_node)
-        if path_info and path_info[0] != math.inf:
-            return path_info
-        else:
+        if not self.running:
             return math.inf, []
+        return self.route_cache.ruta(start_node, destination_node)
+
+    # Método para cambiar la latencia de un enlace (en ambos sentidos); math.inf lo elimina
+    # Todas las modificaciones de self.graph deben pasar por aquí para que la caché se entere
+    def update_edge_latency(self, node_a, node_b, latency_ms):
+        self.update_edge_latencies({(node_a, node_b): latency_ms})
+
+    # Igual que update_edge_latency pero para un lote {(nodo_a, nodo_b): latencia}: la caché
+    # de rutas se actualiza una sola vez (lo usa el sondeo de la malla al final de cada ronda)
+    def update_edge_latencies(self, updates):
+        self.engine.actualizar_latencias(updates)
+
+    # Método para cambiar el ancho de banda (Mbps) de un enlace en ambos sentidos
+    def update_edge_bandwidth(self, node_a, node_b, bandwidth_mbps):
+        self.engine.actualizar_ancho(node_a, node_b, bandwidth_mbps)
+
+    # Método para encontrar la ruta más rápida para un archivo: minimiza latencia + tamaño /
+    # ancho de banda del enlace más lento (ver rutas_ancho.py)
+    # Devuelve (tiempo_s, latencia_ms, ancho_cuello_mbps, [nodos])
+    def find_fastest_path(self, start_node, destination_node, size_bytes):
+        if not self.running:
+            return math.inf, math.inf, 0.0, []
+        return self.engine.ruta_rapida(start_node, destination_node, size_bytes)
+
+    # Grafo con latencias y anchos de banda; se reconstruye solo cuando cambió alguno de los dos
+    def get_network_graph(self):
+        return self.engine.grafo()
+
+    # Método para repartir un archivo grande entre varias rutas en paralelo, en proporción al
+    # ancho de banda de cada una (ver rutas_k.py); devuelve el plan con las rutas por nombre
+    def plan_multipath_transfer(self, start_node, destination_node, size_bytes, k=MULTIPATH_RUTAS):
+        if not self.running:
+            return {'tiempo_s': math.inf, 'rutas': [], 'tiempo_una_ruta_s': math.inf}
+        return self.engine.reparto(start_node, destination_node, size_bytes, k)
+
+    # Índice precalculado de latencias entre todos los pares de nodos (matriz completa en
+    # grafos pequeños, Contraction Hierarchies en grandes); se rehace cuando cambia el grafo
+    def get_route_index(self):
+        return self.engine.indice_rutas()
+
+    # Método para consultar muchas rutas de una vez: latencia (ms) de cada par (origen, destino)
+    # por nombre, math.inf si no hay ruta o el nodo no existe
+    def batch_route_latencies(self, pairs):
+        return self.engine.latencias_lote(pairs)
+
+    # Guarda el índice actual en un archivo que el planificador abre con indice_rutas.cargar_indice
+    def export_route_index(self, path):
+        self.get_route_index().guardar(path)
 
     # Método que simula la transferencia de un solo archivo (ejecutado en un hilo separado)
     def simulate_transfer_for_one_file_thread(self, file_name_for_log, actual_file_size_bytes, destination_node, num_total_files_in_batch):
@@ -81,42 +125,50 @@ class VPNFileTransferApp:
                 return
             with self.progress_lock:
                 self.active_transfers += 1
-            self.root.after(0, self.update_transfer_counter_display)
+                self.update_transfer_counter_display(self.active_transfers)
 
             size_mb = actual_file_size_bytes / (1024 * 1024)
-            self.root.after(0, self.log_message, f"\n--- Iniciando simulación para: {file_name_for_log} ({size_mb:.2f} MB) ---")
+            self.log_message(f"\n--- Iniciando simulación para: {file_name_for_log} ({size_mb:.2f} MB) ---")
             
-            start_node = "Dispositivo"
+            start_node = self.engine.origen
             
-            optimal_latency_ms, optimal_path_nodes = self.find_optimal_path(start_node, destination_node)
-            transfer_time_optimal_s = math.inf
+            # El motor calcula la ruta más rápida (latencia + tamaño / ancho de banda del cuello
+            # de botella), el enlace directo y el reparto en varias rutas de los archivos grandes
+            estimate = self.engine.estimar(destination_node, actual_file_size_bytes, start_node)
+            transfer_time_optimal_s = estimate['tiempo_s']
 
             if not self.running:
                 return
 
-            if optimal_latency_ms != math.inf and optimal_path_nodes:
-                transfer_time_optimal_s = size_mb * (optimal_latency_ms / 100.0)
-                self.root.after(0, self.log_message, f"  Ruta Óptima: {' → '.join(optimal_path_nodes)}")
-                self.root.after(0, self.log_message, f"   Latencia (Óptima): {optimal_latency_ms:.2f} ms")
-                self.root.after(0, self.log_message, f"   Tiempo Estimado (Óptima): {transfer_time_optimal_s:.2f} s")
+            if transfer_time_optimal_s != math.inf and estimate['ruta']:
+                self.log_message(f"  Ruta Óptima: {' → '.join(estimate['ruta'])}")
+                self.log_message(f"   Latencia (Óptima): {estimate['latencia_ms']:.2f} ms")
+                self.log_message(f"   Ancho de banda (Óptima): {estimate['ancho_mbps']:.1f} Mbps")
+                self.log_message(f"   Tiempo Estimado (Óptima): {transfer_time_optimal_s:.2f} s")
+                plan = estimate['reparto']
+                if plan is not None:
+                    self.log_message(f"  Reparto en {len(plan['rutas'])} rutas en paralelo:")
+                    for route, latency, bandwidth, part in plan['rutas']:
+                        self.log_message(f"   {' → '.join(route)}: {part / (1024 * 1024):.1f} MB "
+                                         f"({bandwidth:.1f} Mbps, {latency:.2f} ms)")
+                    self.log_message(f"   Tiempo Estimado (Paralelo): {plan['tiempo_s']:.2f} s")
             else:
-                self.root.after(0, self.log_message, "  Ruta Óptima: No encontrada o no aplicable.")
+                self.log_message("  Ruta Óptima: No encontrada o no aplicable.")
 
-            direct_latency_ms = self.graph.get(start_node, {}).get(destination_node, math.inf)
-            
             if not self.running:
                 return
-            if direct_latency_ms != math.inf:
-                transfer_time_direct_s = size_mb * (direct_latency_ms / 100.0)
-                self.root.after(0, self.log_message, f"  Ruta Directa: {start_node} → {destination_node}")
-                self.root.after(0, self.log_message, f"   Latencia (Directa): {direct_latency_ms:.2f} ms")
-                self.root.after(0, self.log_message, f"   Tiempo Estimado (Directa): {transfer_time_direct_s:.2f} s")
+            direct = estimate['directa']
+            if direct is not None:
+                self.log_message(f"  Ruta Directa: {start_node} → {destination_node}")
+                self.log_message(f"   Latencia (Directa): {direct['latencia_ms']:.2f} ms")
+                self.log_message(f"   Ancho de banda (Directa): {direct['ancho_mbps']:.1f} Mbps")
+                self.log_message(f"   Tiempo Estimado (Directa): {direct['tiempo_s']:.2f} s")
             else:
-                self.root.after(0, self.log_message, "  Ruta Directa: No disponible o no aplicable.")
+                self.log_message("  Ruta Directa: No disponible o no aplicable.")
             if not self.running:
                 return
             if transfer_time_optimal_s != math.inf and transfer_time_optimal_s > 0:
-                self.root.after(0, self.log_message, f"  Simulando transferencia (vía óptima) para {file_name_for_log}...")
+                self.log_message(f"  Simulando transferencia (vía óptima) para {file_name_for_log}...")
                 simulation_steps = 100
                 for i in range(1, simulation_steps + 1):
                     if not self.running:
@@ -127,27 +179,50 @@ class VPNFileTransferApp:
                         progress_this_step = (1.0 / simulation_steps) * (100.0 / num_total_files_in_batch)
                         self.total_progress += progress_this_step
                         current_overall_progress = min(100.0, self.total_progress)
-                        self.root.after(0, self.update_progress_display, current_overall_progress)
-                self.root.after(0, self.log_message, f"  ¡Simulación para {file_name_for_log} (vía óptima) completada!")
+                        self.update_progress_display(current_overall_progress)
+                self.log_message(f"  ¡Simulación para {file_name_for_log} (vía óptima) completada!")
 
             elif transfer_time_optimal_s == 0:
-                self.root.after(0, self.log_message, f"  Transferencia (óptima) para {file_name_for_log} es instantánea (tiempo 0s).")
+                self.log_message(f"  Transferencia (óptima) para {file_name_for_log} es instantánea (tiempo 0s).")
                 with self.progress_lock:
                     self.total_progress += (100.0 / num_total_files_in_batch)
                     current_overall_progress = min(100.0, self.total_progress)
-                    self.root.after(0, self.update_progress_display, current_overall_progress)
-                self.root.after(0, self.log_message, f"  ¡Simulación para {file_name_for_log} (vía óptima) completada!")
+                    self.update_progress_display(current_overall_progress)
+                self.log_message(f"  ¡Simulación para {file_name_for_log} (vía óptima) completada!")
             else:
-                self.root.after(0, self.log_message, f"  No se puede simular transferencia para {file_name_for_log} (ruta óptima no viable).")
+                self.log_message(f"  No se puede simular transferencia para {file_name_for_log} (ruta óptima no viable).")
 
         except Exception as e:
-            self.root.after(0, self.log_message, f"Error durante simulación de {file_name_for_log}: {str(e)}")
+            self.log_message(f"Error durante simulación de {file_name_for_log}: {str(e)}")
         finally:
             with self.progress_lock:
                 self.active_transfers -= 1
-            self.root.after(0, self.update_transfer_counter_display)
-            if self.active_transfers == 0:
-                self.root.after(0, self.log_message, "--- Todas las simulaciones de este lote han finalizado. ---")
+                self.update_transfer_counter_display(self.active_transfers)
+
+    # Encola la simulación de cada archivo [(nombre, tamaño)] como un lote; cuando termina el
+    # lote entero se resume en el log
+    def schedule_transfer_batch(self, files, destination_node):
+        total = len(files)
+        jobs = []
+        for position, (file_name_for_log, actual_file_size_bytes) in enumerate(files):
+            priority = actual_file_size_bytes if TRANSFER_PRIORITY == "size" else position
+            jobs.append((priority, self.simulate_transfer_for_one_file_thread,
+                         (file_name_for_log, actual_file_size_bytes, destination_node, total)))
+        batch = self.transfer_queue.enviar_lote(jobs)
+        batch.futuro.add_done_callback(lambda future: self.on_batch_finished(future.result()))
+        return batch
+
+    # Método que se llama (desde un hilo de la cola) al terminar un lote
+    def on_batch_finished(self, summary):
+        if not self.running:
+            return
+        self.log_message("--- Todas las simulaciones de este lote han finalizado. ---")
+        if summary['cancelados'] or summary['errores']:
+            self.log_message(f"    {summary['completados']} completadas, {summary['errores']} con error, "
+                             f"{summary['cancelados']} canceladas")
+        stats = self.route_cache.estadisticas()
+        self.log_message(f"    Caché de rutas: {stats['aciertos']} aciertos, {stats['fallos']} fallos "
+                         f"({stats['tasa_aciertos'] * 100:.1f}%)")
 
     # Método para iniciar la simulación de un archivo de prueba
     def transfer_test_file(self):
@@ -169,12 +244,7 @@ class VPNFileTransferApp:
         self.update_progress_display(0)
         self.log_message(f"\n>>> Iniciando lote de simulación para archivo de prueba...")
 
-        thread = threading.Thread(
-            target=self.simulate_transfer_for_one_file_thread,
-            args=(file_name_for_log, actual_file_size_bytes, destination, 1),
-            daemon=True
-        )
-        thread.start()
+        self.schedule_transfer_batch([(file_name_for_log, actual_file_size_bytes)], destination)
 
     # Método para iniciar la simulación de los archivos seleccionados por el usuario
     def transfer_selected_files(self):
@@ -194,20 +264,18 @@ class VPNFileTransferApp:
         num_total_files_in_batch = len(self.selected_files)
         self.log_message(f"\n>>> Iniciando lote de simulación para {num_total_files_in_batch} archivos seleccionados...")
 
+        # Calcula los frentes de Pareto desde el origen antes de lanzar los hilos: sirven para
+        # cualquier tamaño de archivo y así los hilos del lote no los calculan cada uno por su cuenta
+        self.find_fastest_path(self.engine.origen, destination, 0)
+
+        files = []
         for file_path in self.selected_files:
             try:
-                actual_file_size_bytes = os.path.getsize(file_path)
-                file_name_for_log = os.path.basename(file_path)
+                files.append((os.path.basename(file_path), os.path.getsize(file_path)))
             except Exception as e:
                 self.log_message(f"Error al acceder al archivo {file_path}: {str(e)}")
-                continue
-
-            thread = threading.Thread(
-                target=self.simulate_transfer_for_one_file_thread,
-                args=(file_name_for_log, actual_file_size_bytes, destination, num_total_files_in_batch),
-                daemon=True
-            )
-            thread.start()
+        # Los archivos que no se pudieron leer no cuentan para el progreso del lote
+        self.schedule_transfer_batch(files, destination)
 
 #_____________________________________INICIO DEL GUI_____________________________________#
 
@@ -313,23 +381,41 @@ class VPNFileTransferApp:
             self.log_message(f"Se seleccionaron {len(self.selected_files)} archivos.")
             #Añade un mensaje al área de texto si el GUI está corriendo.
 
+    # Estos tres métodos se pueden llamar desde cualquier hilo: solo encolan la actualización
     def log_message(self, message):
-        if self.running and self.root.winfo_exists() and self.log_text.winfo_exists():
-            self.log_text.insert(tk.END, message + "\n")
-            self.log_text.see(tk.END)
-            self.root.update_idletasks()
+        self.ui_updates.log(message)
 
-    def update_transfer_counter_display(self):
-        if self.running and self.root.winfo_exists() and self.transfer_counter_label.winfo_exists():
-            self.transfer_counter_label.config(text=f"Simulaciones activas: {self.active_transfers}")
+    # Se llama con progress_lock tomado y el valor leído dentro del lock, así el último
+    # contador encolado es siempre el más reciente
+    def update_transfer_counter_display(self, count):
+        self.ui_updates.contador(count)
 
     def update_progress_display(self, value):
-        if self.running and self.root.winfo_exists() and self.progress.winfo_exists():
-            self.progress["value"] = value
-            self.root.update_idletasks()
+        self.ui_updates.progreso(value)
+
+    # Se ejecuta en el bucle de Tk cada INTERVALO_MS: un solo insert con todas las líneas
+    # pendientes, el último progreso y el último contador; el log se recorta a MAX_LINEAS
+    def drain_ui_updates(self):
+        if not self.running or not self.root.winfo_exists():
+            return
+        text, progress, counter = self.ui_updates.tomar()
+        if text:
+            self.log_text.insert(tk.END, text)
+            lines = int(self.log_text.index("end-1c").split(".")[0]) - 1  # la última está vacía
+            if lines > MAX_LINEAS:
+                self.log_text.delete("1.0", f"{lines - MAX_LINEAS + 1}.0")
+            self.log_text.see(tk.END)
+        if progress is not None:
+            self.progress["value"] = progress
+        if counter is not None:
+            self.transfer_counter_label.config(text=f"Simulaciones activas: {counter}")
+        self.root.after(INTERVALO_MS, self.drain_ui_updates)
 
     def on_closing(self):
         self.running = False  
+        self.transfer_queue.cerrar()
+        if self.mesh_prober is not None:
+            self.mesh_prober.stop()
         self.root.destroy()
 
 if __name__ == "__main__":
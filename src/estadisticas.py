@@ -0,0 +1,9 @@
+# Estadísticas pequeñas compartidas por la prueba de carga y el motor de simulación
+
+
+# Percentil por rango más cercano sobre una lista ya ordenada
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados))) - 1))
+    return valores_ordenados[indice]
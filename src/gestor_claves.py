@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+# Gestor de claves RSA: las carga de disco (o las crea una sola vez), mantiene los objetos
+# de clave ya interpretados en memoria y las rota según un intervalo en un hilo de fondo.
+# Así el ciclo del monitor nunca genera claves ni interpreta PEM.
+class GestorClaves:
+    def __init__(self, directorio="claves", intervalo_rotacion=24 * 3600, tamano_clave=2048):
+        self.directorio = directorio
+        self.intervalo_rotacion = intervalo_rotacion
+        self.tamano_clave = tamano_clave
+        self.ruta_privada = os.path.join(directorio, "privada.pem")
+        self.ruta_publica = os.path.join(directorio, "publica.pem")
+        self.clave_privada = None
+        self.clave_publica = None
+        self.creada = 0.0  # momento (time.time) en que se generó la clave vigente
+        self.rotaciones = 0
+        self.lock = threading.Lock()
+        self.detenido = threading.Event()
+        self.hilo = None
+
+    # Carga las claves guardadas o las genera si no existen, y arranca el hilo de rotación
+    def iniciar(self):
+        if os.path.exists(self.ruta_privada):
+            with open(self.ruta_privada, "rb") as f:
+                clave_privada = serialization.load_pem_private_key(f.read(), password=None)
+            with self.lock:
+                self.clave_privada = clave_privada
+                self.clave_publica = clave_privada.public_key()
+                self.creada = os.path.getmtime(self.ruta_privada)
+        else:
+            self.rotar()
+
+        if self.intervalo_rotacion and self.hilo is None:
+            self.hilo = threading.Thread(target=self._bucle_rotacion, daemon=True)
+            self.hilo.start()
+        return self
+
+    # Par de claves vigente (privada, pública), listo para usar
+    def claves(self):
+        with self.lock:
+            return self.clave_privada, self.clave_publica
+
+    # Genera un par nuevo, lo guarda de forma atómica y lo pone en uso
+    def rotar(self):
+        clave_privada = rsa.generate_private_key(public_exponent=65537, key_size=self.tamano_clave)
+        clave_publica = clave_privada.public_key()
+        private_pem = clave_privada.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_pem = clave_publica.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+        os.makedirs(self.directorio, exist_ok=True)
+        self._escribir(self.ruta_privada, private_pem, 0o600)
+        self._escribir(self.ruta_publica, public_pem, 0o644)
+
+        with self.lock:
+            self.clave_privada = clave_privada
+            self.clave_publica = clave_publica
+            self.creada = time.time()
+            self.rotaciones += 1
+
+    # Escribe en un temporal y lo renombra para no dejar nunca un PEM a medias
+    def _escribir(self, ruta, contenido, permisos):
+        temporal = ruta + ".tmp"
+        descriptor = os.open(temporal, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, permisos)
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+
+    def _bucle_rotacion(self):
+        while True:
+            with self.lock:
+                restante = self.creada + self.intervalo_rotacion - time.time()
+            if self.detenido.wait(max(0.0, restante)):
+                return
+            try:
+                self.rotar()
+            except Exception as e:
+                print(f"Error al rotar las claves: {e}")
+                if self.detenido.wait(60):
+                    return
+
+    def detener(self):
+        self.detenido.set()
+        if self.hilo is not None:
+            self.hilo.join()
+            self.hilo = None
@@ -0,0 +1,540 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+import numpy as np
+from motor_rutas import GrafoCSR, dijkstra, grafo_aleatorio
+
+# Índice precalculado de latencias para consultas punto a punto (sueltas o en lote) sin
+# repetir Dijkstra en cada una.
+#  - Grafos pequeños (hasta UMBRAL_MATRIZ nodos): matriz completa de distancias y de siguiente
+#    salto, una fila por cada Dijkstra desde cada nodo. Consultar es leer una celda.
+#  - Grafos grandes: Contraction Hierarchies (CH). Los nodos se "contraen" de uno en uno, del
+#    menos al más importante, y al quitar un nodo se añade un atajo entre cada par de vecinos
+#    cuya única ruta más corta pasaba por él (lo comprueba una búsqueda de testigos limitada).
+#    Toda ruta más corta sube por el orden de contracción y luego baja, así que una consulta
+#    son dos búsquedas pequeñas "hacia arriba", desde el origen y desde el destino, que se
+#    encuentran en el nodo más importante de la ruta.
+#    Si el grafo no es enorme (hasta UMBRAL_ETIQUETAS nodos) además se guarda para cada nodo
+#    el resultado de sus dos búsquedas hacia arriba ("etiquetas"): la distancia se obtiene
+#    cruzando la etiqueta de subida del origen con la de bajada del destino, sin búsquedas.
+# El índice se guarda en un archivo binario (cabecera, nombres en JSON y arreglos tal cual
+# están en memoria) que se abre con mmap: cargarlo no copia ni recorre los arreglos.
+
+UMBRAL_MATRIZ = 2000  # hasta este número de nodos se usa la matriz completa
+UMBRAL_ETIQUETAS = 50000  # hasta este número de nodos el índice CH guarda las etiquetas
+MAX_ASENTADOS = 60  # nodos que explora como mucho cada búsqueda de testigos
+
+MAGIA = b"IRUT"
+TIPO_MATRIZ = 1
+TIPO_CH = 2
+# magia, tipo, orden de bytes (0 little, 1 big), nodos, bytes de los nombres, aristas subientes,
+# aristas bajantes, entradas de las etiquetas de subida y de bajada (0 si no hay etiquetas)
+CABECERA = struct.Struct("<4sBB2xQQQQQQ")
+ORDEN_BYTES = 0 if sys.byteorder == 'little' else 1
+
+
+# Matriz de distancias y de siguiente salto entre todos los pares de nodos
+class MatrizDistancias:
+    tipo = TIPO_MATRIZ
+
+    def __init__(self, nombres, distancias, siguiente, mapa=None):
+        self.nombres = nombres
+        self.indices = {nombre: i for i, nombre in enumerate(nombres)}
+        self.distancias = distancias  # ndarray float64 (V, V)
+        self.siguiente = siguiente  # ndarray int32 (V, V): primer salto de la ruta, -1 si no hay
+        self._mapa = mapa
+
+    @classmethod
+    def construir(cls, grafo):
+        n = grafo.num_nodos()
+        distancias = np.empty((n, n), dtype=np.float64)
+        siguiente = np.empty((n, n), dtype=np.int32)
+        todos = np.arange(n, dtype=np.int64)
+        for origen in range(n):
+            fila, predecesores = dijkstra(grafo, origen)
+            distancias[origen] = fila
+            # Primer salto de cada ruta: se sube por los predecesores hasta el hijo del origen,
+            # duplicando el salto en cada vuelta (log de la profundidad del árbol)
+            pred = np.frombuffer(predecesores, dtype=np.int64)
+            salto = np.where((pred == origen) | (pred == -1), todos, pred)
+            while True:
+                doble = salto[salto]
+                if np.array_equal(doble, salto):
+                    break
+                salto = doble
+            salto[pred == -1] = -1
+            salto[origen] = origen
+            siguiente[origen] = salto
+        return cls(list(grafo.nombres), distancias, siguiente)
+
+    def distancia(self, origen, destino):
+        return float(self.distancias[origen, destino])
+
+    # (latencia, [índices]) o (inf, [])
+    def ruta(self, origen, destino):
+        distancia = float(self.distancias[origen, destino])
+        if distancia == math.inf:
+            return math.inf, []
+        ruta = [origen]
+        while ruta[-1] != destino:
+            ruta.append(int(self.siguiente[ruta[-1], destino]))
+        return distancia, ruta
+
+    # Latencia de cada par (origenes[i], destinos[i]); devuelve un ndarray float64
+    def distancias_lote(self, origenes, destinos):
+        return self.distancias[np.asarray(origenes, dtype=np.int64), np.asarray(destinos, dtype=np.int64)]
+
+    def _arreglos(self):
+        return [np.ascontiguousarray(self.distancias), np.ascontiguousarray(self.siguiente)]
+
+    @classmethod
+    def _desde_mapa(cls, nombres, mapa, posicion, n, _tamanos):
+        distancias = np.frombuffer(mapa, dtype=np.float64, count=n * n, offset=posicion).reshape(n, n)
+        posicion += 8 * n * n
+        siguiente = np.frombuffer(mapa, dtype=np.int32, count=n * n, offset=posicion).reshape(n, n)
+        return cls(nombres, distancias, siguiente, mapa)
+
+    def guardar(self, ruta):
+        _escribir(ruta, self.tipo, self.nombres, (0, 0, 0, 0), self._arreglos())
+
+    def cerrar(self):
+        _cerrar(self)
+
+
+# Índice de Contraction Hierarchies. Las aristas del grafo final se guardan en dos CSR:
+#  - arriba[u]: aristas u -> v con v más importante que u (búsqueda desde el origen)
+#  - abajo[u]: aristas x -> u con x más importante que u (búsqueda desde el destino)
+# Cada arista guarda el nodo "medio" por el que pasa si es un atajo (-1 si es una arista real)
+# Las etiquetas, si las hay, son otros dos CSR (offsets, nodos, distancias) con los nodos
+# expandidos por la búsqueda hacia arriba de cada nodo en cada sentido
+class IndiceCH:
+    tipo = TIPO_CH
+
+    def __init__(self, nombres, rango, arriba, abajo, etiquetas=None, mapa=None):
+        self.nombres = nombres
+        self.indices = {nombre: i for i, nombre in enumerate(nombres)}
+        self.rango = rango  # posición de cada nodo en el orden de contracción
+        self.arriba = arriba  # (offsets, vecinos, pesos, medios)
+        self.abajo = abajo
+        self.etiquetas = etiquetas  # (subida, bajada) o None
+        self._mapa = mapa
+
+    def num_atajos(self):
+        return sum(1 for medio in self.arriba[3] if medio != -1) + sum(1 for medio in self.abajo[3] if medio != -1)
+
+    @classmethod
+    def construir(cls, grafo, max_asentados=MAX_ASENTADOS, umbral_etiquetas=UMBRAL_ETIQUETAS):
+        n = grafo.num_nodos()
+        heappop, heappush = heapq.heappop, heapq.heappush
+        # Grafo que queda por contraer: nodo -> {vecino: (peso, medio)} en los dos sentidos
+        salida = [{} for _ in range(n)]
+        entrada = [{} for _ in range(n)]
+        offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+        for u in range(n):
+            for k in range(offsets[u], offsets[u + 1]):
+                v = vecinos[k]
+                if v != u and pesos[k] < salida[u].get(v, (math.inf,))[0]:
+                    salida[u][v] = (pesos[k], -1)
+                    entrada[v][u] = (pesos[k], -1)
+
+        # Dijkstra limitado desde origen sin pasar por excluido; las distancias provisionales
+        # también sirven de testigo porque corresponden a rutas que existen
+        def testigos(origen, excluido, limite, objetivos):
+            distancias = {origen: 0.0}
+            monticulo = [(0.0, origen)]
+            pendientes = len(objetivos)
+            asentados = 0
+            while monticulo and asentados < max_asentados:
+                distancia, u = heappop(monticulo)
+                if distancia > distancias[u]:
+                    continue
+                if distancia > limite:
+                    break
+                if u in objetivos:
+                    pendientes -= 1
+                    if not pendientes:
+                        break
+                asentados += 1
+                for v, (peso, _) in salida[u].items():
+                    nueva = distancia + peso
+                    if v != excluido and nueva < distancias.get(v, math.inf):
+                        distancias[v] = nueva
+                        heappush(monticulo, (nueva, v))
+            return distancias
+
+        # Atajos (x, y, peso) que hay que añadir si se contrae nodo
+        def atajos(nodo):
+            resultado = []
+            for x, (peso_x, _) in entrada[nodo].items():
+                objetivos = {y: peso_x + peso_y for y, (peso_y, _) in salida[nodo].items() if y != x}
+                if not objetivos:
+                    continue
+                alcanzados = testigos(x, nodo, max(objetivos.values()), objetivos)
+                for y, peso in objetivos.items():
+                    if alcanzados.get(y, math.inf) > peso:
+                        resultado.append((x, y, peso))
+            return resultado
+
+        # Prioridad: atajos que crea menos aristas que quita (diferencia de aristas) más los
+        # vecinos ya contraídos, que reparte la contracción por todo el grafo
+        contraidos_vecinos = [0] * n
+        def prioridad(nodo, nuevos):
+            return len(nuevos) - len(entrada[nodo]) - len(salida[nodo]) + contraidos_vecinos[nodo]
+
+        monticulo = [(prioridad(u, atajos(u)), u) for u in range(n)]
+        heapq.heapify(monticulo)
+        rango = array('q', bytes(8 * n))
+        arriba = [None] * n
+        abajo = [None] * n
+        orden = 0
+        while monticulo:
+            _, nodo = heappop(monticulo)
+            nuevos = atajos(nodo)
+            actual = prioridad(nodo, nuevos)
+            # Prioridad perezosa: si al recalcularla ya no es la menor, vuelve al montículo
+            if monticulo and actual > monticulo[0][0]:
+                heappush(monticulo, (actual, nodo))
+                continue
+            for x, y, peso in nuevos:
+                if peso < salida[x].get(y, (math.inf,))[0]:
+                    salida[x][y] = (peso, nodo)
+                    entrada[y][x] = (peso, nodo)
+            for y in salida[nodo]:
+                del entrada[y][nodo]
+                contraidos_vecinos[y] += 1
+            for x in entrada[nodo]:
+                del salida[x][nodo]
+                contraidos_vecinos[x] += 1
+            arriba[nodo] = salida[nodo]
+            abajo[nodo] = entrada[nodo]
+            salida[nodo] = entrada[nodo] = None
+            rango[nodo] = orden
+            orden += 1
+        indice = cls(list(grafo.nombres), rango, _a_csr(arriba), _a_csr(abajo))
+        if n <= umbral_etiquetas:
+            indice.etiquetas = (indice._etiquetar(indice.arriba, indice.abajo),
+                                indice._etiquetar(indice.abajo, indice.arriba))
+        return indice
+
+    def _etiquetar(self, lado, opuesto):
+        offsets = array('q', [0])
+        nodos = array('q')
+        distancias = array('d')
+        for nodo in range(len(self.rango)):
+            expandidos = self._subir(nodo, lado, opuesto)[0]
+            nodos.extend(expandidos.keys())
+            distancias.extend(expandidos.values())
+            offsets.append(len(nodos))
+        return offsets, nodos, distancias
+
+    # Búsqueda hacia arriba desde nodo por lado = arriba (origen) o abajo (destino). Un nodo al
+    # que se llega mejor desde uno más importante por el otro lado no puede ser el punto de
+    # encuentro de la ruta más corta y no se expande ("stall-on-demand"). Devuelve
+    # ({nodo expandido: distancia}, predecesores)
+    def _subir(self, nodo, lado, opuesto):
+        offsets, vecinos, pesos, _ = lado
+        offsets_op, vecinos_op, pesos_op, _ = opuesto
+        distancias = {nodo: 0.0}
+        expandidos = {}
+        predecesores = {nodo: (-1, -1)}  # nodo -> (nodo anterior, posición de la arista)
+        monticulo = [(0.0, nodo)]
+        heappop, heappush = heapq.heappop, heapq.heappush
+        while monticulo:
+            distancia, u = heappop(monticulo)
+            if distancia > distancias[u]:
+                continue
+            parado = False
+            for k in range(offsets_op[u], offsets_op[u + 1]):
+                otro = distancias.get(vecinos_op[k])
+                if otro is not None and otro + pesos_op[k] < distancia:
+                    parado = True
+                    break
+            if parado:
+                continue
+            expandidos[u] = distancia
+            for k in range(offsets[u], offsets[u + 1]):
+                v = vecinos[k]
+                nueva = distancia + pesos[k]
+                if nueva < distancias.get(v, math.inf):
+                    distancias[v] = nueva
+                    predecesores[v] = (u, k)
+                    heappush(monticulo, (nueva, v))
+        return expandidos, predecesores
+
+    @staticmethod
+    def _encuentro(hacia_adelante, hacia_atras):
+        if len(hacia_atras) < len(hacia_adelante):
+            hacia_adelante, hacia_atras = hacia_atras, hacia_adelante
+        mejor = math.inf
+        nodo_mejor = -1
+        for nodo, distancia in hacia_adelante.items():
+            otra = hacia_atras.get(nodo)
+            if otra is not None and distancia + otra < mejor:
+                mejor = distancia + otra
+                nodo_mejor = nodo
+        return mejor, nodo_mejor
+
+    # {nodo: distancia} de la búsqueda hacia arriba de nodo, de las etiquetas si las hay
+    def _espacio(self, nodo, subida):
+        if self.etiquetas is not None:
+            offsets, nodos, distancias = self.etiquetas[0 if subida else 1]
+            inicio, fin = offsets[nodo], offsets[nodo + 1]
+            return dict(zip(nodos[inicio:fin], distancias[inicio:fin]))
+        if subida:
+            return self._subir(nodo, self.arriba, self.abajo)[0]
+        return self._subir(nodo, self.abajo, self.arriba)[0]
+
+    def distancia(self, origen, destino):
+        return self._encuentro(self._espacio(origen, True), self._espacio(destino, False))[0]
+
+    # (latencia, [índices]) o (inf, []); los atajos se deshacen en las aristas reales
+    def ruta(self, origen, destino):
+        adelante, pred_adelante = self._subir(origen, self.arriba, self.abajo)
+        atras, pred_atras = self._subir(destino, self.abajo, self.arriba)
+        distancia, encuentro = self._encuentro(adelante, atras)
+        if encuentro == -1:
+            return math.inf, []
+        subida = []
+        nodo = encuentro
+        while nodo != origen:
+            anterior, k = pred_adelante[nodo]
+            subida.append((anterior, nodo, self.arriba[3][k]))
+            nodo = anterior
+        ruta = [origen]
+        for u, v, medio in reversed(subida):
+            self._desempaquetar(u, v, medio, ruta)
+        nodo = encuentro
+        while nodo != destino:
+            siguiente, k = pred_atras[nodo]
+            self._desempaquetar(nodo, siguiente, self.abajo[3][k], ruta)
+            nodo = siguiente
+        return distancia, ruta
+
+    # Añade a ruta los nodos de la arista u -> v sin u, deshaciendo los atajos. El atajo
+    # u -> v por medio son las aristas u -> medio (abajo de medio) y medio -> v (arriba de medio)
+    def _desempaquetar(self, u, v, medio, ruta):
+        pila = [(u, v, medio)]
+        while pila:
+            u, v, medio = pila.pop()
+            if medio == -1:
+                ruta.append(v)
+                continue
+            pila.append((medio, v, self._medio(self.arriba, medio, v)))
+            pila.append((u, medio, self._medio(self.abajo, medio, u)))
+
+    @staticmethod
+    def _medio(lado, nodo, vecino):
+        offsets, vecinos, _, medios = lado
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            if vecinos[k] == vecino:
+                return medios[k]
+        raise KeyError((nodo, vecino))
+
+    # Latencia de cada par (origenes[i], destinos[i]); cada búsqueda hacia arriba se hace una
+    # sola vez por origen y por destino distintos del lote. Devuelve un ndarray float64
+    def distancias_lote(self, origenes, destinos):
+        adelante = {}
+        atras = {}
+        resultado = np.empty(len(origenes), dtype=np.float64)
+        for i, (origen, destino) in enumerate(zip(origenes, destinos)):
+            origen = int(origen)
+            destino = int(destino)
+            desde = adelante.get(origen)
+            if desde is None:
+                desde = adelante[origen] = self._espacio(origen, True)
+            hasta = atras.get(destino)
+            if hasta is None:
+                hasta = atras[destino] = self._espacio(destino, False)
+            resultado[i] = self._encuentro(desde, hasta)[0]
+        return resultado
+
+    def _arreglos(self):
+        etiquetas = [*self.etiquetas[0], *self.etiquetas[1]] if self.etiquetas is not None else []
+        return [self.rango, *self.arriba, *self.abajo, *etiquetas]
+
+    @classmethod
+    def _desde_mapa(cls, nombres, mapa, posicion, n, tamanos):
+        aristas_arriba, aristas_abajo, entradas_subida, entradas_bajada = tamanos
+        # rango, los dos CSR (offsets, vecinos, pesos y medios) y las etiquetas (offsets, nodos, distancias)
+        formatos = [('q', n)]
+        for m in (aristas_arriba, aristas_abajo):
+            formatos += [('q', n + 1), ('q', m), ('d', m), ('q', m)]
+        if entradas_subida:
+            for m in (entradas_subida, entradas_bajada):
+                formatos += [('q', n + 1), ('q', m), ('d', m)]
+        vista = memoryview(mapa)
+        arreglos = []
+        for formato, cantidad in formatos:
+            arreglos.append(vista[posicion:posicion + 8 * cantidad].cast(formato))
+            posicion += 8 * cantidad
+        etiquetas = (tuple(arreglos[9:12]), tuple(arreglos[12:15])) if entradas_subida else None
+        return cls(nombres, arreglos[0], tuple(arreglos[1:5]), tuple(arreglos[5:9]), etiquetas, mapa)
+
+    def guardar(self, ruta):
+        entradas = (len(self.etiquetas[0][1]), len(self.etiquetas[1][1])) if self.etiquetas is not None else (0, 0)
+        _escribir(ruta, self.tipo, self.nombres, (len(self.arriba[1]), len(self.abajo[1]), *entradas),
+                  self._arreglos())
+
+    def cerrar(self):
+        _cerrar(self)
+
+
+# Convierte una lista de diccionarios {vecino: (peso, medio)} por nodo en arreglos CSR
+def _a_csr(adyacencias):
+    offsets = array('q', [0])
+    vecinos = array('q')
+    pesos = array('d')
+    medios = array('q')
+    for aristas in adyacencias:
+        for vecino, (peso, medio) in aristas.items():
+            vecinos.append(vecino)
+            pesos.append(peso)
+            medios.append(medio)
+        offsets.append(len(vecinos))
+    return offsets, vecinos, pesos, medios
+
+
+# Cabecera, nombres en JSON (rellenados hasta múltiplo de 8) y los arreglos seguidos. Se
+# escribe en un archivo temporal y se renombra, así un lector nunca ve un índice a medias
+def _escribir(ruta, tipo, nombres, aristas, arreglos):
+    datos_nombres = json.dumps(nombres).encode('utf-8')
+    datos_nombres += b" " * (-len(datos_nombres) % 8)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, tipo, ORDEN_BYTES, len(nombres), len(datos_nombres), *aristas))
+        f.write(datos_nombres)
+        for arreglo in arreglos:
+            f.write(memoryview(arreglo).cast('B'))
+    os.replace(temporal, ruta)
+
+
+def _cerrar(indice):
+    if indice._mapa is not None:
+        # Los arreglos son vistas del mapa: hay que soltarlas antes de cerrarlo
+        indice.distancias = indice.siguiente = indice.rango = indice.arriba = indice.abajo = indice.etiquetas = None
+        indice._mapa.close()
+        indice._mapa = None
+
+
+# Abre un índice guardado con guardar() sin leerlo entero: los arreglos son vistas del mmap
+def cargar_indice(ruta):
+    with open(ruta, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magia, tipo, orden_bytes, n, bytes_nombres, *tamanos = CABECERA.unpack_from(mapa, 0)
+    if magia != MAGIA or tipo not in (TIPO_MATRIZ, TIPO_CH):
+        mapa.close()
+        raise ValueError(f"{ruta} no es un índice de rutas")
+    if orden_bytes != ORDEN_BYTES:
+        mapa.close()
+        raise ValueError(f"{ruta} se generó en una máquina con otro orden de bytes")
+    posicion = CABECERA.size
+    nombres = json.loads(mapa[posicion:posicion + bytes_nombres])
+    clase = MatrizDistancias if tipo == TIPO_MATRIZ else IndiceCH
+    return clase._desde_mapa(nombres, mapa, posicion + bytes_nombres, n, tamanos)
+
+
+# Matriz completa si el grafo es pequeño, Contraction Hierarchies si no
+def construir_indice(grafo, umbral_matriz=UMBRAL_MATRIZ):
+    if grafo.num_nodos() <= umbral_matriz:
+        return MatrizDistancias.construir(grafo)
+    return IndiceCH.construir(grafo)
+
+
+# Grafo de red "geográfico": nodos repartidos en un plano, cada uno unido a sus vecinos más
+# cercanos con latencia proporcional a la distancia (como una red real, a diferencia de
+# grafo_aleatorio, donde cualquier par de nodos puede estar unido)
+def grafo_geografico(num_nodos, vecinos=3, semilla=42):
+    rnd = random.Random(semilla)
+    puntos = [(rnd.random(), rnd.random()) for _ in range(num_nodos)]
+    celdas_lado = max(1, int(math.sqrt(num_nodos / 4)))
+    celdas = {}
+    for i, (x, y) in enumerate(puntos):
+        celdas.setdefault((int(x * celdas_lado), int(y * celdas_lado)), []).append(i)
+    grafo = {i: {} for i in range(num_nodos)}
+    for i, (x, y) in enumerate(puntos):
+        cx, cy = int(x * celdas_lado), int(y * celdas_lado)
+        radio = 1
+        while True:
+            candidatos = [j for a in range(cx - radio, cx + radio + 1) for b in range(cy - radio, cy + radio + 1)
+                          for j in celdas.get((a, b), ()) if j != i]
+            if len(candidatos) >= vecinos or radio > celdas_lado:
+                break
+            radio += 1
+        candidatos.sort(key=lambda j: (puntos[j][0] - x) ** 2 + (puntos[j][1] - y) ** 2)
+        for j in candidatos[:vecinos]:
+            latencia = round(1.0 + 200.0 * math.dist(puntos[i], puntos[j]), 3)
+            grafo[i][j] = latencia
+            grafo[j][i] = latencia
+    # Une las componentes sueltas con la primera para que el grafo sea conexo
+    componente = dijkstra(GrafoCSR.desde_diccionario(grafo), 0)[0]
+    for i in range(num_nodos):
+        if componente[i] == math.inf:
+            latencia = round(1.0 + 200.0 * math.dist(puntos[0], puntos[i]), 3)
+            grafo[0][i] = grafo[i][0] = latencia
+            componente = dijkstra(GrafoCSR.desde_diccionario(grafo), 0)[0]
+    return grafo
+
+
+# Costo de preprocesado, tamaño y carga del índice, y tiempo por consulta frente a Dijkstra
+# punto a punto, con matriz (grafo pequeño) y con CH (grafo grande)
+def benchmark(nodos_matriz=1000, nodos_ch=10000, consultas=200, lote=100000, archivo="indice_rutas.bin"):
+    casos = [("matriz", GrafoCSR.desde_diccionario(grafo_aleatorio(nodos_matriz)), MatrizDistancias),
+             ("CH", GrafoCSR.desde_diccionario(grafo_geografico(nodos_ch)), IndiceCH)]
+    for nombre, grafo, clase in casos:
+        n = grafo.num_nodos()
+        rnd = random.Random(5)
+        pares = [(rnd.randrange(n), rnd.randrange(n)) for _ in range(consultas)]
+
+        inicio = time.perf_counter()
+        esperadas = [dijkstra(grafo, o, d)[0][d] for o, d in pares]
+        t_dijkstra = (time.perf_counter() - inicio) / consultas
+
+        inicio = time.perf_counter()
+        indice = clase.construir(grafo)
+        t_construir = time.perf_counter() - inicio
+        indice.guardar(archivo)
+        tamano = os.path.getsize(archivo)
+        inicio = time.perf_counter()
+        indice = cargar_indice(archivo)
+        t_cargar = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtenidas = [indice.distancia(o, d) for o, d in pares]
+        t_consulta = (time.perf_counter() - inicio) / consultas
+        assert all(math.isclose(a, b) for a, b in zip(esperadas, obtenidas))
+        for o, d in pares[:20]:
+            distancia, ruta = indice.ruta(o, d)
+            assert ruta[0] == o and ruta[-1] == d
+            assert math.isclose(distancia, sum(grafo.pesos[grafo.posicion_arista(u, v)]
+                                               for u, v in zip(ruta, ruta[1:])))
+
+        # Lote: muchos pares con pocos orígenes distintos, como pide el planificador
+        tamano_lote = lote if clase is MatrizDistancias else lote // 10
+        origenes = np.array([rnd.randrange(n) for _ in range(100)])[np.random.default_rng(1).integers(0, 100, tamano_lote)]
+        destinos = np.random.default_rng(2).integers(0, n, tamano_lote)
+        inicio = time.perf_counter()
+        indice.distancias_lote(origenes, destinos)
+        t_lote = (time.perf_counter() - inicio) / tamano_lote
+
+        print(f"\n{nombre}: {n} nodos, {grafo.num_aristas()} aristas")
+        if clase is IndiceCH:
+            etiquetas = sum(len(nodos) for _, nodos, _ in indice.etiquetas) / n if indice.etiquetas else 0
+            print(f"  atajos añadidos: {indice.num_atajos()}, entradas por nodo en las etiquetas: {etiquetas:.1f}")
+        print(f"  preprocesado {t_construir:.2f} s (= {t_construir / t_dijkstra:.0f} Dijkstras), "
+              f"archivo {tamano / 1e6:.1f} MB, carga {1000 * t_cargar:.2f} ms")
+        print(f"  Dijkstra punto a punto: {1e6 * t_dijkstra:10.1f} µs/consulta")
+        print(f"  índice, consulta suelta:{1e6 * t_consulta:10.1f} µs/consulta ({t_dijkstra / t_consulta:.0f}x)")
+        print(f"  índice, lote de {tamano_lote}: {1e6 * t_lote:8.2f} µs/par ({t_dijkstra / t_lote:.0f}x)")
+        indice.cerrar()
+        os.remove(archivo)
+
+
+if __name__ == "__main__":
+    benchmark(*(int(n) for n in sys.argv[1:3]))
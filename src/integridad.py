@@ -0,0 +1,124 @@
+import hashlib
+import zlib
+
+try:
+    import xxhash
+except ImportError:  # xxhash es opcional; CRC32 y BLAKE2 vienen con Python
+    xxhash = None
+
+# Sumas de verificación que se calculan dentro de los bucles de envío y recepción, bloque a
+# bloque, sin volver a leer el archivo. El cliente manda la suma en una trama DIGEST después
+# de los datos y el servidor la compara con la suya antes de confirmar (ver protocolo.py).
+#   CRC32:   zlib, siempre disponible (~2 GB/s)
+#   BLAKE2b: hashlib, criptográfica, más lenta
+#   XXH3:    si está instalado xxhash (>10 GB/s), la opción por defecto
+
+CHECKSUM_NONE = 0
+CHECKSUM_CRC32 = 1
+CHECKSUM_BLAKE2 = 2
+CHECKSUM_XXH3 = 3
+CHECKSUM_NAMES = {CHECKSUM_NONE: "ninguna", CHECKSUM_CRC32: "crc32",
+                  CHECKSUM_BLAKE2: "blake2b", CHECKSUM_XXH3: "xxh3"}
+
+
+class _Crc32:
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def digest(self):
+        return self.value.to_bytes(4, "big")
+
+
+def available_checksums():
+    algorithms = [CHECKSUM_CRC32, CHECKSUM_BLAKE2]
+    if xxhash is not None:
+        algorithms.append(CHECKSUM_XXH3)
+    return algorithms
+
+
+# La más rápida de las disponibles
+def default_checksum():
+    return CHECKSUM_XXH3 if xxhash is not None else CHECKSUM_CRC32
+
+
+# Objeto con update(datos) y digest(), como los de hashlib
+def new_checksum(algorithm):
+    if algorithm == CHECKSUM_CRC32:
+        return _Crc32()
+    if algorithm == CHECKSUM_BLAKE2:
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == CHECKSUM_XXH3 and xxhash is not None:
+        return xxhash.xxh3_64()
+    raise ValueError(f"Suma de verificación no disponible: {algorithm}")
+
+
+# Sobrecarga de cada suma sobre la transferencia rápida por loopback (sendfile + pwrite).
+# Con suma el cliente suma cada bloque desde el archivo mapeado y lo envía con sendfile
+def benchmark(size_mb=1024, rounds=3):
+    import os
+    import socket
+    import tempfile
+    import threading
+    import time
+    from transferencia import send_file_data, receive_to_file
+
+    folder = tempfile.mkdtemp(prefix="integridad_")
+    source = os.path.join(folder, "origen.bin")
+    target = os.path.join(folder, "destino.bin")
+    size = size_mb * 1024 * 1024
+    block = os.urandom(1024 * 1024)
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+    def transfer(algorithm, use_sendfile):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen(1)
+            digests = {}
+
+            def serve():
+                conn, _ = server.accept()
+                with conn:
+                    checksum = new_checksum(algorithm) if algorithm else None
+                    receive_to_file(conn, target, size, checksum=checksum)
+                    digests["servidor"] = checksum.digest() if checksum else b""
+                    conn.sendall(b"OK")
+
+            thread = threading.Thread(target=serve)
+            thread.start()
+            start = time.perf_counter()
+            with socket.create_connection(server.getsockname()) as s, open(source, "rb") as f:
+                checksum = new_checksum(algorithm) if algorithm else None
+                send_file_data(s, f, size, use_sendfile=use_sendfile, checksum=checksum)
+                s.recv(2)
+            elapsed = time.perf_counter() - start
+            thread.join()
+        assert not algorithm or digests["servidor"] == checksum.digest()
+        return elapsed
+
+    try:
+        variants = [("sin suma", CHECKSUM_NONE, True)]
+        variants += [(CHECKSUM_NAMES[a], a, True) for a in available_checksums()]
+        print(f"Archivo de {size_mb} MB por loopback, mejor de {rounds} rondas")
+        # Las variantes se alternan en cada ronda para que el ruido de la máquina afecte a todas
+        best = [float("inf")] * len(variants)
+        for _ in range(rounds):
+            for i, (name, algorithm, use_sendfile) in enumerate(variants):
+                best[i] = min(best[i], transfer(algorithm, use_sendfile))
+        for (name, _, _), elapsed in zip(variants, best):
+            print(f"  {name:<20} {size_mb / elapsed:8.1f} MB/s  "
+                  f"sobrecarga {100 * (elapsed / best[0] - 1):+6.1f}%")
+    finally:
+        for path in (source, target):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
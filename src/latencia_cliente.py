@@ -0,0 +1,314 @@
+import asyncio
+import itertools
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from latencia_server import PROBE, PING, PONG, PORT, ProbeServer
+
+# Cliente de sondas de latencia: envía sondas con marca de tiempo (time.perf_counter_ns) al
+# servicio de latencia_server.py por UDP o por una conexión TCP persistente y resume los
+# RTT de una ventana deslizante (mínimo, media, p50, p99, jitter y pérdida).
+# latency_matrix devuelve las latencias con el mismo formato que VPNFileTransferApp.graph.
+
+WINDOW_SIZE = 100  # sondas que entran en cada ventana
+PROBE_TIMEOUT = 1.0  # segundos; una sonda sin respuesta en ese tiempo cuenta como perdida
+PROBE_INTERVAL = 0.01  # segundos entre sondas a un mismo destino
+
+
+# Últimas `size` sondas de un destino: el RTT en ms, o None si se perdió
+class SlidingWindow:
+    def __init__(self, size=WINDOW_SIZE):
+        self.samples = deque(maxlen=size)
+
+    def add(self, rtt_ms):
+        self.samples.append(rtt_ms)
+
+    def stats(self):
+        rtts = [rtt for rtt in self.samples if rtt is not None]
+        sent = len(self.samples)
+        result = {'sent': sent, 'received': len(rtts),
+                  'loss': (sent - len(rtts)) / sent if sent else 0.0}
+        if not rtts:
+            return result
+        ordered = sorted(rtts)
+        # Jitter como en RFC 3550: variación media entre sondas consecutivas
+        jitter = sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (len(rtts) - 1) if len(rtts) > 1 else 0.0
+        result.update({
+            'min': ordered[0],
+            'avg': sum(ordered) / len(ordered),
+            'p50': _percentile(ordered, 50),
+            'p99': _percentile(ordered, 99),
+            'max': ordered[-1],
+            'jitter': jitter
+        })
+        return result
+
+
+def _percentile(ordered, p):
+    index = max(0, -(-len(ordered) * p // 100) - 1)  # rango más cercano
+    return ordered[int(index)]
+
+
+# Parte común a los dos transportes: cada sonda espera su respuesta en un futuro indexado
+# por número de secuencia, así se pueden tener muchas sondas en vuelo a la vez
+class _Prober:
+    def __init__(self):
+        self.pending = {}
+        self.sequence = itertools.count()
+
+    def _answer(self, data):
+        received_ns = time.perf_counter_ns()
+        if len(data) != PROBE.size:
+            return
+        magic, sequence, sent_ns = PROBE.unpack(data)
+        future = self.pending.pop(sequence, None)
+        if magic == PONG and future is not None and not future.done():
+            future.set_result(received_ns - sent_ns)
+
+    # RTT en ms de una sonda, o None si no hubo respuesta a tiempo
+    async def probe(self, timeout=PROBE_TIMEOUT):
+        sequence = next(self.sequence) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.pending[sequence] = future
+        self._send(PROBE.pack(PING, sequence, time.perf_counter_ns()))
+        try:
+            return await asyncio.wait_for(future, timeout) / 1e6
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.pending.pop(sequence, None)
+
+    def is_alive(self):
+        return True
+
+
+class UdpProber(_Prober, asyncio.DatagramProtocol):
+    def __init__(self):
+        _Prober.__init__(self)
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self._answer(data)
+
+    def _send(self, data):
+        self.transport.sendto(data)
+
+    def is_alive(self):
+        return not self.transport.is_closing()
+
+    def close(self):
+        self.transport.close()
+
+
+class TcpProber(_Prober):
+    def __init__(self, reader, writer):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+        self.reader_task = asyncio.ensure_future(self._read_replies())
+
+    async def _read_replies(self):
+        try:
+            while True:
+                self._answer(await self.reader.readexactly(PROBE.size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def _send(self, data):
+        self.writer.write(data)
+
+    # El lector termina cuando la conexión se corta; a partir de ahí toda sonda se perdería
+    def is_alive(self):
+        return not self.reader_task.done() and not self.writer.is_closing()
+
+    def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+
+
+async def open_prober(host, port=PORT, protocol='udp'):
+    if protocol == 'udp':
+        _, prober = await asyncio.get_running_loop().create_datagram_endpoint(
+            UdpProber, remote_addr=(host, port))
+        return prober
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return TcpProber(reader, writer)
+
+
+# Sonda con el prober de `probers` (clave -> prober), que se abre la primera vez. Un prober cuya
+# conexión se cortó se cierra y se vuelve a abrir; si el envío falla se descarta y se reabre en
+# la sonda siguiente. Devuelve el RTT en ms o None
+async def probe_cached(probers, key, host, port=PORT, protocol='udp', timeout=PROBE_TIMEOUT):
+    prober = probers.get(key)
+    if prober is not None and not prober.is_alive():
+        prober.close()
+        del probers[key]
+        prober = None
+    if prober is None:
+        try:
+            prober = probers[key] = await open_prober(host, port, protocol)
+        except OSError:
+            return None
+    try:
+        return await prober.probe(timeout)
+    except OSError:
+        prober.close()
+        probers.pop(key, None)
+        return None
+
+
+# Envía `count` sondas a un destino y devuelve las estadísticas de la ventana
+async def measure(host, port=PORT, count=20, interval=PROBE_INTERVAL, timeout=PROBE_TIMEOUT,
+                  protocol='udp', window=None):
+    window = window if window is not None else SlidingWindow(count)
+    try:
+        prober = await open_prober(host, port, protocol)
+    except OSError:
+        for _ in range(count):
+            window.add(None)
+        return window.stats()
+    try:
+        for i in range(count):
+            window.add(await prober.probe(timeout))
+            if interval and i < count - 1:
+                await asyncio.sleep(interval)
+    finally:
+        prober.close()
+    return window.stats()
+
+
+def measure_latency(host, port=PORT, **options):
+    return asyncio.run(measure(host, port, **options))
+
+
+# Mide a la vez la latencia desde `origin` hasta cada par de `peers` ({nombre: (host, puerto)})
+# y la devuelve como diccionario de adyacencia en ms, en ambos sentidos, listo para
+# VPNFileTransferApp.graph. Los pares que no respondieron no aparecen
+async def measure_matrix(origin, peers, metric='p50', **options):
+    names = list(peers)
+    results = await asyncio.gather(*(measure(*peers[name], **options) for name in names))
+    matrix = {origin: {}}
+    for name, stats in zip(names, results):
+        if stats['received']:
+            matrix[origin][name] = stats[metric]
+            matrix.setdefault(name, {})[origin] = stats[metric]
+    return matrix
+
+
+def latency_matrix(origin, peers, metric='p50', **options):
+    return asyncio.run(measure_matrix(origin, peers, metric, **options))
+
+
+# Sondeo continuo en un hilo de fondo: cada `interval` segundos envía una sonda a cada par y
+# mantiene una ventana deslizante por destino. stats() y matrix() se pueden consultar en
+# cualquier momento desde otros hilos. Con `metrics` (un AlmacenMetricas) cada sonda queda
+# además guardada para consultar percentiles y tendencias más allá de la ventana
+class LatencyMonitor:
+    def __init__(self, origin, peers, interval=1.0, window=WINDOW_SIZE, protocol='udp', timeout=PROBE_TIMEOUT,
+                 metrics=None):
+        self.origin = origin
+        self.peers = dict(peers)
+        self.interval = interval
+        self.protocol = protocol
+        self.timeout = timeout
+        self.windows = {name: SlidingWindow(window) for name in self.peers}
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.stopping = None
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        # Se crea aquí y no en _run: stop() puede llegar antes de que el hilo empiece a correr
+        self.stopping = asyncio.Event()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self._run(),), daemon=True)
+        self.thread.start()
+        return self
+
+    async def _run(self):
+        probers = {}
+        try:
+            while not self.stopping.is_set():
+                names = list(self.peers)
+                rtts = await asyncio.gather(*(self._probe(probers, name) for name in names))
+                with self.lock:
+                    for name, rtt in zip(names, rtts):
+                        self.windows[name].add(rtt)
+                if self.metrics is not None:
+                    for name, rtt in zip(names, rtts):
+                        self.metrics.registrar_latencia(name, rtt)
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for prober in probers.values():
+                prober.close()
+
+    async def _probe(self, probers, name):
+        return await probe_cached(probers, name, *self.peers[name], self.protocol, self.timeout)
+
+    def stats(self):
+        with self.lock:
+            return {name: window.stats() for name, window in self.windows.items()}
+
+    def matrix(self, metric='p50'):
+        matrix = {self.origin: {}}
+        for name, stats in self.stats().items():
+            if stats['received']:
+                matrix[self.origin][name] = stats[metric]
+                matrix.setdefault(name, {})[self.origin] = stats[metric]
+        return matrix
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.stopping.set)
+        self.thread.join()
+        self.loop.close()
+        self.thread = None
+
+
+# Sondas por segundo contra un servidor local, con `concurrency` sondas en vuelo
+def benchmark(probes=20000, concurrency=64):
+    async def run(protocol):
+        server = await ProbeServer('127.0.0.1', 0).start()
+        prober = await open_prober('127.0.0.1', server.port, protocol)
+        window = SlidingWindow(probes)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                window.add(await prober.probe())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(probes)))
+        elapsed = time.perf_counter() - start
+        prober.close()
+        await asyncio.sleep(0.05)  # deja que el servidor vea el cierre de la conexión TCP
+        server.close()
+        return probes / elapsed, window.stats()
+
+    for protocol in ('udp', 'tcp'):
+        rate, stats = asyncio.run(run(protocol))
+        print(f"{protocol.upper()}: {rate:9.0f} sondas/s  min {stats['min']:.3f}  avg {stats['avg']:.3f}  "
+              f"p50 {stats['p50']:.3f}  p99 {stats['p99']:.3f}  jitter {stats['jitter']:.3f} ms  "
+              f"pérdida {100 * stats['loss']:.1f}%")
+
+
+if __name__ == "__main__":
+    # latencia_cliente.py host [puerto] [udp|tcp]: mide un destino; sin argumentos, benchmark local
+    if len(sys.argv) > 1:
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+        protocol = sys.argv[3] if len(sys.argv) > 3 else 'udp'
+        for key, value in measure_latency(sys.argv[1], port, count=50, protocol=protocol).items():
+            print(f"{key}: {value}")
+    else:
+        benchmark()
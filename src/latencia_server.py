@@ -1,23 +1,103 @@
+import asyncio
 import socket
+import struct
 
 HOST = '0.0.0.0'
 PORT = 5002  # Puerto diferente al del servidor de archivos
 
+# Servicio de sondas de latencia. Escucha en el mismo puerto por UDP (una sonda por datagrama)
+# y por TCP (conexión persistente con muchas sondas seguidas), todo en un solo bucle asyncio,
+# así responde miles de sondas por segundo sin un hilo ni una conexión por sonda.
+# Cada sonda es "PING" + secuencia + marca de tiempo del cliente (ns) y se responde con
+# "PONG" y los mismos campos: el cliente calcula el RTT con su propio reloj.
+PROBE = struct.Struct(">4sIQ")  # identificador, secuencia, marca de tiempo (ns)
+PING = b'PING'
+PONG = b'PONG'
+
+
+class UdpProbeProtocol(asyncio.DatagramProtocol):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.transport = None
+        self.answered = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if len(data) != PROBE.size or data[:4] != PING:
+            return
+        self.answered += 1
+        reply = PONG + data[4:]
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, reply, addr)
+        else:
+            self.transport.sendto(reply, addr)
+
+
+# Servidor de sondas; `delay` (segundos) retrasa cada respuesta para simular un enlace lento
+class ProbeServer:
+    def __init__(self, host=HOST, port=PORT, delay=0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.udp_transport = None
+        self.udp_protocol = None
+        self.tcp_server = None
+
+    # Abre los dos sockets; con port=0 elige un puerto libre (el mismo para UDP y TCP)
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.udp_transport, self.udp_protocol = await loop.create_datagram_endpoint(
+            lambda: UdpProbeProtocol(self.delay), local_addr=(self.host, self.port))
+        self.port = self.udp_transport.get_extra_info('sockname')[1]
+        self.tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port,
+                                                     reuse_address=True)
+        return self
+
+    async def _handle_tcp(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                data = await reader.readexactly(PROBE.size)
+                if data[:4] != PING:
+                    break
+                if self.delay:
+                    # Como en UDP: la respuesta se programa y se sigue leyendo, así las sondas
+                    # encadenadas no se esperan unas a otras
+                    asyncio.get_running_loop().call_later(self.delay, _reply, writer, PONG + data[4:])
+                    continue
+                writer.write(PONG + data[4:])
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        if self.tcp_server is None:
+            await self.start()
+        print(f"[*] Servidor de latencia escuchando en {self.host}:{self.port} (UDP y TCP)")
+        await self.tcp_server.serve_forever()
+
+    def close(self):
+        if self.udp_transport is not None:
+            self.udp_transport.close()
+        if self.tcp_server is not None:
+            self.tcp_server.close()
+
+
+def _reply(writer, data):
+    if not writer.is_closing():
+        writer.write(data)
+
+
 def start_server():
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind((HOST, PORT))
-        s.listen()
-        print(f"[*] Servidor de latencia escuchando en {HOST}:{PORT}")
-        while True:
-            conn, addr = s.accept()
-            with conn:
-                try:
-                    data = conn.recv(1024)
-                    if data.startswith(b'PING'):
-                        conn.sendall(b'PONG' + data[4:])  # Eco del timestamp
-                except Exception as e:
-                    print(f"Error con {addr}: {e}")
+    try:
+        asyncio.run(ProbeServer().serve_forever())
+    except KeyboardInterrupt:
+        print("\nCerrando servidor de latencia...")
+
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    start_server()
@@ -0,0 +1,378 @@
+import csv
+import json
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+import numpy as np
+from rutas_ancho import ANCHO_POR_DEFECTO, GrafoRed
+
+# Lectura de topologías desde archivos en lugar de literales en el código. Una topología es
+# una lista de enlaces no dirigidos (nodo_a, nodo_b, ancho_mbps, latencia_ms) que se guarda
+# en arreglos contiguos (u, v, ancho, latencia) como los de mst_arreglos.py; el único
+# diccionario es el de nombre de nodo -> índice, nunca uno por enlace. Formatos:
+#  - CSV: origen,destino[,ancho_mbps[,latencia_ms]] con cabecera opcional (con cabecera las
+#    columnas pueden ir en cualquier orden); las líneas que empiezan con # se ignoran
+#  - JSON lines: una lista [origen, destino, ancho?, latencia?] o un objeto con esas claves
+#    por línea
+#  - JSON: el documento de motor_simulacion.py ({"origen", "enlaces": [[a, b, latencia, ancho]]}
+#    o {"latencias", "anchos"} con los diccionarios de la interfaz)
+#  - binario (.topo): cabecera, nombres en JSON y los cuatro arreglos tal cual están en
+#    memoria. Se abre con mmap, así que cargarlo no lee los arreglos: las páginas se traen
+#    del disco cuando se usan
+# Los CSV y JSON lines se leen en streaming fila a fila. Si el archivo es grande, al leerlo
+# se guarda al lado una copia binaria (archivo + SUFIJO_INDICE) con el tamaño y la fecha del
+# original; mientras no cambie, volver a cargarlo es abrir esa copia con mmap.
+
+ANCHO_POR_DEFECTO_MBPS = ANCHO_POR_DEFECTO  # enlaces sin ancho de banda en el archivo
+LATENCIA_POR_DEFECTO_MS = 1.0  # enlaces sin latencia, como GrafoRed.desde_enlaces
+UMBRAL_INDICE = 1024 * 1024  # a partir de este tamaño (bytes) se guarda la copia binaria
+SUFIJO_INDICE = ".idx"
+
+MAGIA = b"TOPO"
+VERSION = 1
+# magia, versión, orden de bytes (0 little, 1 big), nodos, enlaces, bytes de los nombres,
+# tamaño y fecha de modificación (ns) del archivo original (0 si no es una copia)
+CABECERA = struct.Struct("<4sBB2xQQQQq")
+ORDEN_BYTES = 0 if sys.byteorder == 'little' else 1
+COLUMNAS = ("origen", "destino", "ancho_mbps", "latencia_ms")
+
+
+class Topologia:
+    def __init__(self, nombres, u, v, ancho, latencia, origen=None, mapa=None, num_nodos=None, nombres_json=None,
+                 fuente=None):
+        self._nombres = nombres  # índice -> nombre; si viene de un binario se decodifica al pedirlo
+        self._nombres_json = nombres_json
+        self._num_nodos = len(nombres) if nombres is not None else num_nodos
+        self.u = u  # arreglos de NumPy de tamaño E (int32, int32, float64, float64)
+        self.v = v
+        self.ancho = ancho  # Mbps
+        self.latencia = latencia  # ms
+        self.origen = origen  # nodo de origen si el archivo lo indica
+        self._mapa = mapa
+        self._fuente = fuente  # (tamaño, fecha) del original si es una copia binaria
+
+    @property
+    def nombres(self):
+        if self._nombres is None:
+            self._nombres = json.loads(bytes(self._nombres_json))
+            self._nombres_json = None
+        return self._nombres
+
+    def num_nodos(self):
+        return self._num_nodos
+
+    def num_aristas(self):
+        return len(self.u)
+
+    # Lista de (nodo_a, nodo_b, ancho) como la de automatizacionv2.py y el script de Kruskal
+    def enlaces(self):
+        nombres = self.nombres
+        return [(nombres[a], nombres[b], ancho)
+                for a, b, ancho in zip(self.u.tolist(), self.v.tolist(), self.ancho.tolist())]
+
+    # Diccionarios {nodo: {vecino: latencia}} y {nodo: {vecino: ancho}} en ambos sentidos, los
+    # de VPNFileTransferApp y MotorSimulacion
+    def diccionarios(self):
+        nombres = self.nombres
+        latencias = {nombre: {} for nombre in nombres}
+        anchos = {nombre: {} for nombre in nombres}
+        for a, b, ancho, latencia in zip(self.u.tolist(), self.v.tolist(), self.ancho.tolist(),
+                                         self.latencia.tolist()):
+            a, b = nombres[a], nombres[b]
+            latencias[a][b] = latencias[b][a] = latencia
+            anchos[a][b] = anchos[b][a] = ancho
+        return latencias, anchos
+
+    # GrafoRed (CSR con las dos direcciones de cada enlace) construido sobre los arreglos
+    def grafo_red(self):
+        n = self.num_nodos()
+        origenes = np.concatenate((self.u, self.v))
+        orden = np.argsort(origenes, kind='stable')
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origenes, minlength=n), out=offsets[1:])
+        vecinos = np.concatenate((self.v, self.u))[orden].astype(np.int64)
+        pesos = np.concatenate((self.latencia, self.latencia))[orden]
+        anchos = np.concatenate((self.ancho, self.ancho))[orden]
+        return GrafoRed(self.nombres, array('q', offsets.tobytes()), array('q', vecinos.tobytes()),
+                        array('d', pesos.tobytes()), array('d', anchos.tobytes()))
+
+    def guardar(self, ruta):
+        _escribir(ruta, self, 0, 0)
+
+    def cerrar(self):
+        if self._mapa is not None:
+            # Los arreglos son vistas del mapa: hay que soltarlas antes de cerrarlo
+            self.u = self.v = self.ancho = self.latencia = self._nombres_json = None
+            self._mapa.close()
+            self._mapa = None
+
+
+# Lee un archivo de topología según su extensión (.topo, .json, .jsonl/.ndjson o CSV)
+def cargar(ruta, usar_indice=True):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".topo":
+        return cargar_binario(ruta)
+    if extension == ".json":
+        return _leer_documento(ruta)
+    lector = _leer_jsonl if extension in (".jsonl", ".ndjson") else _leer_csv
+    if not usar_indice:
+        return lector(ruta)
+    estado = os.stat(ruta)
+    indice = ruta + SUFIJO_INDICE
+    try:
+        topologia = cargar_binario(indice)
+        if topologia._fuente == (estado.st_size, estado.st_mtime_ns):
+            return topologia
+        topologia.cerrar()
+    except (OSError, ValueError):
+        pass
+    topologia = lector(ruta)
+    if estado.st_size >= UMBRAL_INDICE:
+        try:
+            _escribir(indice, topologia, estado.st_size, estado.st_mtime_ns)
+        except OSError:
+            pass  # sin permiso de escritura se lee el original cada vez
+    return topologia
+
+
+# Abre un .topo (o una copia binaria) sin leerlo entero: los arreglos son vistas del mmap
+def cargar_binario(ruta):
+    with open(ruta, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapa) < CABECERA.size:
+        mapa.close()
+        raise ValueError(f"{ruta} no es una topología binaria")
+    magia, version, orden_bytes, n, m, bytes_nombres, tamano, fecha = CABECERA.unpack_from(mapa, 0)
+    if magia != MAGIA or version != VERSION:
+        mapa.close()
+        raise ValueError(f"{ruta} no es una topología binaria")
+    if orden_bytes != ORDEN_BYTES:
+        mapa.close()
+        raise ValueError(f"{ruta} se generó en una máquina con otro orden de bytes")
+    posicion = CABECERA.size
+    nombres_json = memoryview(mapa)[posicion:posicion + bytes_nombres]
+    posicion += bytes_nombres
+    arreglos = []
+    for tipo in (np.int32, np.int32, np.float64, np.float64):
+        arreglos.append(np.frombuffer(mapa, dtype=tipo, count=m, offset=posicion))
+        posicion += m * np.dtype(tipo).itemsize
+    return Topologia(None, *arreglos, mapa=mapa, num_nodos=n, nombres_json=nombres_json, fuente=(tamano, fecha))
+
+
+# Cabecera, nombres en JSON (rellenados hasta múltiplo de 8) y los arreglos seguidos. Se
+# escribe en un archivo temporal y se renombra, así un lector nunca ve una copia a medias
+def _escribir(ruta, topologia, tamano_fuente, fecha_fuente):
+    datos_nombres = json.dumps(topologia.nombres).encode('utf-8')
+    datos_nombres += b" " * (-len(datos_nombres) % 8)
+    temporal = ruta + ".tmp"
+    with open(temporal, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, ORDEN_BYTES, topologia.num_nodos(), topologia.num_aristas(),
+                              len(datos_nombres), tamano_fuente, fecha_fuente))
+        f.write(datos_nombres)
+        for arreglo, tipo in ((topologia.u, np.int32), (topologia.v, np.int32), (topologia.ancho, np.float64),
+                              (topologia.latencia, np.float64)):
+            f.write(np.ascontiguousarray(arreglo, dtype=tipo).data)
+    os.replace(temporal, ruta)
+
+
+# Acumula enlaces en arreglos compactos; los nombres se numeran en orden de aparición
+class _Acumulador:
+    def __init__(self):
+        self.indices = {}
+        self.u = array('i')
+        self.v = array('i')
+        self.ancho = array('d')
+        self.latencia = array('d')
+
+    def agregar(self, nodo_a, nodo_b, ancho, latencia):
+        indices = self.indices
+        a = indices.get(nodo_a)
+        if a is None:
+            a = indices[nodo_a] = len(indices)
+        b = indices.get(nodo_b)
+        if b is None:
+            b = indices[nodo_b] = len(indices)
+        self.u.append(a)
+        self.v.append(b)
+        self.ancho.append(ANCHO_POR_DEFECTO_MBPS if ancho is None or ancho == "" else float(ancho))
+        self.latencia.append(LATENCIA_POR_DEFECTO_MS if latencia is None or latencia == "" else float(latencia))
+
+    def topologia(self, origen=None):
+        # Los arreglos de NumPy comparten la memoria de los array, no se copian
+        return Topologia(list(self.indices),
+                         np.frombuffer(self.u, dtype=np.int32) if self.u else np.zeros(0, np.int32),
+                         np.frombuffer(self.v, dtype=np.int32) if self.v else np.zeros(0, np.int32),
+                         np.frombuffer(self.ancho, dtype=np.float64) if self.ancho else np.zeros(0),
+                         np.frombuffer(self.latencia, dtype=np.float64) if self.latencia else np.zeros(0),
+                         origen)
+
+
+# El bucle va sin llamadas a métodos propios por fila porque es lo que más pesa con millones
+# de líneas
+def _leer_csv(ruta):
+    acumulador = _Acumulador()
+    indices = acumulador.indices
+    buscar = indices.get
+    agregar_u, agregar_v = acumulador.u.append, acumulador.v.append
+    agregar_ancho, agregar_latencia = acumulador.ancho.append, acumulador.latencia.append
+    posiciones = None  # columnas según la cabecera; sin cabecera van en el orden de COLUMNAS
+    primera = True
+    with open(ruta, newline="", encoding="utf-8") as f:
+        for campos in csv.reader(f):
+            if not campos or campos[0].startswith("#"):
+                continue
+            if primera:
+                primera = False
+                if campos[0].strip().lower() in COLUMNAS:
+                    nombres = [nombre.strip().lower() for nombre in campos]
+                    posiciones = [nombres.index(c) if c in nombres else len(campos) for c in COLUMNAS]
+                    if posiciones[0] == len(campos) or posiciones[1] == len(campos):
+                        raise ValueError(f"{ruta}: la cabecera necesita las columnas origen y destino")
+                    continue
+            if posiciones is not None:
+                campos = [campos[c] if c < len(campos) else "" for c in posiciones]
+            elif len(campos) < 4:
+                campos += [""] * (4 - len(campos))
+            nodo_a, nodo_b, ancho, latencia = campos[:4]
+            a = buscar(nodo_a)
+            if a is None:
+                a = indices[nodo_a] = len(indices)
+            b = buscar(nodo_b)
+            if b is None:
+                b = indices[nodo_b] = len(indices)
+            agregar_u(a)
+            agregar_v(b)
+            agregar_ancho(float(ancho) if ancho else ANCHO_POR_DEFECTO_MBPS)
+            agregar_latencia(float(latencia) if latencia else LATENCIA_POR_DEFECTO_MS)
+    return acumulador.topologia()
+
+
+def _leer_jsonl(ruta):
+    acumulador = _Acumulador()
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            enlace = json.loads(linea)
+            if isinstance(enlace, dict):
+                acumulador.agregar(*(enlace.get(c) for c in COLUMNAS))
+            else:
+                acumulador.agregar(*enlace[:4], *([None] * (4 - len(enlace[:4]))))
+    return acumulador.topologia()
+
+
+def _leer_documento(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    acumulador = _Acumulador()
+    if "enlaces" in datos:
+        for nodo_a, nodo_b, latencia, ancho in datos["enlaces"]:
+            acumulador.agregar(nodo_a, nodo_b, ancho, latencia)
+    else:
+        # Diccionarios de la interfaz: cada par una sola vez, con los valores del primer sentido
+        anchos = datos.get("anchos", {})
+        vistos = set()
+        for nodo_a, vecinos in datos["latencias"].items():
+            acumulador.indices.setdefault(nodo_a, len(acumulador.indices))
+            for nodo_b, latencia in vecinos.items():
+                if (nodo_b, nodo_a) not in vistos:
+                    vistos.add((nodo_a, nodo_b))
+                    acumulador.agregar(nodo_a, nodo_b, anchos.get(nodo_a, {}).get(nodo_b), latencia)
+    return acumulador.topologia(datos.get("origen"))
+
+
+# Memoria residente actual y pico del proceso en MB (Linux). El pico es VmHWM y no ru_maxrss,
+# que un proceso hijo hereda del padre
+def _memoria_mb():
+    memoria = {}
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith(("VmRSS:", "VmHWM:")):
+                memoria[linea.split(":")[0]] = int(linea.split()[1]) / 1024
+    return memoria.get("VmRSS", float("nan")), memoria.get("VmHWM", float("nan"))
+
+
+# Se ejecuta en un proceso aparte por fase, así el pico de memoria es solo el de esa carga
+def _medir(ruta, fase):
+    base, _ = _memoria_mb()
+    inicio = time.perf_counter()
+    topologia = cargar(ruta)
+    cargado = time.perf_counter() - inicio
+    if fase == "recorrer":
+        # Lee todos los arreglos (trae del disco todas las páginas del mmap)
+        for arreglo in (topologia.u, topologia.v, topologia.ancho, topologia.latencia):
+            arreglo.sum()
+    total = time.perf_counter() - inicio
+    actual, pico = _memoria_mb()
+    print(json.dumps({'aristas': topologia.num_aristas(), 'nodos': topologia.num_nodos(), 'carga_s': cargado,
+                      'total_s': total, 'rss_mb': actual - base, 'pico_mb': pico - base}))
+
+
+# Genera un CSV de num_aristas enlaces al azar entre num_aristas / 10 nodos y mide, cada fase en
+# un proceso nuevo: la primera lectura (CSV en streaming + copia binaria), la recarga desde la
+# copia, la recarga recorriendo todos los arreglos y, como referencia, la lectura del CSV a
+# diccionarios de adyacencia como los de la interfaz
+def benchmark(num_aristas=10000000, directorio=None, referencia_max=2000000):
+    directorio = directorio or tempfile.mkdtemp(prefix="topologia_")
+    ruta = os.path.join(directorio, f"aristas_{num_aristas}.csv")
+    num_nodos = max(2, num_aristas // 10)
+    inicio = time.perf_counter()
+    rnd = np.random.default_rng(42)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("origen,destino,ancho_mbps,latencia_ms\n")
+        for desde in range(0, num_aristas, 1000000):
+            m = min(1000000, num_aristas - desde)
+            u = rnd.integers(num_nodos, size=m).tolist()
+            v = rnd.integers(num_nodos, size=m).tolist()
+            ancho = rnd.choice((10, 50, 100, 200, 500, 1000), size=m).tolist()
+            latencia = np.round(rnd.uniform(1, 50, size=m), 3).tolist()
+            f.write("".join(f"N{a},N{b},{w},{l}\n" for a, b, w, l in zip(u, v, ancho, latencia)))
+    print(f"{num_aristas} enlaces entre {num_nodos} nodos: {os.path.getsize(ruta) / 1e6:.0f} MB de CSV "
+          f"(generado en {time.perf_counter() - inicio:.1f} s)")
+
+    fases = [("CSV en streaming + copia binaria", "cargar"), ("recarga desde la copia (mmap)", "cargar"),
+             ("recarga y lectura de todos los arreglos", "recorrer")]
+    if num_aristas <= referencia_max:
+        fases.append(("referencia: CSV a diccionarios", "diccionarios"))
+    print(f"  {'fase':<42} {'tiempo (s)':>11} {'RSS (MB)':>9} {'pico (MB)':>10}")
+    for nombre, fase in fases:
+        salida = subprocess.run([sys.executable, os.path.abspath(__file__), "--medir", ruta, fase],
+                                capture_output=True, text=True, check=True).stdout
+        medida = json.loads(salida)
+        print(f"  {nombre:<42} {medida['total_s']:11.3f} {medida['rss_mb']:9.1f} {medida['pico_mb']:10.1f}")
+    print(f"  copia binaria: {os.path.getsize(ruta + SUFIJO_INDICE) / 1e6:.0f} MB en {ruta + SUFIJO_INDICE}")
+
+
+# La referencia: lo que costaría leer el CSV a diccionarios de adyacencia
+def _medir_diccionarios(ruta):
+    base, _ = _memoria_mb()
+    inicio = time.perf_counter()
+    latencias = {}
+    anchos = {}
+    with open(ruta, newline="", encoding="utf-8") as f:
+        filas = csv.reader(f)
+        next(filas)
+        for nodo_a, nodo_b, ancho, latencia in filas:
+            for a, b in ((nodo_a, nodo_b), (nodo_b, nodo_a)):
+                latencias.setdefault(a, {})[b] = float(latencia)
+                anchos.setdefault(a, {})[b] = float(ancho)
+    total = time.perf_counter() - inicio
+    actual, pico = _memoria_mb()
+    print(json.dumps({'aristas': None, 'nodos': len(latencias), 'carga_s': total, 'total_s': total,
+                      'rss_mb': actual - base, 'pico_mb': pico - base}))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--medir":
+        if sys.argv[3] == "diccionarios":
+            _medir_diccionarios(sys.argv[2])
+        else:
+            _medir(sys.argv[2], sys.argv[3])
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000000)
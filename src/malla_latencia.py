@@ -0,0 +1,192 @@
+import asyncio
+import math
+import random
+import sys
+import threading
+import time
+from latencia_server import ProbeServer
+from latencia_cliente import PROBE_TIMEOUT, probe_cached
+
+# Sondeo de latencia de toda la malla: en cada ronda se sondean a la vez todos los enlaces
+# configurados (con un límite de sondas en vuelo y un tiempo máximo por sonda), cada medida
+# se suaviza con una media móvil exponencial (EWMA) y los pesos que cambiaron se entregan
+# juntos en una sola llamada a on_round, así el motor de rutas se actualiza una vez por
+# ronda y no una vez por muestra (ver CacheRutas.actualizar_aristas).
+#
+# Los enlaces se configuran como {(nodo_a, nodo_b): (host, puerto)}: la dirección del
+# servidor de sondas (latencia_server.py) que mide ese enlace.
+
+MAX_IN_FLIGHT = 64  # sondas simultáneas por ronda
+EWMA_ALPHA = 0.3  # peso de la medida nueva en la media móvil
+MAX_LOSSES = 3  # sondas perdidas seguidas para dar un enlace por caído (peso infinito)
+MIN_CHANGE = 0.02  # cambio relativo mínimo para publicar un peso nuevo
+
+
+class MeshProber:
+    def __init__(self, links, on_round=None, max_in_flight=MAX_IN_FLIGHT, timeout=PROBE_TIMEOUT,
+                 alpha=EWMA_ALPHA, max_losses=MAX_LOSSES, min_change=MIN_CHANGE, protocol='udp'):
+        self.links = dict(links)
+        self.on_round = on_round
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.alpha = alpha
+        self.max_losses = max_losses
+        self.min_change = min_change
+        self.protocol = protocol
+        self.estimates = {}  # enlace -> latencia suavizada (ms)
+        self.published = {}  # enlace -> último peso entregado a on_round
+        self.losses = {link: 0 for link in self.links}
+        self.probers = {}
+        self.rounds = 0
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.stopping = None
+
+    # Sondea todos los enlaces una vez y devuelve los pesos que cambiaron {enlace: ms}
+    async def probe_round(self):
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def probe(link):
+            async with semaphore:
+                return await self._probe(link)
+
+        links = list(self.links)
+        rtts = await asyncio.gather(*(probe(link) for link in links))
+        updates = {}
+        with self.lock:
+            for link, rtt in zip(links, rtts):
+                weight = self._update_estimate(link, rtt)
+                previous = self.published.get(link)
+                if weight is None or weight == previous:
+                    continue
+                if (previous is None or math.isinf(weight) or math.isinf(previous)
+                        or abs(weight - previous) > self.min_change * previous):
+                    updates[link] = weight
+                    self.published[link] = weight
+            self.rounds += 1
+        if updates and self.on_round is not None:
+            self.on_round(updates)
+        return updates
+
+    # Un prober cuya conexión se cortó se vuelve a abrir, así un enlace caído que se recupera
+    # deja de tener peso infinito
+    async def _probe(self, link):
+        return await probe_cached(self.probers, link, *self.links[link], self.protocol, self.timeout)
+
+    # EWMA de la latencia del enlace; None si aún no hay medidas, inf si está caído
+    def _update_estimate(self, link, rtt):
+        if rtt is None:
+            self.losses[link] += 1
+            if self.losses[link] >= self.max_losses:
+                self.estimates.pop(link, None)
+                return math.inf
+            return self.estimates.get(link)
+        self.losses[link] = 0
+        previous = self.estimates.get(link)
+        estimate = rtt if previous is None else self.alpha * rtt + (1 - self.alpha) * previous
+        self.estimates[link] = estimate
+        return estimate
+
+    # Rondas cada `interval` segundos (todas, o `rounds` si se indica)
+    async def run(self, interval=1.0, rounds=None):
+        if self.stopping is None:
+            self.stopping = asyncio.Event()
+        try:
+            while not self.stopping.is_set() and (rounds is None or self.rounds < rounds):
+                started = time.monotonic()
+                await self.probe_round()
+                try:
+                    await asyncio.wait_for(self.stopping.wait(),
+                                           max(0.0, interval - (time.monotonic() - started)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.close()
+
+    def close(self):
+        for prober in self.probers.values():
+            prober.close()
+        self.probers.clear()
+
+    # Sondeo continuo en un hilo de fondo con su propio bucle asyncio
+    def start(self, interval=1.0):
+        self.loop = asyncio.new_event_loop()
+        # Se crea aquí y no en run: stop() puede llegar antes de que el hilo empiece a correr
+        self.stopping = asyncio.Event()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.run(interval),),
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.stopping.set)
+        self.thread.join()
+        self.loop.close()
+        self.thread = None
+
+    def weights(self):
+        with self.lock:
+            return dict(self.estimates)
+
+
+# Levanta un servidor de sondas en loopback por enlace, cada uno con el retraso indicado
+# ({enlace: segundos}); devuelve (servidores, enlaces) listos para MeshProber
+async def start_stand_in_servers(delays):
+    servers = {}
+    for link, delay in delays.items():
+        servers[link] = await ProbeServer('127.0.0.1', 0, delay).start()
+    links = {link: ('127.0.0.1', server.port) for link, server in servers.items()}
+    return servers, links
+
+
+# Malla completa de `num_nodes` nodos con retrasos inyectados: mide cuánto tarda cada ronda,
+# cuánto se acerca la EWMA al retraso real y cuántas veces se actualiza la caché de rutas
+def benchmark(num_nodes=20, rounds=10, interval=0.2, seed=42):
+    from cache_rutas import CacheRutas
+
+    rnd = random.Random(seed)
+    nodes = [f"N{i}" for i in range(num_nodes)]
+    delays = {(a, b): rnd.uniform(0.001, 0.03) for i, a in enumerate(nodes) for b in nodes[i + 1:]}
+    graph = {node: {} for node in nodes}
+    cache = CacheRutas(graph, modo_dinamico=True)
+    batches = []
+
+    def apply_round(updates):
+        changes = {}
+        for (a, b), weight in updates.items():
+            changes[(a, b)] = weight
+            changes[(b, a)] = weight
+        cache.actualizar_aristas(changes)
+        batches.append(len(updates))
+
+    async def run():
+        servers, links = await start_stand_in_servers(delays)
+        mesh = MeshProber(links, apply_round)
+        times = []
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                await mesh.probe_round()
+                times.append(time.perf_counter() - start)
+                cache.ruta(nodes[0], nodes[-1])
+                await asyncio.sleep(interval)
+        finally:
+            mesh.close()
+            for server in servers.values():
+                server.close()
+        return mesh, times
+
+    mesh, times = asyncio.run(run())
+    errors = [abs(weight - 1000 * delays[link]) for link, weight in mesh.weights().items()]
+    print(f"{num_nodes} nodos, {len(delays)} enlaces, {rounds} rondas")
+    print(f"  ronda: media {1000 * sum(times) / len(times):.1f} ms, máxima {1000 * max(times):.1f} ms")
+    print(f"  error medio de la EWMA frente al retraso inyectado: {sum(errors) / len(errors):.2f} ms")
+    print(f"  actualizaciones de rutas: {len(batches)} (una por ronda con cambios), "
+          f"versión del grafo {cache.version}, aristas publicadas por ronda {batches}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,236 @@
+import heapq
+import math
+import random
+import time
+from array import array
+
+# Grafo almacenado en formato CSR (offsets, índices de vecinos y pesos en arreglos compactos)
+# Los vecinos del nodo i están en vecinos[offsets[i]:offsets[i + 1]] con sus pesos en la misma posición
+class GrafoCSR:
+    def __init__(self, nombres, offsets, vecinos, pesos):
+        self.nombres = nombres  # índice -> nombre del nodo
+        self.indices = {nombre: i for i, nombre in enumerate(nombres)}  # nombre -> índice
+        self.offsets = offsets  # array('q') de tamaño V + 1
+        self.vecinos = vecinos  # array('q') de tamaño E
+        self.pesos = pesos  # array('d') de tamaño E
+        self._entrantes = None  # índice inverso (aristas de entrada), se construye al pedirlo
+
+    # Construye el grafo a partir del diccionario de adyacencia que usa VPNFileTransferApp
+    @classmethod
+    def desde_diccionario(cls, grafo):
+        nombres = list(grafo.keys())
+        for nodo in grafo:
+            for vecino in grafo[nodo]:
+                if vecino not in grafo:
+                    nombres.append(vecino)
+        nombres = list(dict.fromkeys(nombres))  # quita duplicados manteniendo el orden
+        indices = {nombre: i for i, nombre in enumerate(nombres)}
+
+        offsets = array('q', [0])
+        vecinos = array('q')
+        pesos = array('d')
+        for nombre in nombres:
+            for vecino, latencia in grafo.get(nombre, {}).items():
+                vecinos.append(indices[vecino])
+                pesos.append(latencia)
+            offsets.append(len(vecinos))
+        return cls(nombres, offsets, vecinos, pesos)
+
+    # Construye el grafo a partir de una lista de aristas dirigidas (u, v, peso) con índices enteros
+    @classmethod
+    def desde_aristas(cls, num_nodos, aristas, nombres=None):
+        grados = [0] * (num_nodos + 1)
+        for u, _, _ in aristas:
+            grados[u + 1] += 1
+        for i in range(num_nodos):
+            grados[i + 1] += grados[i]
+        offsets = array('q', grados)
+
+        posicion = list(grados[:num_nodos])
+        vecinos = array('q', bytes(8 * len(aristas)))
+        pesos = array('d', bytes(8 * len(aristas)))
+        for u, v, peso in aristas:
+            vecinos[posicion[u]] = v
+            pesos[posicion[u]] = peso
+            posicion[u] += 1
+
+        if nombres is None:
+            nombres = list(range(num_nodos))
+        return cls(nombres, offsets, vecinos, pesos)
+
+    def num_nodos(self):
+        return len(self.offsets) - 1
+
+    def num_aristas(self):
+        return len(self.vecinos)
+
+    # Índice inverso en formato CSR: las aristas que llegan a v están en
+    # origenes[offsets[v]:offsets[v + 1]] y su peso actual es pesos[posiciones[k]]
+    # Guarda posiciones y no pesos para que los cambios de latencia no lo desactualicen
+    def entrantes(self):
+        if self._entrantes is None:
+            n = self.num_nodos()
+            grados = [0] * (n + 1)
+            for v in self.vecinos:
+                grados[v + 1] += 1
+            for i in range(n):
+                grados[i + 1] += grados[i]
+            offsets = array('q', grados)
+            posicion = grados[:n]
+            origenes = array('q', bytes(8 * len(self.vecinos)))
+            posiciones = array('q', bytes(8 * len(self.vecinos)))
+            for u in range(n):
+                for k in range(self.offsets[u], self.offsets[u + 1]):
+                    v = self.vecinos[k]
+                    origenes[posicion[v]] = u
+                    posiciones[posicion[v]] = k
+                    posicion[v] += 1
+            self._entrantes = (offsets, origenes, posiciones)
+        return self._entrantes
+
+    # Posición de la arista u -> v dentro de los arreglos vecinos/pesos (-1 si no existe)
+    def posicion_arista(self, u, v):
+        for k in range(self.offsets[u], self.offsets[u + 1]):
+            if self.vecinos[k] == v:
+                return k
+        return -1
+
+
+# Dijkstra con montículo binario y arreglo de predecesores (índices enteros)
+# Si se indica un destino se detiene en cuanto se fija su distancia
+def dijkstra(grafo, origen, destino=None):
+    n = grafo.num_nodos()
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    distancias = array('d', [math.inf]) * n
+    predecesores = array('q', [-1]) * n
+    visitados = bytearray(n)
+
+    distancias[origen] = 0.0
+    monticulo = [(0.0, origen)]
+    while monticulo:
+        distancia, nodo = heapq.heappop(monticulo)
+        if visitados[nodo]:
+            continue
+        visitados[nodo] = 1
+        if nodo == destino:
+            break
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            vecino = vecinos[k]
+            nueva = distancia + pesos[k]
+            if nueva < distancias[vecino]:
+                distancias[vecino] = nueva
+                predecesores[vecino] = nodo
+                heapq.heappush(monticulo, (nueva, vecino))
+    return distancias, predecesores
+
+
+# Reconstruye la ruta recorriendo los predecesores hacia atrás (solo una vez al final)
+def reconstruir_ruta(predecesores, origen, destino):
+    ruta = [destino]
+    nodo = destino
+    while nodo != origen:
+        nodo = predecesores[nodo]
+        if nodo == -1:
+            return []
+        ruta.append(nodo)
+    ruta.reverse()
+    return ruta
+
+
+# Ruta óptima entre dos nodos por nombre, con el mismo contrato que find_optimal_path:
+# devuelve (latencia, [nodos]) o (math.inf, []) si no hay ruta
+def ruta_optima(grafo, nodo_inicio, nodo_destino):
+    if nodo_inicio not in grafo.indices or nodo_destino not in grafo.indices:
+        return math.inf, []
+    origen = grafo.indices[nodo_inicio]
+    destino = grafo.indices[nodo_destino]
+    distancias, predecesores = dijkstra(grafo, origen, destino)
+    if distancias[destino] == math.inf:
+        return math.inf, []
+    ruta = reconstruir_ruta(predecesores, origen, destino)
+    return distancias[destino], [grafo.nombres[i] for i in ruta]
+
+
+# Genera un grafo aleatorio conexo y no dirigido en el formato de diccionario de la aplicación
+def grafo_aleatorio(num_nodos, grado=4, semilla=42):
+    rng = random.Random(semilla)
+    grafo = {i: {} for i in range(num_nodos)}
+    # Primero un camino que une todos los nodos para garantizar que sea conexo
+    for i in range(1, num_nodos):
+        j = rng.randrange(i)
+        latencia = round(rng.uniform(1.0, 50.0), 3)
+        grafo[i][j] = latencia
+        grafo[j][i] = latencia
+    # Después aristas extra al azar hasta llegar al grado promedio deseado
+    extras = max(0, num_nodos * grado // 2 - (num_nodos - 1))
+    for _ in range(extras):
+        u = rng.randrange(num_nodos)
+        v = rng.randrange(num_nodos)
+        if u != v:
+            latencia = round(rng.uniform(1.0, 50.0), 3)
+            grafo[u][v] = latencia
+            grafo[v][u] = latencia
+    return grafo
+
+
+# Implementación original de find_optimal_path (O(V² + E·longitud de ruta)) para comparar
+def dijkstra_original(grafo, start_node, destination_node):
+    if start_node not in grafo or destination_node not in grafo:
+        return math.inf, []
+
+    shortest_paths = {node: (math.inf, []) for node in grafo}
+    shortest_paths[start_node] = (0, [start_node])
+    unvisited_nodes = set(grafo.keys())
+
+    while unvisited_nodes:
+        current_node = min(unvisited_nodes, key=lambda node: shortest_paths[node][0])
+        if shortest_paths[current_node][0] == math.inf:
+            break
+        unvisited_nodes.remove(current_node)
+        for neighbor, latency in grafo.get(current_node, {}).items():
+            potential_latency = shortest_paths[current_node][0] + latency
+            if potential_latency < shortest_paths[neighbor][0]:
+                shortest_paths[neighbor] = (potential_latency, shortest_paths[current_node][1] + [neighbor])
+
+    path_info = shortest_paths.get(destination_node)
+    if path_info and path_info[0] != math.inf:
+        return path_info
+    return math.inf, []
+
+
+# Compara el motor CSR contra la implementación original en grafos aleatorios de 10 a 100k nodos
+# La versión original es cuadrática, así que se omite a partir de cierto tamaño
+def benchmark(tamanos=(10, 100, 1000, 10000, 100000), limite_original=5000, consultas=5):
+    print(f"{'Nodos':>8} {'Aristas':>9} {'Construir CSR':>14} {'CSR (ms)':>10} {'Original (ms)':>14} {'Aceleración':>12}")
+    for num_nodos in tamanos:
+        grafo = grafo_aleatorio(num_nodos)
+        rng = random.Random(num_nodos)
+        pares = [(rng.randrange(num_nodos), rng.randrange(num_nodos)) for _ in range(consultas)]
+
+        inicio = time.perf_counter()
+        csr = GrafoCSR.desde_diccionario(grafo)
+        tiempo_construccion = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        for origen, destino in pares:
+            latencia_csr, _ = ruta_optima(csr, origen, destino)
+        tiempo_csr = (time.perf_counter() - inicio) * 1000 / consultas
+
+        if num_nodos <= limite_original:
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                latencia_original, _ = dijkstra_original(grafo, origen, destino)
+            tiempo_original = (time.perf_counter() - inicio) * 1000 / consultas
+            assert math.isclose(latencia_csr, latencia_original)
+            columna_original = f"{tiempo_original:14.2f}"
+            columna_aceleracion = f"{tiempo_original / tiempo_csr:11.1f}x"
+        else:
+            columna_original = f"{'omitido':>14}"
+            columna_aceleracion = f"{'-':>12}"
+
+        print(f"{num_nodos:>8} {csr.num_aristas():>9} {tiempo_construccion:14.2f} {tiempo_csr:10.2f} "
+              f"{columna_original} {columna_aceleracion}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,415 @@
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from cache_rutas import CacheRutas
+from estadisticas import percentil
+from indice_rutas import construir_indice
+from lector_topologia import cargar
+from motor_rutas import grafo_aleatorio
+from rutas_ancho import GrafoRed, frentes_desde, mejor_del_frente, tiempo_esperado
+from rutas_k import CacheKRutas, planificar_reparto
+from simulador_red import SimuladorRed
+
+# Motor de simulación sin interfaz: rutas, estimación de tiempos y simulación de lotes de
+# transferencias. La interfaz (dijkstra.py) es un cliente más de este motor, y también se usa
+# desde la línea de comandos para simular miles de transferencias sobre un archivo de
+# topología y sacar los resultados en JSON o CSV.
+#
+# La simulación es de eventos discretos en tiempo virtual: llegadas y finales de transferencia
+# en un montículo ordenado por tiempo, con `trabajadores` transferencias a la vez como en la
+# cola de la interfaz. El reloj salta de evento en evento, así que simular horas de
+# transferencias tarda milisegundos. Cada transferencia dura el tiempo esperado de su ruta
+# más rápida (latencia + tamaño / cuello de botella, ver rutas_ancho.py). Con --contencion las
+# transferencias simultáneas se reparten el ancho de banda de los enlaces que comparten
+# (simulador_red.py), que es lo que da el tiempo real de un lote grande.
+#
+# Topología (JSON): {"origen": "Dispositivo", "enlaces": [[nodo_a, nodo_b, latencia_ms, ancho_mbps], ...]}
+# con enlaces no dirigidos, o {"latencias": {...}, "anchos": {...}} con los diccionarios de la interfaz.
+# También se aceptan CSV, JSON lines y el binario .topo de lector_topologia.py.
+# Carga (CSV): columnas nombre, tamano_bytes, destino y opcionalmente llegada_s y origen.
+
+ORIGEN = "Dispositivo"
+TRABAJADORES = 8
+MULTIPATH_RUTAS = 4  # rutas candidatas para repartir un archivo grande
+MULTIPATH_MIN_BYTES = 100 * 1024 * 1024  # a partir de este tamaño se planifica el reparto en varias rutas
+
+COLUMNAS = ["nombre", "origen", "destino", "tamano_bytes", "llegada_s", "inicio_s", "fin_s", "espera_s",
+            "duracion_s", "ruta", "latencia_ms", "ancho_mbps", "tiempo_directo_s"]
+COLUMNAS_RESUMEN = ["trabajadores", "transferencias", "completadas", "sin_ruta", "bytes", "duracion_total_s",
+                    "rendimiento_mbps", "espera_media_s", "espera_p99_s", "duracion_media_s", "fin_p50_s",
+                    "fin_p99_s", "tiempo_real_s"]
+
+
+class MotorSimulacion:
+    def __init__(self, latencias, anchos, origen=ORIGEN):
+        self.latencias = latencias  # {nodo: {vecino: ms}}, el mismo objeto que usa la interfaz
+        self.anchos = anchos  # {nodo: {vecino: Mbps}}
+        self.origen = origen
+        # Árboles de rutas por latencia; en modo dinámico los cambios reparan los árboles
+        self.cache_rutas = CacheRutas(latencias, modo_dinamico=True)
+        self.version_anchos = 0
+        self.grafo_red = None  # GrafoRed (latencia + ancho) de la versión clave_grafo_red
+        self.clave_grafo_red = None
+        self.frentes = {}  # origen -> {índice destino: frente de Pareto} para clave_grafo_red
+        self.cache_k_rutas = CacheKRutas()
+        self.indice = None  # índice precalculado para consultas en lote (indice_rutas.py)
+        self.version_indice = None
+
+    @classmethod
+    def desde_archivo(cls, ruta):
+        latencias, anchos, origen = cargar_topologia(ruta)
+        return cls(latencias, anchos, origen)
+
+    # Cambia la latencia de enlaces {(nodo_a, nodo_b): ms} en ambos sentidos; math.inf los elimina
+    def actualizar_latencias(self, cambios):
+        dirigidos = {}
+        for (nodo_a, nodo_b), latencia in cambios.items():
+            dirigidos[(nodo_a, nodo_b)] = latencia
+            dirigidos[(nodo_b, nodo_a)] = latencia
+        self.cache_rutas.actualizar_aristas(dirigidos)
+
+    # Cambia el ancho de banda (Mbps) de un enlace en ambos sentidos
+    def actualizar_ancho(self, nodo_a, nodo_b, ancho_mbps):
+        with self.cache_rutas.lock:
+            self.anchos.setdefault(nodo_a, {})[nodo_b] = ancho_mbps
+            self.anchos.setdefault(nodo_b, {})[nodo_a] = ancho_mbps
+            self.version_anchos += 1
+
+    # Grafo con latencias y anchos de banda; se reconstruye solo cuando cambió alguno de los dos
+    def grafo(self):
+        return self._estado()[0]
+
+    # (grafo, clave de versión, frentes) leídos juntos, para no mezclar los de dos versiones
+    def _estado(self):
+        with self.cache_rutas.lock:
+            clave = (self.cache_rutas.version, self.version_anchos)
+            if self.grafo_red is None or self.clave_grafo_red != clave:
+                self.grafo_red = GrafoRed.desde_diccionarios(self.latencias, self.anchos)
+                self.clave_grafo_red = clave
+                self.frentes = {}
+            return self.grafo_red, self.clave_grafo_red, self.frentes
+
+    # Ruta de menor latencia por nombre: (latencia, [nodos])
+    def ruta_optima(self, origen, destino):
+        return self.cache_rutas.ruta(origen, destino)
+
+    # Ruta más rápida para un archivo por nombre: (tiempo_s, latencia_ms, cuello_mbps, [nodos]).
+    # Los frentes de Pareto desde cada origen a todos los destinos se calculan en una sola
+    # búsqueda por versión del grafo y sirven para cualquier tamaño
+    def ruta_rapida(self, origen, destino, tamano_bytes):
+        grafo, _, frentes = self._estado()
+        if origen not in grafo.indices or destino not in grafo.indices:
+            return math.inf, math.inf, 0.0, []
+        desde_origen = frentes.get(origen)
+        if desde_origen is None:
+            desde_origen = frentes[origen] = frentes_desde(grafo, grafo.indices[origen])
+        frente = desde_origen.get(grafo.indices[destino], [])
+        tiempo, latencia, cuello, ruta = mejor_del_frente(frente, tamano_bytes)
+        return tiempo, latencia, cuello, [grafo.nombres[i] for i in ruta]
+
+    # Reparto de un archivo grande entre varias rutas (ver rutas_k.py), con las rutas por nombre
+    def reparto(self, origen, destino, tamano_bytes, k=MULTIPATH_RUTAS):
+        grafo, clave, _ = self._estado()
+        if origen not in grafo.indices or destino not in grafo.indices:
+            return {'tiempo_s': math.inf, 'rutas': [], 'tiempo_una_ruta_s': math.inf}
+        rutas = self.cache_k_rutas.rutas(grafo, clave, grafo.indices[origen], grafo.indices[destino], k)
+        plan = planificar_reparto(grafo, rutas, tamano_bytes)
+        plan['rutas'] = [([grafo.nombres[i] for i in ruta], latencia, ancho, parte)
+                         for ruta, latencia, ancho, parte in plan['rutas']]
+        return plan
+
+    # Índice precalculado de latencias entre todos los pares; se rehace cuando cambia el grafo
+    def indice_rutas(self):
+        with self.cache_rutas.lock:
+            if self.indice is None or self.version_indice != self.cache_rutas.version:
+                self.indice = construir_indice(self.cache_rutas.grafo_csr)
+                self.version_indice = self.cache_rutas.version
+            return self.indice
+
+    # Latencia (ms) de cada par (origen, destino) por nombre; math.inf si no hay ruta
+    def latencias_lote(self, pares):
+        indice = self.indice_rutas()
+        validos = [i for i, (origen, destino) in enumerate(pares)
+                   if origen in indice.indices and destino in indice.indices]
+        latencias = [math.inf] * len(pares)
+        if validos:
+            encontradas = indice.distancias_lote([indice.indices[pares[i][0]] for i in validos],
+                                                 [indice.indices[pares[i][1]] for i in validos])
+            for i, latencia in zip(validos, encontradas):
+                latencias[i] = float(latencia)
+        return latencias
+
+    # Todo lo que la interfaz muestra de una transferencia: ruta más rápida, enlace directo y,
+    # para archivos grandes, el reparto en varias rutas
+    def estimar(self, destino, tamano_bytes, origen=None):
+        origen = origen or self.origen
+        tiempo, latencia, cuello, ruta = self.ruta_rapida(origen, destino, tamano_bytes)
+        estimacion = {'origen': origen, 'destino': destino, 'tamano_bytes': tamano_bytes, 'ruta': ruta,
+                      'latencia_ms': latencia, 'ancho_mbps': cuello, 'tiempo_s': tiempo,
+                      'directa': None, 'reparto': None}
+        latencia_directa = self.latencias.get(origen, {}).get(destino, math.inf)
+        if latencia_directa != math.inf:
+            ancho_directo = self.anchos.get(origen, {}).get(destino, 0.0)
+            estimacion['directa'] = {'latencia_ms': latencia_directa, 'ancho_mbps': ancho_directo,
+                                     'tiempo_s': tiempo_esperado(latencia_directa, ancho_directo, tamano_bytes)}
+        if ruta and tamano_bytes >= MULTIPATH_MIN_BYTES:
+            plan = self.reparto(origen, destino, tamano_bytes)
+            if len(plan['rutas']) > 1:
+                estimacion['reparto'] = plan
+        return estimacion
+
+    # Simula un lote de transferencias [{'nombre', 'tamano_bytes', 'destino', 'llegada_s'?, 'origen'?}]
+    # en tiempo virtual. prioridad "tamano" (la más pequeña primero) o "llegada".
+    # Devuelve (filas con las COLUMNAS, resumen con las COLUMNAS_RESUMEN)
+    def simular(self, transferencias, trabajadores=TRABAJADORES, prioridad="tamano"):
+        _comprobar_trabajadores(trabajadores)
+        inicio_real = time.perf_counter()
+        LLEGADA, FIN = 0, 1
+        eventos = [(t.get('llegada_s', 0.0), i, LLEGADA, i) for i, t in enumerate(transferencias)]
+        heapq.heapify(eventos)
+        secuencia = itertools.count(len(eventos))
+        en_espera = []
+        libres = trabajadores
+        filas = [None] * len(transferencias)
+        while eventos:
+            reloj, _, tipo, i = heapq.heappop(eventos)
+            if tipo == FIN:
+                libres += 1
+            else:
+                clave = transferencias[i]['tamano_bytes'] if prioridad == "tamano" else reloj
+                heapq.heappush(en_espera, (clave, i))
+            while libres and en_espera:
+                _, i = heapq.heappop(en_espera)
+                fila = filas[i] = self._fila(transferencias[i], reloj)
+                if fila['duracion_s'] != math.inf:
+                    libres -= 1
+                    heapq.heappush(eventos, (fila['fin_s'], next(secuencia), FIN, i))
+        resumen = _resumen(filas, trabajadores)
+        resumen['tiempo_real_s'] = time.perf_counter() - inicio_real
+        return filas, resumen
+
+    # Como simular, pero las transferencias en curso se reparten con equidad max-min el ancho
+    # de banda de los enlaces que comparten (simulador_red.py) en vez de tener cada una todo el
+    # de su ruta. Cada una va por su ruta más rápida; ancho_mbps es la tasa media que obtuvo
+    def simular_contencion(self, transferencias, trabajadores=TRABAJADORES, prioridad="tamano"):
+        _comprobar_trabajadores(trabajadores)
+        inicio_real = time.perf_counter()
+        flujos = []
+        for transferencia in transferencias:
+            origen = transferencia.get('origen') or self.origen
+            ruta = self.ruta_rapida(origen, transferencia['destino'], transferencia['tamano_bytes'])[3]
+            flujos.append({'origen': origen, 'destino': transferencia['destino'],
+                           'tamano_bytes': transferencia['tamano_bytes'],
+                           'llegada_s': transferencia.get('llegada_s', 0.0), 'ruta': ruta})
+        resultados = SimuladorRed(self.grafo()).simular(flujos, trabajadores, prioridad)
+        filas = []
+        for transferencia, flujo, resultado in zip(transferencias, flujos, resultados):
+            origen, destino, tamano = flujo['origen'], flujo['destino'], flujo['tamano_bytes']
+            latencia_directa = self.latencias.get(origen, {}).get(destino, math.inf)
+            filas.append({
+                'nombre': transferencia.get('nombre', ''), 'origen': origen, 'destino': destino,
+                'tamano_bytes': tamano, 'llegada_s': flujo['llegada_s'], 'inicio_s': resultado['inicio_s'],
+                'fin_s': resultado['fin_s'], 'espera_s': resultado['inicio_s'] - flujo['llegada_s'],
+                'duracion_s': resultado['fin_s'] - resultado['inicio_s'], 'ruta': resultado['ruta'],
+                'latencia_ms': resultado['latencia_ms'], 'ancho_mbps': resultado['tasa_media_mbps'],
+                'tiempo_directo_s': tiempo_esperado(latencia_directa, self.anchos.get(origen, {}).get(destino, 0.0),
+                                                    tamano)})
+        resumen = _resumen(filas, trabajadores)
+        resumen['tiempo_real_s'] = time.perf_counter() - inicio_real
+        return filas, resumen
+
+    def _fila(self, transferencia, reloj):
+        origen = transferencia.get('origen') or self.origen
+        destino = transferencia['destino']
+        tamano = transferencia['tamano_bytes']
+        llegada = transferencia.get('llegada_s', 0.0)
+        tiempo, latencia, cuello, ruta = self.ruta_rapida(origen, destino, tamano)
+        latencia_directa = self.latencias.get(origen, {}).get(destino, math.inf)
+        directo = tiempo_esperado(latencia_directa, self.anchos.get(origen, {}).get(destino, 0.0), tamano)
+        return {'nombre': transferencia.get('nombre', ''), 'origen': origen, 'destino': destino,
+                'tamano_bytes': tamano, 'llegada_s': llegada, 'inicio_s': reloj, 'fin_s': reloj + tiempo,
+                'espera_s': reloj - llegada, 'duracion_s': tiempo, 'ruta': ruta, 'latencia_ms': latencia,
+                'ancho_mbps': cuello, 'tiempo_directo_s': directo}
+
+
+# Con menos de una transferencia a la vez la simulación no avanza nunca
+def _comprobar_trabajadores(trabajadores):
+    if trabajadores < 1:
+        raise ValueError(f"trabajadores debe ser un entero mayor o igual que 1, no {trabajadores!r}")
+
+
+# Tipo de --trabajadores: uno o varios enteros >= 1 separados por comas
+def _lista_trabajadores(texto):
+    try:
+        valores = [int(valor) for valor in texto.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaban enteros separados por comas: {texto!r}")
+    for valor in valores:
+        if valor < 1:
+            raise argparse.ArgumentTypeError(f"el número de trabajadores debe ser al menos 1, no {valor}")
+    return valores
+
+
+def _resumen(filas, trabajadores):
+    completadas = [f for f in filas if f['duracion_s'] != math.inf]
+    esperas = sorted(f['espera_s'] for f in completadas)
+    fines = sorted(f['fin_s'] for f in completadas)
+    total_bytes = sum(f['tamano_bytes'] for f in completadas)
+    duracion_total = fines[-1] - min(f['llegada_s'] for f in completadas) if completadas else 0.0
+    return {
+        'trabajadores': trabajadores,
+        'transferencias': len(filas),
+        'completadas': len(completadas),
+        'sin_ruta': len(filas) - len(completadas),
+        'bytes': total_bytes,
+        'duracion_total_s': duracion_total,
+        'rendimiento_mbps': total_bytes * 8 / 1e6 / duracion_total if duracion_total > 0 else 0.0,
+        'espera_media_s': sum(esperas) / len(esperas) if esperas else 0.0,
+        'espera_p99_s': percentil(esperas, 99),
+        'duracion_media_s': sum(f['duracion_s'] for f in completadas) / len(completadas) if completadas else 0.0,
+        'fin_p50_s': percentil(fines, 50),
+        'fin_p99_s': percentil(fines, 99),
+    }
+
+
+# Lee un archivo de topología (ver lector_topologia.py); devuelve (latencias, anchos, origen)
+def cargar_topologia(ruta):
+    topologia = cargar(ruta)
+    latencias, anchos = topologia.diccionarios()
+    origen = topologia.origen or next(iter(latencias))
+    return latencias, anchos, origen
+
+
+# Topología aleatoria de num_nodos con latencias de grafo_aleatorio y anchos entre 10 y 1000 Mbps
+def topologia_aleatoria(num_nodos, semilla=42):
+    latencias = {f"N{u}": {f"N{v}": latencia for v, latencia in vecinos.items()}
+                 for u, vecinos in grafo_aleatorio(num_nodos, semilla=semilla).items()}
+    rnd = random.Random(semilla + 1)
+    anchos = {}
+    for u in latencias:
+        for v in latencias[u]:
+            ancho = anchos.get(v, {}).get(u) or rnd.choice((10, 50, 100, 200, 500, 1000))
+            anchos.setdefault(u, {})[v] = ancho
+    return latencias, anchos, "N0"
+
+
+# Lee una carga de transferencias en CSV
+def cargar_transferencias(ruta):
+    with open(ruta, newline="", encoding="utf-8") as f:
+        return [{'nombre': fila.get('nombre', ''), 'tamano_bytes': int(fila['tamano_bytes']),
+                 'destino': fila['destino'], 'llegada_s': float(fila.get('llegada_s') or 0.0),
+                 'origen': fila.get('origen') or None}
+                for fila in csv.DictReader(f)]
+
+
+# Carga sintética: tamaños log-uniformes entre tamano_min y tamano_max, destinos al azar
+# (distintos del origen) y llegadas de Poisson con `intervalo_s` medio (0 = todas a la vez)
+def generar_transferencias(motor, cantidad, tamano_min=1024 ** 2, tamano_max=1024 ** 3, intervalo_s=0.0,
+                           destinos=None, semilla=42):
+    rnd = random.Random(semilla)
+    destinos = destinos or [nodo for nodo in motor.latencias if nodo != motor.origen]
+    llegada = 0.0
+    transferencias = []
+    for i in range(cantidad):
+        if intervalo_s > 0:
+            llegada += rnd.expovariate(1 / intervalo_s)
+        tamano = int(math.exp(rnd.uniform(math.log(tamano_min), math.log(tamano_max))))
+        transferencias.append({'nombre': f"archivo_{i}", 'tamano_bytes': tamano,
+                               'destino': rnd.choice(destinos), 'llegada_s': llegada})
+    return transferencias
+
+
+def _valor_salida(valor):
+    if isinstance(valor, list):
+        return " > ".join(str(nodo) for nodo in valor)
+    if isinstance(valor, float) and math.isinf(valor):
+        return "inf"
+    return valor
+
+
+def escribir_csv(filas, columnas, salida):
+    escritor = csv.writer(salida, lineterminator="\n")
+    escritor.writerow(columnas)
+    for fila in filas:
+        escritor.writerow([_valor_salida(fila[columna]) for columna in columnas])
+
+
+def escribir_json(datos, salida):
+    # JSON no admite infinito: las transferencias sin ruta salen con null
+    def limpiar(valor):
+        if isinstance(valor, float) and math.isinf(valor):
+            return None
+        if isinstance(valor, dict):
+            return {clave: limpiar(v) for clave, v in valor.items()}
+        if isinstance(valor, list):
+            return [limpiar(v) for v in valor]
+        return valor
+    json.dump(limpiar(datos), salida, ensure_ascii=False, indent=1)
+    salida.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación de transferencias en tiempo virtual")
+    parser.add_argument("topologia", nargs="?", help="archivo de topología (JSON, CSV, JSON lines o .topo)")
+    parser.add_argument("--aleatoria", type=int, metavar="N", help="usar una topología aleatoria de N nodos")
+    parser.add_argument("--carga", help="CSV con las transferencias (nombre, tamano_bytes, destino, llegada_s)")
+    parser.add_argument("-n", "--transferencias", type=int, default=1000, help="transferencias sintéticas")
+    parser.add_argument("--tamano-min-mb", type=float, default=1.0)
+    parser.add_argument("--tamano-max-mb", type=float, default=1024.0)
+    parser.add_argument("--intervalo-s", type=float, default=0.0, help="tiempo medio entre llegadas")
+    parser.add_argument("--destino", action="append", help="destino de la carga sintética (se puede repetir)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--trabajadores", type=_lista_trabajadores, default=str(TRABAJADORES),
+                        help="transferencias simultáneas; varias separadas por comas hacen un barrido")
+    parser.add_argument("--prioridad", choices=("tamano", "llegada"), default="tamano")
+    parser.add_argument("--contencion", action="store_true",
+                        help="repartir el ancho de banda de los enlaces entre las transferencias simultáneas")
+    parser.add_argument("--formato", choices=("json", "csv"), default="json")
+    parser.add_argument("-o", "--salida", help="archivo de salida (por defecto la salida estándar)")
+    args = parser.parse_args(argv)
+
+    if args.aleatoria:
+        motor = MotorSimulacion(*topologia_aleatoria(args.aleatoria, args.semilla))
+    elif args.topologia:
+        motor = MotorSimulacion.desde_archivo(args.topologia)
+    else:
+        parser.error("indica un archivo de topología o --aleatoria N")
+    if args.carga:
+        transferencias = cargar_transferencias(args.carga)
+    else:
+        transferencias = generar_transferencias(motor, args.transferencias, int(args.tamano_min_mb * 1024 ** 2),
+                                                int(args.tamano_max_mb * 1024 ** 2), args.intervalo_s,
+                                                args.destino, args.semilla)
+    valores = args.trabajadores
+    simular = motor.simular_contencion if args.contencion else motor.simular
+
+    salida = open(args.salida, "w", newline="", encoding="utf-8") if args.salida else sys.stdout
+    try:
+        if len(valores) == 1:
+            filas, resumen = simular(transferencias, valores[0], args.prioridad)
+            if args.formato == "json":
+                escribir_json({'resumen': resumen, 'transferencias': filas}, salida)
+            else:
+                escribir_csv(filas, COLUMNAS, salida)
+            print(f"{resumen['completadas']}/{resumen['transferencias']} transferencias, "
+                  f"{resumen['duracion_total_s']:.1f} s simulados en {1000 * resumen['tiempo_real_s']:.1f} ms",
+                  file=sys.stderr)
+        else:
+            resumenes = [simular(transferencias, valor, args.prioridad)[1] for valor in valores]
+            if args.formato == "json":
+                escribir_json({'barrido': resumenes}, salida)
+            else:
+                escribir_csv(resumenes, COLUMNAS_RESUMEN, salida)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import time
+import numpy as np
+
+# MST sobre arreglos de NumPy: las aristas viven en tres arreglos contiguos (u, v, ancho)
+# en lugar de diccionarios de networkx por arista. Los algoritmos devuelven los índices
+# de las aristas elegidas, así no hace falta copiar ni invertir ningún grafo.
+
+
+# Convierte una lista de (nodo1, nodo2, ancho) en nombres de nodos y arreglos u, v, ancho
+def aristas_a_arreglos(datos):
+    indices = {}
+    extremos_u = []
+    extremos_v = []
+    anchos = []
+    for n1, n2, ancho in datos:
+        extremos_u.append(indices.setdefault(n1, len(indices)))
+        extremos_v.append(indices.setdefault(n2, len(indices)))
+        anchos.append(ancho)
+    u = np.array(extremos_u, dtype=np.int64)
+    v = np.array(extremos_v, dtype=np.int64)
+    ancho = np.array(anchos, dtype=np.float64)
+    return list(indices), u, v, ancho
+
+
+# Orden estable de las aristas: por ancho descendente (árbol máximo) o ascendente (mínimo)
+def _orden(ancho, maximo):
+    clave = -ancho if maximo else ancho
+    return np.argsort(clave, kind='stable')
+
+
+# Kruskal con unión-búsqueda (compresión de caminos y unión por rango)
+def kruskal(u, v, ancho, num_nodos, maximo=False):
+    orden = _orden(ancho, maximo)
+    padre = list(range(num_nodos))
+    rango = [0] * num_nodos
+
+    def buscar(x):
+        raiz = x
+        while padre[raiz] != raiz:
+            raiz = padre[raiz]
+        while padre[x] != raiz:
+            padre[x], x = raiz, padre[x]
+        return raiz
+
+    seleccion = []
+    for a, b, e in zip(u[orden].tolist(), v[orden].tolist(), orden.tolist()):
+        ra, rb = buscar(a), buscar(b)
+        if ra == rb:
+            continue
+        if rango[ra] < rango[rb]:
+            ra, rb = rb, ra
+        padre[rb] = ra
+        if rango[ra] == rango[rb]:
+            rango[ra] += 1
+        seleccion.append(e)
+        if len(seleccion) == num_nodos - 1:
+            break
+    return np.array(seleccion, dtype=np.int64)
+
+
+# Borůvka en paralelo de datos: en cada ronda todas las componentes eligen a la vez su
+# mejor arista con operaciones vectorizadas y se fusionan con saltos de punteros
+def boruvka(u, v, ancho, num_nodos, maximo=False):
+    orden = _orden(ancho, maximo)
+    # Posición de cada arista en el orden: clave única, así no hay empates entre aristas
+    posicion = np.empty(len(orden), dtype=np.int64)
+    posicion[orden] = np.arange(len(orden), dtype=np.int64)
+    sin_arista = np.iinfo(np.int64).max
+
+    componente = np.arange(num_nodos, dtype=np.int64)
+    activas = np.flatnonzero(u != v)
+    seleccion = []
+    while True:
+        cu = componente[u[activas]]
+        cv = componente[v[activas]]
+        cruzan = cu != cv
+        activas, cu, cv = activas[cruzan], cu[cruzan], cv[cruzan]
+        if len(activas) == 0:
+            break
+
+        # Mejor arista (menor posición) que toca a cada componente
+        mejor = np.full(num_nodos, sin_arista, dtype=np.int64)
+        np.minimum.at(mejor, cu, posicion[activas])
+        np.minimum.at(mejor, cv, posicion[activas])
+        comps = np.flatnonzero(mejor != sin_arista)
+        elegidas = orden[mejor[comps]]
+        seleccion.append(np.unique(elegidas))
+
+        # Cada componente se engancha al otro extremo de su mejor arista; en los pares
+        # que se eligen mutuamente la componente menor queda como raíz
+        eu = componente[u[elegidas]]
+        ev = componente[v[elegidas]]
+        enganche = np.arange(num_nodos, dtype=np.int64)
+        enganche[comps] = np.where(eu == comps, ev, eu)
+        mutuos = (enganche[enganche[comps]] == comps) & (comps < enganche[comps])
+        enganche[comps[mutuos]] = comps[mutuos]
+        while True:
+            siguiente = enganche[enganche]
+            if np.array_equal(siguiente, enganche):
+                break
+            enganche = siguiente
+        componente = enganche[componente]
+
+    if not seleccion:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(seleccion)
+
+
+# Comprueba que ambos algoritmos eligen las mismas aristas que networkx en las
+# topologías de ejemplo del proyecto
+def comparar_con_networkx():
+    import random
+    import networkx as nx
+    from automatizacionv2 import fetch_network_data
+
+    random.seed(42)
+    muestras = {
+        "generar_topologia (Kruskal)": [
+            ("A", "B", 90), ("A", "C", 40), ("B", "C", 70), ("B", "D", 20),
+            ("C", "D", 50), ("C", "E", 60), ("D", "E", 30)
+        ],
+        "fetch_network_data (automatizacionv2)": fetch_network_data()
+    }
+    for nombre, datos in muestras.items():
+        G = nx.Graph()
+        for n1, n2, ancho in datos:
+            G.add_edge(n1, n2, weight=1 / ancho)
+        esperado = {frozenset(arista) for arista in nx.minimum_spanning_tree(G, weight="weight").edges()}
+
+        nodos, u, v, ancho = aristas_a_arreglos(datos)
+        for algoritmo in (kruskal, boruvka):
+            seleccion = algoritmo(u, v, ancho, len(nodos), maximo=True)
+            obtenido = {frozenset((nodos[u[e]], nodos[v[e]])) for e in seleccion.tolist()}
+            resultado = "mismas aristas" if obtenido == esperado else "DIFERENTE"
+            print(f"{nombre} / {algoritmo.__name__}: {resultado}")
+
+
+# Tiempo de networkx contra los dos algoritmos sobre arreglos en una topología grande
+def benchmark(num_nodos=25000, num_enlaces=100000):
+    import networkx as nx
+    from mst_dinamico import topologia_aleatoria
+
+    datos = topologia_aleatoria(num_nodos, num_enlaces)
+    inicio = time.perf_counter()
+    G = nx.Graph()
+    for n1, n2, ancho in datos:
+        G.add_edge(n1, n2, weight=1 / ancho)
+    peso_nx = nx.minimum_spanning_tree(G, weight="weight").size(weight="weight")
+    print(f"networkx:          {(time.perf_counter() - inicio) * 1000:8.1f} ms")
+
+    nodos, u, v, ancho = aristas_a_arreglos(datos)
+    for algoritmo in (kruskal, boruvka):
+        inicio = time.perf_counter()
+        seleccion = algoritmo(u, v, ancho, len(nodos), maximo=True)
+        tiempo = time.perf_counter() - inicio
+        assert np.isclose((1 / ancho[seleccion]).sum(), peso_nx)
+        print(f"{algoritmo.__name__ + ' (arreglos):':<19}{tiempo * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    comparar_con_networkx()
+    benchmark()
@@ -0,0 +1,443 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from mst_arreglos import kruskal
+
+# Árbol link-cut (Sleator–Tarjan) que guarda el bosque del MST
+# Cada vértice y cada arista del árbol es un nodo; las aristas llevan su peso y los vértices
+# -inf, así la consulta de camino devuelve la arista de mayor peso entre dos vértices
+class ArbolLinkCut:
+    def __init__(self):
+        self.izq = []
+        self.der = []
+        self.padre = []
+        self.invertido = []
+        self.valor = []
+        self.maximo = []  # nodo con el mayor valor dentro del subárbol auxiliar
+
+    def nuevo_nodo(self, valor):
+        nodo = len(self.valor)
+        self.izq.append(-1)
+        self.der.append(-1)
+        self.padre.append(-1)
+        self.invertido.append(False)
+        self.valor.append(valor)
+        self.maximo.append(nodo)
+        return nodo
+
+    def _es_raiz(self, x):
+        p = self.padre[x]
+        return p == -1 or (self.izq[p] != x and self.der[p] != x)
+
+    def _empujar(self, x):
+        if self.invertido[x]:
+            izq, der = self.izq[x], self.der[x]
+            self.izq[x], self.der[x] = der, izq
+            if izq != -1:
+                self.invertido[izq] = not self.invertido[izq]
+            if der != -1:
+                self.invertido[der] = not self.invertido[der]
+            self.invertido[x] = False
+
+    def _actualizar(self, x):
+        mejor = x
+        valor = self.valor
+        for hijo in (self.izq[x], self.der[x]):
+            if hijo != -1 and valor[self.maximo[hijo]] > valor[mejor]:
+                mejor = self.maximo[hijo]
+        self.maximo[x] = mejor
+
+    def _rotar(self, x):
+        p = self.padre[x]
+        g = self.padre[p]
+        if not self._es_raiz(p):
+            if self.izq[g] == p:
+                self.izq[g] = x
+            else:
+                self.der[g] = x
+        self.padre[x] = g
+        if self.izq[p] == x:
+            hijo = self.der[x]
+            self.izq[p] = hijo
+            self.der[x] = p
+        else:
+            hijo = self.izq[x]
+            self.der[p] = hijo
+            self.izq[x] = p
+        if hijo != -1:
+            self.padre[hijo] = p
+        self.padre[p] = x
+        self._actualizar(p)
+        self._actualizar(x)
+
+    def _splay(self, x):
+        # Primero se propagan las inversiones pendientes desde la raíz auxiliar hasta x
+        pila = [x]
+        y = x
+        while not self._es_raiz(y):
+            y = self.padre[y]
+            pila.append(y)
+        for y in reversed(pila):
+            self._empujar(y)
+        while not self._es_raiz(x):
+            p = self.padre[x]
+            if not self._es_raiz(p):
+                g = self.padre[p]
+                if (self.izq[g] == p) == (self.izq[p] == x):
+                    self._rotar(p)
+                else:
+                    self._rotar(x)
+            self._rotar(x)
+
+    def _acceder(self, x):
+        ultimo = -1
+        y = x
+        while y != -1:
+            self._splay(y)
+            self.der[y] = ultimo
+            self._actualizar(y)
+            ultimo = y
+            y = self.padre[y]
+        self._splay(x)
+
+    def _hacer_raiz(self, x):
+        self._acceder(x)
+        self.invertido[x] = not self.invertido[x]
+
+    def raiz(self, x):
+        self._acceder(x)
+        while True:
+            self._empujar(x)
+            if self.izq[x] == -1:
+                break
+            x = self.izq[x]
+        self._splay(x)
+        return x
+
+    def conectados(self, x, y):
+        return x == y or self.raiz(x) == self.raiz(y)
+
+    def enlazar(self, x, y):
+        self._hacer_raiz(x)
+        self.padre[x] = y
+
+    def cortar(self, x, y):
+        self._hacer_raiz(x)
+        self._acceder(y)
+        # Ahora x es el hijo izquierdo de y en el árbol auxiliar
+        self.izq[y] = -1
+        self.padre[x] = -1
+        self._actualizar(y)
+
+    def cambiar_valor(self, x, valor):
+        self._acceder(x)
+        self.valor[x] = valor
+        self._actualizar(x)
+
+    # Nodo de mayor valor en el camino entre x e y (deben estar conectados)
+    def maximo_camino(self, x, y):
+        self._hacer_raiz(x)
+        self._acceder(y)
+        return self.maximo[y]
+
+
+# Árbol de expansión mínima dinámico sobre los pesos 1 / ancho de banda, es decir, el árbol
+# que conserva los enlaces más anchos.
+# Acepta cambios de ancho de banda y los resuelve con reemplazos de ciclo y de corte:
+#  - arista fuera del árbol que mejora: si es menor que la arista máxima del ciclo que cierra, la sustituye
+#  - arista del árbol que empeora: se busca la mejor arista que cruza el corte que deja al quitarla
+class MSTDinamico:
+    def __init__(self):
+        self._reiniciar()
+        self.reconstrucciones = 0
+
+    # Estado vacío (sin vértices ni aristas); cargar lo usa para empezar de cero
+    def _reiniciar(self):
+        self.lct = ArbolLinkCut()
+        self.indices = {}  # nombre del nodo -> índice
+        self.nombres = []
+        self.nodo_vertice = []  # índice del vértice -> nodo del árbol link-cut
+        self.incidentes = []  # índice del vértice -> ids de todas sus aristas
+        self.aristas_arbol_de = []  # índice del vértice -> ids de sus aristas en el árbol
+        self.extremos = []  # id de arista -> (u, v)
+        self.anchos = []
+        self.pesos = []
+        self.en_arbol = []
+        self.activa = []
+        self.nodo_arista = []  # id de arista -> nodo del árbol link-cut
+        self.arista_de_nodo = []  # nodo del árbol link-cut -> id de arista (-1 para vértices)
+        self.id_por_par = {}
+        self.libres = []  # ids de aristas eliminadas, que se reutilizan al crear otras
+
+    def _vertice(self, nombre):
+        indice = self.indices.get(nombre)
+        if indice is None:
+            indice = len(self.nombres)
+            self.indices[nombre] = indice
+            self.nombres.append(nombre)
+            self.nodo_vertice.append(self.lct.nuevo_nodo(-math.inf))
+            self.arista_de_nodo.append(-1)
+            self.incidentes.append(set())
+            self.aristas_arbol_de.append(set())
+        return indice
+
+    def _par(self, u, v):
+        return (u, v) if u < v else (v, u)
+
+    # Crea la arista u - v con su nodo en el árbol link-cut (todavía fuera del MST). Si hay
+    # ids libres se reutiliza uno con su nodo, así un enlace que se cae y vuelve muchas veces
+    # no hace crecer la estructura
+    def _nueva_arista(self, u, v, par, ancho):
+        if self.libres:
+            e = self.libres.pop()
+            self.extremos[e] = par
+            self.anchos[e] = ancho
+            self.pesos[e] = 1 / ancho
+            self.en_arbol[e] = False
+            self.activa[e] = True
+            self.lct.cambiar_valor(self.nodo_arista[e], 1 / ancho)
+        else:
+            e = len(self.extremos)
+            self.extremos.append(par)
+            self.anchos.append(ancho)
+            self.pesos.append(1 / ancho)
+            self.en_arbol.append(False)
+            self.activa.append(True)
+            self.nodo_arista.append(self.lct.nuevo_nodo(1 / ancho))
+            self.arista_de_nodo.append(e)
+        self.id_por_par[par] = e
+        self.incidentes[u].add(e)
+        self.incidentes[v].add(e)
+        return e
+
+    def _agregar_al_arbol(self, e, u, v):
+        nodo = self.nodo_arista[e]
+        self.lct.enlazar(self.nodo_vertice[u], nodo)
+        self.lct.enlazar(nodo, self.nodo_vertice[v])
+        self.en_arbol[e] = True
+        self.aristas_arbol_de[u].add(e)
+        self.aristas_arbol_de[v].add(e)
+
+    def _quitar_del_arbol(self, e):
+        u, v = self.extremos[e]
+        nodo = self.nodo_arista[e]
+        self.lct.cortar(self.nodo_vertice[u], nodo)
+        self.lct.cortar(nodo, self.nodo_vertice[v])
+        self.en_arbol[e] = False
+        self.aristas_arbol_de[u].discard(e)
+        self.aristas_arbol_de[v].discard(e)
+
+    # Lado más pequeño del corte que deja la arista e: se recorren los dos lados a la vez
+    # y se detiene en cuanto uno termina, así el costo es proporcional al lado menor
+    def _lado_menor(self, e):
+        u, v = self.extremos[e]
+        lados = [[u], [v]]
+        vistos = [{u}, {v}]
+        posiciones = [0, 0]
+        while True:
+            for i in (0, 1):
+                lado, visto = lados[i], vistos[i]
+                if posiciones[i] == len(lado):
+                    return visto
+                x = lado[posiciones[i]]
+                posiciones[i] += 1
+                for f in self.aristas_arbol_de[x]:
+                    if f == e:
+                        continue
+                    a, b = self.extremos[f]
+                    y = b if a == x else a
+                    if y not in visto:
+                        visto.add(y)
+                        lado.append(y)
+
+    # Busca la arista de menor peso fuera del árbol que cruza el corte de e y la usa
+    # como reemplazo si es mejor que el peso actual de e
+    def _reemplazo_corte(self, e):
+        lado = self._lado_menor(e)
+        mejor = -1
+        for x in lado:
+            for f in self.incidentes[x]:
+                if self.en_arbol[f]:
+                    continue
+                a, b = self.extremos[f]
+                if (a in lado) != (b in lado) and (mejor == -1 or self.pesos[f] < self.pesos[mejor]):
+                    mejor = f
+        if not self.activa[e]:
+            self._quitar_del_arbol(e)
+            if mejor != -1:
+                self._agregar_al_arbol(mejor, *self.extremos[mejor])
+        elif mejor != -1 and self.pesos[mejor] < self.pesos[e]:
+            self._quitar_del_arbol(e)
+            self._agregar_al_arbol(mejor, *self.extremos[mejor])
+
+    # Intenta meter en el árbol la arista e (fuera del árbol) cerrando un ciclo
+    def _reemplazo_ciclo(self, e):
+        u, v = self.extremos[e]
+        nu, nv = self.nodo_vertice[u], self.nodo_vertice[v]
+        if not self.lct.conectados(nu, nv):
+            self._agregar_al_arbol(e, u, v)
+            return
+        nodo_max = self.lct.maximo_camino(nu, nv)
+        if self.lct.valor[nodo_max] > self.pesos[e]:
+            f = self.arista_de_nodo[nodo_max]
+            self._quitar_del_arbol(f)
+            self._agregar_al_arbol(e, u, v)
+
+    # Cambia el ancho de banda de un enlace (lo crea si no existe); ancho <= 0 lo elimina
+    def actualizar_ancho(self, n1, n2, ancho):
+        if ancho <= 0:
+            self.eliminar_enlace(n1, n2)
+            return
+        u = self._vertice(n1)
+        v = self._vertice(n2)
+        par = self._par(u, v)
+        e = self.id_por_par.get(par)
+        if e is None:
+            e = self._nueva_arista(u, v, par, ancho)
+            self._reemplazo_ciclo(e)
+            return
+
+        peso_anterior = self.pesos[e]
+        peso_nuevo = 1 / ancho
+        self.anchos[e] = ancho
+        self.pesos[e] = peso_nuevo
+        self.lct.cambiar_valor(self.nodo_arista[e], peso_nuevo)
+        if self.en_arbol[e]:
+            if peso_nuevo > peso_anterior:
+                self._reemplazo_corte(e)
+        elif peso_nuevo < peso_anterior:
+            self._reemplazo_ciclo(e)
+
+    def eliminar_enlace(self, n1, n2):
+        u = self.indices.get(n1)
+        v = self.indices.get(n2)
+        if u is None or v is None:
+            return
+        e = self.id_por_par.pop(self._par(u, v), None)
+        if e is None:
+            return
+        self.activa[e] = False
+        self.incidentes[u].discard(e)
+        self.incidentes[v].discard(e)
+        if self.en_arbol[e]:
+            self._reemplazo_corte(e)
+        # Ya fuera del árbol y sin incidencias: su id y su nodo quedan libres
+        self.libres.append(e)
+
+    # Reconstrucción completa con Kruskal sobre arreglos (mst_arreglos.kruskal) para la carga
+    # inicial o cuando cambian tantos enlaces que reparar uno por uno sale más caro que empezar
+    # de cero
+    def cargar(self, datos):
+        self._reiniciar()
+        for n1, n2, ancho in datos:
+            if ancho <= 0:
+                continue
+            u = self._vertice(n1)
+            v = self._vertice(n2)
+            par = self._par(u, v)
+            e = self.id_por_par.get(par)
+            if e is None:
+                self._nueva_arista(u, v, par, ancho)
+            else:
+                self.anchos[e] = ancho
+                self.pesos[e] = 1 / ancho
+                self.lct.cambiar_valor(self.nodo_arista[e], 1 / ancho)
+
+        extremos = np.array(self.extremos, dtype=np.int64).reshape(-1, 2)
+        anchos = np.array(self.anchos, dtype=np.float64)
+        # Árbol de mayor ancho de banda = árbol mínimo con pesos 1 / ancho
+        for e in kruskal(extremos[:, 0], extremos[:, 1], anchos, len(self.nombres), maximo=True).tolist():
+            self._agregar_al_arbol(e, *self.extremos[e])
+        self.reconstrucciones += 1
+
+    # Aplica una lectura completa de la red: calcula qué enlaces cambiaron respecto al
+    # estado actual y solo empuja esos cambios; si cambió más de la fracción indicada
+    # reconstruye desde cero. Devuelve el número de cambios detectados
+    def aplicar_datos(self, datos, umbral_reconstruccion=0.25):
+        nuevos = {}
+        for n1, n2, ancho in datos:
+            nuevos[(n1, n2)] = ancho
+
+        cambios = []
+        vistos = set()
+        for (n1, n2), ancho in nuevos.items():
+            u, v = self.indices.get(n1), self.indices.get(n2)
+            e = None if u is None or v is None else self.id_por_par.get(self._par(u, v))
+            if e is not None:
+                vistos.add(e)
+            if e is None or self.anchos[e] != ancho:
+                cambios.append((n1, n2, ancho))
+        for e in self.id_por_par.values():
+            if e not in vistos:
+                u, v = self.extremos[e]
+                cambios.append((self.nombres[u], self.nombres[v], 0))
+
+        if not self.extremos or len(cambios) > umbral_reconstruccion * len(nuevos):
+            self.cargar([(n1, n2, ancho) for (n1, n2), ancho in nuevos.items()])
+        else:
+            for n1, n2, ancho in cambios:
+                self.actualizar_ancho(n1, n2, ancho)
+        return len(cambios)
+
+    # Aristas del árbol como (nodo1, nodo2, ancho de banda)
+    def aristas_arbol(self):
+        return [(self.nombres[self.extremos[e][0]], self.nombres[self.extremos[e][1]], self.anchos[e])
+                for e in range(len(self.extremos)) if self.en_arbol[e]]
+
+    # Aristas activas del grafo completo como (nodo1, nodo2, ancho de banda)
+    def aristas_grafo(self):
+        return [(self.nombres[u], self.nombres[v], self.anchos[e])
+                for (u, v), e in self.id_por_par.items()]
+
+    def peso_total(self):
+        return sum(self.pesos[e] for e in range(len(self.extremos)) if self.en_arbol[e])
+
+
+# Topología sintética conexa con el número de enlaces pedido
+def topologia_aleatoria(num_nodos, num_enlaces, semilla=1):
+    rng = random.Random(semilla)
+    enlaces = {}
+    for i in range(1, num_nodos):
+        enlaces[(rng.randrange(i), i)] = rng.randint(10, 100)
+    while len(enlaces) < num_enlaces:
+        u, v = rng.randrange(num_nodos), rng.randrange(num_nodos)
+        if u != v and (u, v) not in enlaces and (v, u) not in enlaces:
+            enlaces[(u, v)] = rng.randint(10, 100)
+    return [(f"PC{u}", f"PC{v}", ancho) for (u, v), ancho in enlaces.items()]
+
+
+# Compara un ciclo de monitoreo con cambios incrementales contra reconstruir el MST
+# desde cero, en una topología de 100k enlaces, y comprueba que el peso total coincide
+def benchmark(num_nodos=25000, num_enlaces=100000, cambios_por_ciclo=(1, 10, 100, 1000), semilla=3):
+    datos = topologia_aleatoria(num_nodos, num_enlaces, semilla)
+    rng = random.Random(semilla)
+    mst = MSTDinamico()
+    inicio = time.perf_counter()
+    mst.cargar(datos)
+    print(f"Topología: {num_nodos} nodos, {len(datos)} enlaces")
+    print(f"Carga inicial (Kruskal): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    for num_cambios in cambios_por_ciclo:
+        for i in rng.sample(range(len(datos)), num_cambios):
+            n1, n2, _ = datos[i]
+            datos[i] = (n1, n2, rng.randint(10, 100))
+
+        inicio = time.perf_counter()
+        mst.aplicar_datos(datos)
+        tiempo_incremental = time.perf_counter() - inicio
+
+        referencia = MSTDinamico()
+        inicio = time.perf_counter()
+        referencia.cargar(datos)
+        tiempo_completo = time.perf_counter() - inicio
+        assert math.isclose(mst.peso_total(), referencia.peso_total())
+
+        print(f"  {num_cambios:>5} cambios: incremental {tiempo_incremental * 1000:8.1f} ms | "
+              f"reconstrucción {tiempo_completo * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
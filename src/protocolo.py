@@ -0,0 +1,121 @@
+import socket
+import struct
+import zlib
+
+# Protocolo binario con tramas para la transferencia de archivos.
+# Cada trama empieza con una cabecera fija (HEADER) seguida del nombre del archivo
+# (name_len bytes) y, en las tramas FILE, de los size bytes del archivo:
+#
+#   magic (4) | version (1) | tipo (1) | flags (1) | relleno (1) | file_id (4) |
+#   size (8) | offset (8) | total (8) | name_len (2) | crc (4)
+#
+# crc es el CRC32 de la cabecera (con crc = 0) más el nombre, así una cabecera corrupta
+# o desalineada se detecta antes de escribir nada. Como las longitudes van en la cabecera,
+# el servidor nunca lee datos del archivo junto con los metadatos, y una misma conexión
+# puede llevar muchos archivos seguidos (el cliente no espera cada ACK para enviar el siguiente).
+#
+# Para transferencias en paralelo un archivo se parte en rangos de tamaño fijo: el cliente
+# pregunta qué rangos ya tiene el servidor (QUERY/STATUS) y envía el resto como tramas RANGE
+# por varias conexiones; cada rango se confirma con un ACK cuyo file_id es el índice del rango.
+#
+# La compresión se negocia al abrir la sesión: el cliente envía HELLO con los códecs que
+# conoce y el servidor responde con los que también soporta. Después, cada trama FILE indica
+# en flags el códec elegido para ese archivo (0 = sin comprimir); size sigue siendo el tamaño
+# original y los datos van en bloques comprimidos (ver compresion.py).
+#
+# En el HELLO el cliente propone también una suma de verificación (flags) y el servidor
+# responde con la que se usará (la propuesta si la conoce, si no CRC32). Cada FILE o RANGE
+# va seguido de una trama DIGEST con la suma de los datos originales; el servidor la compara
+# con la que calculó al recibir y responde ACK_OK o ACK_CORRUPT, con su propia suma en el nombre.
+
+MAGIC = b"VPNF"
+VERSION = 2
+HEADER = struct.Struct(">4sBBBxIQQQHI")
+
+FRAME_FILE = 1  # cliente -> servidor: un archivo (total = size)
+FRAME_ACK = 2  # servidor -> cliente: confirmación de un archivo o rango (size = bytes recibidos)
+FRAME_END = 3  # cliente -> servidor: fin de la sesión
+FRAME_QUERY = 4  # cliente -> servidor: nombre, total = tamaño del archivo, size = tamaño de rango
+FRAME_STATUS = 5  # servidor -> cliente: el campo nombre lleva el mapa de bits de rangos completos
+FRAME_RANGE = 6  # cliente -> servidor: file_id = índice del rango, offset, size, total y nombre
+FRAME_HELLO = 7  # al abrir la sesión, en ambos sentidos: nombre = códecs de compresión, flags = suma
+FRAME_DIGEST = 8  # cliente -> servidor, tras los datos de un FILE o RANGE: nombre = suma de verificación
+
+ACK_OK = 0
+ACK_ERROR = 1
+ACK_CORRUPT = 2  # llegaron todos los bytes pero la suma de verificación no coincide
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Frame:
+    __slots__ = ("frame_type", "flags", "file_id", "size", "offset", "total", "name")
+
+    def __init__(self, frame_type, flags, file_id, size, offset, total, name):
+        self.frame_type = frame_type
+        self.flags = flags
+        self.file_id = file_id
+        self.size = size
+        self.offset = offset
+        self.total = total
+        self.name = name
+
+
+def pack_frame(frame_type, file_id=0, size=0, name=b"", flags=0, offset=0, total=0):
+    fields = (MAGIC, VERSION, frame_type, flags, file_id, size, offset, total, len(name))
+    crc = zlib.crc32(name, zlib.crc32(HEADER.pack(*fields, 0)))
+    return HEADER.pack(*fields, crc) + name
+
+
+# Lee exactamente n bytes; devuelve b"" si la conexión se cerró antes del primer byte
+def recv_exact(sock, n):
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if not count:
+            if received == 0:
+                return b""
+            raise ConnectionError(f"Conexión cerrada a mitad de trama ({received}/{n} bytes)")
+        received += count
+    return bytes(buffer)
+
+
+# Lee la siguiente trama (sin los datos del archivo); None si la conexión se cerró limpiamente
+def read_frame(sock):
+    raw = recv_exact(sock, HEADER.size)
+    if not raw:
+        return None
+    magic, version, frame_type, flags, file_id, size, offset, total, name_len, crc = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ProtocolError("Trama sin el identificador del protocolo")
+    if version != VERSION:
+        raise ProtocolError(f"Versión de protocolo no soportada: {version}")
+    name = recv_exact(sock, name_len) if name_len else b""
+    if len(name) != name_len:
+        raise ProtocolError("Trama truncada")
+    header = HEADER.pack(magic, version, frame_type, flags, file_id, size, offset, total, name_len, 0)
+    if zlib.crc32(name, zlib.crc32(header)) != crc:
+        raise ProtocolError("Checksum de cabecera inválido")
+    return Frame(frame_type, flags, file_id, size, offset, total, name)
+
+
+# Mapa de bits de rangos completos (bit i = rango i) para las tramas STATUS
+def pack_bitmap(indices, count):
+    bitmap = bytearray((count + 7) // 8)
+    for i in indices:
+        bitmap[i // 8] |= 1 << (i % 8)
+    return bytes(bitmap)
+
+
+def unpack_bitmap(bitmap, count):
+    return {i for i in range(count) if bitmap[i // 8] >> (i % 8) & 1}
+
+
+# Indica si la conexión habla este protocolo (mira los primeros bytes sin consumirlos)
+def is_framed(conn):
+    flags = socket.MSG_PEEK | getattr(socket, "MSG_WAITALL", 0)
+    return conn.recv(len(MAGIC), flags) == MAGIC
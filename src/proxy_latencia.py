@@ -0,0 +1,132 @@
+import os
+import queue
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import contextlib
+import io
+import cliente
+import servidor
+
+# Proxy TCP en proceso que agrega un retardo fijo en cada sentido, para simular un enlace VPN
+# de alta latencia en loopback. Cada sentido admite como máximo `window_bytes` en vuelo (como la
+# ventana de TCP), así una sola conexión queda limitada a ~ventana / RTT igual que en la red real
+class DelayProxy:
+    def __init__(self, target, delay_s=0.025, window_bytes=256 * 1024, listen=("127.0.0.1", 0)):
+        self.target = target
+        self.delay_s = delay_s
+        self.window_bytes = window_bytes
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(listen)
+        self.listener.listen(256)
+        self.address = self.listener.getsockname()
+        self.running = True
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.listener.close()
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(self.target)
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._pipe(client, upstream)
+            self._pipe(upstream, client)
+
+    # Un sentido de la conexión: un hilo lee y encola con su hora de entrega, otro entrega
+    def _pipe(self, source, destination):
+        pending = queue.Queue()
+        credit = threading.Condition()
+        in_flight = [0]
+
+        def reader():
+            while True:
+                with credit:
+                    while in_flight[0] >= self.window_bytes:
+                        credit.wait()
+                try:
+                    data = source.recv(min(64 * 1024, self.window_bytes))
+                except OSError:
+                    data = b""
+                if not data:
+                    pending.put((time.perf_counter() + self.delay_s, None))
+                    return
+                with credit:
+                    in_flight[0] += len(data)
+                pending.put((time.perf_counter() + self.delay_s, data))
+
+        def writer():
+            while True:
+                due, data = pending.get()
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                if data is None:
+                    try:
+                        destination.shutdown(socket.SHUT_WR)
+                    except OSError:
+                        pass
+                    return
+                try:
+                    destination.sendall(data)
+                except OSError:
+                    return
+                with credit:
+                    in_flight[0] -= len(data)
+                    credit.notify()
+
+        threading.Thread(target=reader, daemon=True).start()
+        threading.Thread(target=writer, daemon=True).start()
+
+
+# Compara una sola conexión contra send_file_parallel con N conexiones a través del proxy
+def benchmark(size_mb=32, delay_ms=25, streams=(2, 4, 8)):
+    folder = tempfile.mkdtemp(prefix="proxy_latencia_")
+    original_dir = os.getcwd()
+    os.chdir(folder)
+    try:
+        server = servidor.ConcurrentFileServer("127.0.0.1", 0)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        server.ready.wait()
+        proxy = DelayProxy(("127.0.0.1", server.port), delay_ms / 1000).start()
+        cliente.SERVER_IP, cliente.PORT = proxy.address
+
+        path = os.path.join(folder, "grande.bin")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+
+        print(f"Archivo de {size_mb} MB, RTT simulado de {2 * delay_ms} ms, "
+              f"ventana de {proxy.window_bytes // 1024} KB por conexión")
+        with contextlib.redirect_stdout(io.StringIO()):
+            single = cliente.send_file(path)
+        print(f"  1 conexión:   {single['transfer_time']:6.2f} s  {size_mb / single['transfer_time']:7.2f} MB/s")
+        for count in streams:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = cliente.send_file_parallel(path, streams=count, range_size=1024 * 1024)
+            print(f"  {count} conexiones: {result['transfer_time']:6.2f} s  "
+                  f"{size_mb / result['transfer_time']:7.2f} MB/s")
+
+        proxy.stop()
+        server.shutdown()
+        server_thread.join()
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 32)
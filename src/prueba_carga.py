@@ -0,0 +1,59 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cliente
+import servidor
+from estadisticas import percentil
+
+# Prueba de carga: levanta el servidor concurrente en loopback y lanza subidas en paralelo
+# con cliente.send_file; informa el rendimiento agregado y los tiempos de finalización
+def load_test(num_clients=200, file_size_kb=256, max_workers=servidor.MAX_WORKERS):
+    carpeta = tempfile.mkdtemp(prefix="prueba_carga_")
+    directorio_original = os.getcwd()
+    os.chdir(carpeta)  # el servidor escribe en ./recibidos
+    try:
+        server = servidor.ConcurrentFileServer("127.0.0.1", 0, max_workers=max_workers)
+        hilo_servidor = threading.Thread(target=server.serve_forever, daemon=True)
+        hilo_servidor.start()
+        server.ready.wait()
+        cliente.SERVER_IP = "127.0.0.1"
+        cliente.PORT = server.port
+
+        rutas = []
+        for i in range(num_clients):
+            ruta = os.path.join(carpeta, f"archivo_{i}.bin")
+            with open(ruta, "wb") as f:
+                f.write(os.urandom(file_size_kb * 1024))
+            rutas.append(ruta)
+
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=num_clients) as executor:
+                resultados = list(executor.map(cliente.send_file, rutas))
+        tiempo_total = time.perf_counter() - inicio
+
+        server.shutdown()
+        hilo_servidor.join()
+    finally:
+        os.chdir(directorio_original)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    exitosos = [r for r in resultados if r["status"] == "success"]
+    tiempos = sorted(r["transfer_time"] for r in exitosos)
+    total_mb = sum(r["file_size"] for r in exitosos) / (1024 * 1024)
+    print(f"Subidas: {len(exitosos)}/{num_clients} exitosas de {file_size_kb} KB cada una")
+    print(f"Tiempo total: {tiempo_total:.2f} s")
+    print(f"Rendimiento agregado: {total_mb / tiempo_total:.2f} MB/s")
+    print(f"Tiempo de finalización p50: {percentil(tiempos, 50) * 1000:.1f} ms | "
+          f"p99: {percentil(tiempos, 99) * 1000:.1f} ms | máx: {tiempos[-1] * 1000 if tiempos else 0:.1f} ms")
+    return resultados
+
+if __name__ == "__main__":
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    load_test(num_clients)
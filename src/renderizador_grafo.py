@@ -0,0 +1,231 @@
+import glob
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from datetime import datetime
+
+import networkx as nx
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+# Renderizador de la topología y su MST para el monitor de red. Mantiene una sola figura entre
+# ciclos:
+#  - la disposición de los nodos (spring_layout) se calcula una vez y se reutiliza mientras el
+#    conjunto de nodos no cambie; si cambia, se parte de las posiciones anteriores
+#  - los nodos, sus nombres y los segmentos de las aristas se crean una sola vez; en cada ciclo
+#    solo se cambian los colores de las aristas y el texto de las etiquetas
+#  - con muchos nodos se usa el modo rápido: sin nombres ni etiquetas de ancho de banda
+#  - de los archivos con marca de tiempo solo se conservan los max_archivos más recientes
+
+UMBRAL_ETIQUETAS = 60  # nodos a partir de los cuales se dibuja sin etiquetas
+MAX_ARCHIVOS = 20  # imágenes que se conservan en disco
+COLOR_ARISTA = (0.5, 0.5, 0.5, 1.0)  # gray
+COLOR_MST = (0.0, 0.0, 1.0, 1.0)  # blue
+TRANSPARENTE = (0.0, 0.0, 0.0, 0.0)
+CAJA_ETIQUETA = dict(boxstyle="round", ec=(1.0, 1.0, 1.0), fc=(1.0, 1.0, 1.0))
+
+
+class RenderizadorGrafo:
+    def __init__(self, directorio=".", prefijo="network_plot", max_archivos=MAX_ARCHIVOS,
+                 umbral_etiquetas=UMBRAL_ETIQUETAS, rapido=None):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.max_archivos = max_archivos
+        self.umbral_etiquetas = umbral_etiquetas
+        self.rapido = rapido  # None: se decide según la cantidad de nodos
+        self.figura = Figure(figsize=(10, 3))
+        FigureCanvasAgg(self.figura)
+        self.ejes = self.figura.subplots(1, 2)
+        self.nodos = None
+        self.pos = None
+        self.sin_etiquetas = False
+        self.aristas = None
+        self.lineas = []
+        self.etiquetas = ([], [])
+        # Imágenes ya escritas (incluidas las de ejecuciones anteriores), de la más vieja a la más nueva
+        patron = os.path.join(directorio, glob.escape(prefijo) + "_*.png")
+        self.archivos = deque(sorted(glob.glob(patron)))
+        self.disposiciones = 0  # veces que se calculó spring_layout
+
+    # Dibuja el grafo y su MST y guarda la imagen. Sin ruta se usa un nombre con marca de tiempo
+    # y se borran las imágenes más viejas; devuelve la ruta escrita
+    def guardar(self, G, mst, ruta=None):
+        self.dibujar(G, mst)
+        if ruta is not None:
+            self.figura.savefig(ruta)
+            return ruta
+
+        marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ruta = os.path.join(self.directorio, f"{self.prefijo}_{marca}.png")
+        self.figura.savefig(ruta)
+        if ruta in self.archivos:
+            self.archivos.remove(ruta)
+        self.archivos.append(ruta)
+        while len(self.archivos) > self.max_archivos:
+            viejo = self.archivos.popleft()
+            try:
+                os.remove(viejo)
+            except FileNotFoundError:
+                pass
+        return ruta
+
+    # Actualiza la figura: solo rehace lo que cambió desde el ciclo anterior
+    def dibujar(self, G, mst):
+        nodos = frozenset(G)
+        if nodos != self.nodos:
+            self._disponer(G, nodos)
+        aristas = tuple(G.edges())
+        if aristas != self.aristas:
+            self._crear_aristas(aristas)
+
+        colores = np.empty((len(aristas), 4))
+        colores[:] = TRANSPARENTE
+        for i, (a, b) in enumerate(aristas):
+            if mst.has_edge(a, b):
+                colores[i] = COLOR_MST
+        self.lineas[1].set_color(colores)
+
+        if self.sin_etiquetas:
+            return
+        etiquetas_grafo, etiquetas_mst = self.etiquetas
+        for i, (a, b, ancho) in enumerate(G.edges(data="bandwidth")):
+            texto = f"{ancho}Mbps"
+            etiquetas_grafo[i].set_text(texto)
+            en_mst = mst.has_edge(a, b)
+            etiquetas_mst[i].set_visible(en_mst)
+            if en_mst:
+                etiquetas_mst[i].set_text(f"{mst[a][b]['bandwidth']}Mbps")
+
+    # Calcula la disposición para un conjunto de nodos nuevo y crea los nodos y sus nombres
+    def _disponer(self, G, nodos):
+        inicial = None
+        if self.pos is not None:
+            inicial = {n: self.pos[n] for n in G if n in self.pos} or None
+        try:
+            self.pos = nx.spring_layout(G, pos=inicial, seed=42)
+        except ImportError:
+            # Desde 500 nodos spring_layout necesita scipy; sin él se usa una disposición circular
+            self.pos = nx.circular_layout(G)
+        self.disposiciones += 1
+        self.nodos = nodos
+        # clear() ya quita las aristas y etiquetas anteriores
+        self.aristas = None
+        self.lineas = []
+        self.etiquetas = ([], [])
+        self.sin_etiquetas = self.rapido if self.rapido is not None else len(nodos) > self.umbral_etiquetas
+
+        orden = list(G)
+        xy = np.array([self.pos[n] for n in orden]).reshape(-1, 2)
+        tamano = 20 if self.sin_etiquetas else 300
+        titulos = ("Topología Original", "Topología Optimizada (Kruskal)")
+        colores = ("lightblue", "lightgreen")
+        for ejes, titulo, color in zip(self.ejes, titulos, colores):
+            ejes.clear()
+            ejes.set_axis_off()
+            ejes.set_title(titulo)
+            ejes.scatter(xy[:, 0], xy[:, 1], s=tamano, c=color, zorder=2)
+            if not self.sin_etiquetas:
+                for n, (x, y) in zip(orden, xy):
+                    ejes.text(x, y, str(n), fontsize=12, ha="center", va="center", zorder=3)
+            if len(xy):
+                ejes.update_datalim(xy)
+                ejes.autoscale_view()
+                ejes.margins(0.1)
+        self.figura.tight_layout()
+
+    # Crea los segmentos de las aristas (y sus etiquetas) cuando cambia el conjunto de enlaces
+    def _crear_aristas(self, aristas):
+        for coleccion in self.lineas:
+            coleccion.remove()
+        for textos in self.etiquetas:
+            for texto in textos:
+                texto.remove()
+
+        segmentos = np.array([(self.pos[a], self.pos[b]) for a, b in aristas]).reshape(-1, 2, 2)
+        ancho_linea = 0.5 if self.sin_etiquetas else 1.0
+        self.lineas = []
+        for ejes, color in zip(self.ejes, (COLOR_ARISTA, TRANSPARENTE)):
+            coleccion = LineCollection(segmentos, colors=[color], linewidths=ancho_linea, zorder=1)
+            ejes.add_collection(coleccion)
+            self.lineas.append(coleccion)
+
+        self.etiquetas = ([], [])
+        if not self.sin_etiquetas:
+            medios = segmentos.mean(axis=1)
+            for ejes, textos in zip(self.ejes, self.etiquetas):
+                for x, y in medios:
+                    textos.append(ejes.text(x, y, "", fontsize=10, ha="center", va="center",
+                                            bbox=CAJA_ETIQUETA, zorder=3))
+        self.aristas = aristas
+
+
+# Versión anterior (una figura y un spring_layout nuevos en cada ciclo), solo como referencia
+def _guardar_sin_cache(G, mst, ruta):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 3))
+    plt.subplot(1, 2, 1)
+    pos = nx.spring_layout(G, seed=42)
+    nx.draw(G, pos, with_labels=True, node_color='lightblue', edge_color='gray')
+    nx.draw_networkx_edge_labels(G, pos, edge_labels={(u, v): f'{d["bandwidth"]}Mbps' for u, v, d in G.edges(data=True)})
+    plt.title("Topología Original")
+    plt.subplot(1, 2, 2)
+    nx.draw(mst, pos, with_labels=True, node_color='lightgreen', edge_color='blue')
+    nx.draw_networkx_edge_labels(mst, pos, edge_labels={(u, v): f'{d["bandwidth"]}Mbps' for u, v, d in mst.edges(data=True)})
+    plt.title("Topología Optimizada (Kruskal)")
+    plt.tight_layout()
+    plt.savefig(ruta)
+    plt.close()
+
+
+# Grafo aleatorio conexo con anchos de 10 a 100 Mbps y su árbol de mayor ancho de banda
+def _grafo_aleatorio(num_nodos, grado, generador):
+    G = nx.connected_watts_strogatz_graph(num_nodos, grado, 0.3, seed=generador.randrange(2 ** 32))
+    for a, b in G.edges():
+        G[a][b]["bandwidth"] = generador.randint(10, 100)
+    return G, nx.maximum_spanning_tree(G, weight="bandwidth")
+
+
+# Tiempo por ciclo del renderizador frente a la versión anterior, cambiando los anchos en cada ciclo
+def benchmark(tamanos=((8, 4), (50, 4), (400, 4), (5000, 4)), ciclos=10, semilla=1):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    generador = random.Random(semilla)
+    print(f"{'Nodos':>6} {'Aristas':>8} {'Antes (s/ciclo)':>16} {'Ahora (s/ciclo)':>16} "
+          f"{'Primer ciclo (s)':>17} {'Archivos':>9}")
+    for num_nodos, grado in tamanos:
+        G, mst = _grafo_aleatorio(num_nodos, grado, generador)
+        with tempfile.TemporaryDirectory() as directorio:
+            referencia = min(ciclos, 3)
+            inicio = time.perf_counter()
+            try:
+                for i in range(referencia):
+                    _guardar_sin_cache(G, mst, os.path.join(directorio, f"antes_{i}.png"))
+                antes = f"{(time.perf_counter() - inicio) / referencia:16.3f}"
+            except ImportError:
+                antes = f"{'(sin scipy)':>16}"
+
+            renderizador = RenderizadorGrafo(directorio, max_archivos=5)
+            inicio = time.perf_counter()
+            renderizador.guardar(G, mst, os.path.join(directorio, "primero.png"))
+            primero = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            for i in range(ciclos):
+                for a, b in G.edges():
+                    G[a][b]["bandwidth"] = generador.randint(10, 100)
+                mst = nx.maximum_spanning_tree(G, weight="bandwidth")
+                renderizador.guardar(G, mst)
+            ahora = (time.perf_counter() - inicio) / ciclos
+            assert renderizador.disposiciones == 1
+            archivos = len(glob.glob(os.path.join(directorio, renderizador.prefijo + "_*.png")))
+            assert archivos <= renderizador.max_archivos
+        print(f"{num_nodos:>6} {G.number_of_edges():>8} {antes} {ahora:16.3f} {primero:17.3f} {archivos:>9}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,292 @@
+import heapq
+import math
+import random
+import sys
+import time
+from array import array
+from motor_rutas import GrafoCSR, grafo_aleatorio, dijkstra, reconstruir_ruta
+
+# Rutas que tienen en cuenta el ancho de banda además de la latencia.
+#  - ruta más ancha: maximiza el ancho de banda del enlace más lento (el cuello de botella)
+#  - ruta más rápida para un archivo: minimiza latencia + tamaño / cuello de botella, que es
+#    el tiempo esperado de transferencia. Este costo no cumple el principio de subestructura
+#    óptima (una ruta más lenta hasta un nodo intermedio puede ser más ancha), así que cada
+#    nodo guarda un frente de etiquetas (latencia, cuello) no dominadas: una etiqueta se
+#    descarta si otra llega con menos o igual latencia y más o igual ancho. Las etiquetas se
+#    sacan del montículo por tiempo estimado, que nunca baja al extender la ruta, así que la
+#    primera etiqueta del destino que sale del montículo es la óptima.
+# Latencias en ms, anchos de banda en Mbps, tamaños en bytes y tiempos en segundos.
+
+ANCHO_POR_DEFECTO = 100.0  # Mbps para enlaces sin ancho de banda conocido
+
+
+# Grafo CSR con un segundo arreglo de pesos: el ancho de banda de cada arista
+class GrafoRed(GrafoCSR):
+    def __init__(self, nombres, offsets, vecinos, pesos, anchos):
+        super().__init__(nombres, offsets, vecinos, pesos)
+        self.anchos = anchos  # array('d') de tamaño E, en Mbps
+
+    # A partir del diccionario de latencias de VPNFileTransferApp y otro igual con los anchos
+    @classmethod
+    def desde_diccionarios(cls, latencias, anchos, ancho_por_defecto=ANCHO_POR_DEFECTO):
+        base = GrafoCSR.desde_diccionario(latencias)
+        arreglo = array('d')
+        for nombre in base.nombres:
+            anchos_nodo = anchos.get(nombre, {})
+            for vecino in latencias.get(nombre, {}):
+                arreglo.append(anchos_nodo.get(vecino, ancho_por_defecto))
+        return cls(base.nombres, base.offsets, base.vecinos, base.pesos, arreglo)
+
+    # A partir de enlaces no dirigidos (n1, n2, ancho) como los de automatizacionv2.py, con
+    # latencia opcional como cuarto elemento
+    @classmethod
+    def desde_enlaces(cls, enlaces, latencia_por_defecto=1.0):
+        latencias = {}
+        anchos = {}
+        for enlace in enlaces:
+            n1, n2, ancho = enlace[:3]
+            latencia = enlace[3] if len(enlace) > 3 else latencia_por_defecto
+            for a, b in ((n1, n2), (n2, n1)):
+                latencias.setdefault(a, {})[b] = latencia
+                anchos.setdefault(a, {})[b] = ancho
+        return cls.desde_diccionarios(latencias, anchos)
+
+
+# Ruta de máximo cuello de botella desde origen (Dijkstra con montículo de máximos).
+# Devuelve (cuellos, latencias, predecesores); a igual cuello se prefiere la que llega con
+# menos latencia al sacarla del montículo
+def ruta_mas_ancha(grafo, origen, destino=None):
+    n = grafo.num_nodos()
+    offsets, vecinos, pesos, anchos = grafo.offsets, grafo.vecinos, grafo.pesos, grafo.anchos
+    cuellos = array('d', [0.0]) * n
+    latencias = array('d', [math.inf]) * n
+    predecesores = array('q', [-1]) * n
+    visitados = bytearray(n)
+
+    cuellos[origen] = math.inf
+    latencias[origen] = 0.0
+    monticulo = [(-math.inf, 0.0, origen)]
+    while monticulo:
+        menos_cuello, latencia, nodo = heapq.heappop(monticulo)
+        if visitados[nodo]:
+            continue
+        visitados[nodo] = 1
+        if nodo == destino:
+            break
+        cuello = -menos_cuello
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            if pesos[k] == math.inf or anchos[k] <= 0:
+                continue  # enlace eliminado o caído
+            vecino = vecinos[k]
+            nuevo = min(cuello, anchos[k])
+            nueva_latencia = latencia + pesos[k]
+            if nuevo > cuellos[vecino] or (nuevo == cuellos[vecino] and nueva_latencia < latencias[vecino]):
+                cuellos[vecino] = nuevo
+                latencias[vecino] = nueva_latencia
+                predecesores[vecino] = nodo
+                heapq.heappush(monticulo, (-nuevo, nueva_latencia, vecino))
+    return cuellos, latencias, predecesores
+
+
+# Ruta de menor tiempo esperado para enviar tamano_bytes de origen a destino.
+# Devuelve (tiempo_s, latencia_ms, cuello_mbps, [índices]) o (inf, inf, 0.0, []) si no hay ruta
+def ruta_tiempo_minimo(grafo, origen, destino, tamano_bytes):
+    offsets, vecinos, pesos, anchos = grafo.offsets, grafo.vecinos, grafo.pesos, grafo.anchos
+    megabits = tamano_bytes * 8 / 1e6
+
+    # Etiquetas en listas paralelas: nodo, latencia acumulada, cuello, etiqueta anterior y si sigue viva
+    etiqueta_nodo = [origen]
+    etiqueta_latencia = [0.0]
+    etiqueta_cuello = [math.inf]
+    etiqueta_padre = [-1]
+    etiqueta_viva = bytearray(b"\x01")
+    frentes = {origen: [0]}  # nodo -> etiquetas no dominadas
+
+    monticulo = [(0.0, 0)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while monticulo:
+        tiempo, e = heappop(monticulo)
+        if not etiqueta_viva[e]:
+            continue
+        nodo = etiqueta_nodo[e]
+        latencia = etiqueta_latencia[e]
+        cuello = etiqueta_cuello[e]
+        if nodo == destino:
+            ruta = []
+            while e != -1:
+                ruta.append(etiqueta_nodo[e])
+                e = etiqueta_padre[e]
+            ruta.reverse()
+            return tiempo, latencia, cuello, ruta
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            if pesos[k] == math.inf or anchos[k] <= 0:
+                continue
+            vecino = vecinos[k]
+            nueva_latencia = latencia + pesos[k]
+            nuevo_cuello = anchos[k] if anchos[k] < cuello else cuello
+
+            frente = frentes.get(vecino)
+            if frente is not None:
+                dominada = False
+                for j in frente:
+                    if etiqueta_latencia[j] <= nueva_latencia and etiqueta_cuello[j] >= nuevo_cuello:
+                        dominada = True
+                        break
+                if dominada:
+                    continue
+                # La nueva etiqueta puede dejar obsoletas otras del mismo nodo
+                conservadas = []
+                for j in frente:
+                    if nueva_latencia <= etiqueta_latencia[j] and nuevo_cuello >= etiqueta_cuello[j]:
+                        etiqueta_viva[j] = 0
+                    else:
+                        conservadas.append(j)
+                frente = frentes[vecino] = conservadas
+            else:
+                frente = frentes[vecino] = []
+
+            nueva = len(etiqueta_nodo)
+            etiqueta_nodo.append(vecino)
+            etiqueta_latencia.append(nueva_latencia)
+            etiqueta_cuello.append(nuevo_cuello)
+            etiqueta_padre.append(e)
+            etiqueta_viva.append(1)
+            frente.append(nueva)
+            heappush(monticulo, (nueva_latencia / 1000 + megabits / nuevo_cuello, nueva))
+    return math.inf, math.inf, 0.0, []
+
+
+# Todas las rutas de origen a destino que no están dominadas en (latencia, cuello):
+# [(latencia_ms, cuello_mbps, [índices])] de menor a mayor latencia (y de menor a mayor ancho).
+# La ruta más rápida para cualquier tamaño está en este frente, así que basta calcularlo una
+# vez por destino y elegir con tiempo_esperado (ver mejor_del_frente). Las etiquetas salen
+# del montículo por latencia, así que una etiqueta es no dominada si y solo si su cuello supera
+# al de todas las que ya salieron en su nodo
+def frente_pareto(grafo, origen, destino):
+    return _frentes(grafo, origen, destino).get(destino, [])
+
+
+# Frentes de Pareto de origen a todos los nodos en una sola búsqueda: {nodo: frente}
+def frentes_desde(grafo, origen):
+    return _frentes(grafo, origen, -1)
+
+
+# Búsqueda de etiquetas de frente_pareto; con destino = -1 no se detiene ni poda por destino
+def _frentes(grafo, origen, destino):
+    offsets, vecinos, pesos, anchos = grafo.offsets, grafo.vecinos, grafo.pesos, grafo.anchos
+    n = grafo.num_nodos()
+    # Mayor cuello entre las etiquetas definitivas de cada nodo; la posición extra es la que
+    # se consulta con destino = -1 y se queda siempre en -1
+    mejor_cuello = array('d', [-1.0]) * (n + 1)
+    tope = max((anchos[k] for k in range(offsets[origen], offsets[origen + 1])), default=0.0)
+    etiqueta_nodo = [origen]
+    etiqueta_padre = [-1]
+    etiqueta_ruta = {}  # etiqueta definitiva -> ruta, para no recorrer la misma cadena muchas veces
+    frentes = {}
+    monticulo = [(0.0, -math.inf, 0)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while monticulo:
+        latencia, menos_cuello, e = heappop(monticulo)
+        nodo = etiqueta_nodo[e]
+        cuello = -menos_cuello
+        if cuello <= mejor_cuello[nodo]:
+            continue
+        mejor_cuello[nodo] = cuello
+        padre = etiqueta_padre[e]
+        ruta = etiqueta_ruta[e] = (etiqueta_ruta[padre] if padre != -1 else []) + [nodo]
+        frentes.setdefault(nodo, []).append((latencia, cuello, ruta))
+        if nodo == destino:
+            if cuello >= tope:
+                break  # ninguna ruta puede ser más ancha que el enlace más ancho del origen
+            continue
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            if pesos[k] == math.inf or anchos[k] <= 0:
+                continue
+            vecino = vecinos[k]
+            nuevo_cuello = anchos[k] if anchos[k] < cuello else cuello
+            # Con más latencia y menos ancho que lo ya conseguido en el vecino o en el destino no sirve
+            if nuevo_cuello <= mejor_cuello[vecino] or nuevo_cuello <= mejor_cuello[destino]:
+                continue
+            etiqueta_nodo.append(vecino)
+            etiqueta_padre.append(e)
+            heappush(monticulo, (latencia + pesos[k], -nuevo_cuello, len(etiqueta_nodo) - 1))
+    return frentes
+
+
+# Ruta del frente con menor tiempo esperado para tamano_bytes:
+# (tiempo_s, latencia_ms, cuello_mbps, [índices]) o (inf, inf, 0.0, []) si el frente está vacío
+def mejor_del_frente(frente, tamano_bytes):
+    mejor = (math.inf, math.inf, 0.0, [])
+    for latencia, cuello, ruta in frente:
+        tiempo = tiempo_esperado(latencia, cuello, tamano_bytes)
+        if tiempo < mejor[0]:
+            mejor = (tiempo, latencia, cuello, ruta)
+    return mejor
+
+
+# Ruta más ancha por nombre: (cuello_mbps, latencia_ms, [nodos]) o (0.0, inf, []) si no hay ruta
+def ruta_ancha(grafo, nodo_inicio, nodo_destino):
+    if nodo_inicio not in grafo.indices or nodo_destino not in grafo.indices:
+        return 0.0, math.inf, []
+    origen = grafo.indices[nodo_inicio]
+    destino = grafo.indices[nodo_destino]
+    cuellos, latencias, predecesores = ruta_mas_ancha(grafo, origen, destino)
+    if latencias[destino] == math.inf:
+        return 0.0, math.inf, []
+    ruta = reconstruir_ruta(predecesores, origen, destino)
+    return cuellos[destino], latencias[destino], [grafo.nombres[i] for i in ruta]
+
+
+# Ruta más rápida por nombre para un archivo de tamano_bytes:
+# (tiempo_s, latencia_ms, cuello_mbps, [nodos]) o (inf, inf, 0.0, []) si no hay ruta
+def ruta_rapida(grafo, nodo_inicio, nodo_destino, tamano_bytes):
+    if nodo_inicio not in grafo.indices or nodo_destino not in grafo.indices:
+        return math.inf, math.inf, 0.0, []
+    tiempo, latencia, cuello, ruta = ruta_tiempo_minimo(
+        grafo, grafo.indices[nodo_inicio], grafo.indices[nodo_destino], tamano_bytes)
+    return tiempo, latencia, cuello, [grafo.nombres[i] for i in ruta]
+
+
+# Tiempo esperado de una ruta concreta (p. ej. el enlace directo) con el mismo modelo
+def tiempo_esperado(latencia_ms, cuello_mbps, tamano_bytes):
+    if cuello_mbps <= 0 or latencia_ms == math.inf:
+        return math.inf
+    return latencia_ms / 1000 + tamano_bytes * 8 / 1e6 / cuello_mbps
+
+
+# Grafo aleatorio con latencias (ms) y anchos de banda enteros entre 10 y 1000 Mbps
+def grafo_red_aleatorio(num_nodos, grado=4, semilla=42):
+    latencias = grafo_aleatorio(num_nodos, grado, semilla)
+    rnd = random.Random(semilla + 1)
+    anchos = {}
+    for u in latencias:
+        for v in latencias[u]:
+            ancho = anchos.get(v, {}).get(u) or rnd.choice((10, 50, 100, 200, 500, 1000))
+            anchos.setdefault(u, {})[v] = ancho
+    return GrafoRed.desde_diccionarios(latencias, anchos)
+
+
+# Consultas por segundo de cada objetivo sobre grafos grandes (menos consultas cuanto más grande)
+def benchmark(tamanos=(1000, 10000, 100000)):
+    for num_nodos in tamanos:
+        consultas = min(200, max(20, 2000000 // num_nodos))
+        grafo = grafo_red_aleatorio(num_nodos)
+        rnd = random.Random(7)
+        pares = [(rnd.randrange(num_nodos), rnd.randrange(num_nodos)) for _ in range(consultas)]
+        objetivos = {
+            "latencia (Dijkstra)": lambda o, d: dijkstra(grafo, o, d),
+            "más ancha": lambda o, d: ruta_mas_ancha(grafo, o, d),
+            "tiempo 1 MB": lambda o, d: ruta_tiempo_minimo(grafo, o, d, 1024 ** 2),
+            "tiempo 1 GB": lambda o, d: ruta_tiempo_minimo(grafo, o, d, 1024 ** 3),
+        }
+        print(f"\n{num_nodos} nodos, {grafo.num_aristas()} aristas:")
+        for nombre, consulta in objetivos.items():
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                consulta(origen, destino)
+            transcurrido = time.perf_counter() - inicio
+            print(f"  {nombre:<22} {consultas / transcurrido:10.1f} consultas/s")
+
+
+if __name__ == "__main__":
+    benchmark(tuple(int(n) for n in sys.argv[1:]) or (1000, 10000, 100000))
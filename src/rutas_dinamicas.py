@@ -0,0 +1,164 @@
+import heapq
+import math
+import random
+import time
+from bisect import bisect_right
+from motor_rutas import GrafoCSR, dijkstra, grafo_aleatorio
+
+# Rutas más cortas dinámicas (estilo Ramalingam–Reps): cuando cambia el peso de una arista
+# se repara solo la parte afectada del árbol de rutas en lugar de repetir Dijkstra completo.
+# Las funciones trabajan sobre los arreglos de un árbol ya calculado (distancias y
+# predecesores) y sobre el GrafoCSR, cuyo peso ya debe tener el valor nuevo.
+
+
+# Propaga con un montículo las mejoras de distancia a partir de los nodos iniciales
+def _propagar(grafo, distancias, predecesores, monticulo):
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    while monticulo:
+        distancia, nodo = heapq.heappop(monticulo)
+        if distancia > distancias[nodo]:
+            continue
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            vecino = vecinos[k]
+            nueva = distancia + pesos[k]
+            if nueva < distancias[vecino]:
+                distancias[vecino] = nueva
+                predecesores[vecino] = nodo
+                heapq.heappush(monticulo, (nueva, vecino))
+
+
+# Disminución de peso o inserción de la arista u -> v
+# Solo se recorren los nodos cuya distancia mejora gracias a la arista
+def reparar_disminucion(grafo, distancias, predecesores, u, v, peso):
+    nueva = distancias[u] + peso
+    if nueva >= distancias[v]:
+        return False
+    distancias[v] = nueva
+    predecesores[v] = u
+    _propagar(grafo, distancias, predecesores, [(nueva, v)])
+    return True
+
+
+# Aumento de peso o eliminación de la arista u -> v
+# Si la arista pertenece al árbol, el subárbol que cuelga de v pierde sus distancias y
+# cada nodo se reconecta con la mejor arista de entrada desde fuera del subárbol
+def reparar_aumento(grafo, distancias, predecesores, u, v):
+    if predecesores[v] != u:
+        return 0
+    offsets, vecinos = grafo.offsets, grafo.vecinos
+
+    # Subárbol de v: los hijos de x son los vecinos y con predecesores[y] == x
+    afectados = [v]
+    marcados = {v}
+    i = 0
+    while i < len(afectados):
+        x = afectados[i]
+        i += 1
+        for k in range(offsets[x], offsets[x + 1]):
+            y = vecinos[k]
+            if predecesores[y] == x and y not in marcados:
+                marcados.add(y)
+                afectados.append(y)
+
+    for x in afectados:
+        distancias[x] = math.inf
+        predecesores[x] = -1
+
+    # Mejor distancia provisional de cada nodo afectado usando sus aristas de entrada
+    offsets_entrada, origenes, posiciones = grafo.entrantes()
+    pesos = grafo.pesos
+    monticulo = []
+    for x in afectados:
+        mejor = math.inf
+        mejor_origen = -1
+        for k in range(offsets_entrada[x], offsets_entrada[x + 1]):
+            y = origenes[k]
+            candidata = distancias[y] + pesos[posiciones[k]]
+            if candidata < mejor:
+                mejor = candidata
+                mejor_origen = y
+        if mejor < math.inf:
+            distancias[x] = mejor
+            predecesores[x] = mejor_origen
+            monticulo.append((mejor, x))
+    heapq.heapify(monticulo)
+    _propagar(grafo, distancias, predecesores, monticulo)
+    return len(afectados)
+
+
+# Aplica un cambio de peso de u -> v (math.inf como peso anterior = inserción,
+# math.inf como peso nuevo = eliminación) y devuelve si el árbol cambió
+def reparar_arbol(grafo, distancias, predecesores, u, v, peso_anterior, peso_nuevo):
+    if distancias[u] == math.inf:
+        return False  # u no es alcanzable, el cambio no afecta a este árbol
+    if peso_nuevo < peso_anterior:
+        return reparar_disminucion(grafo, distancias, predecesores, u, v, peso_nuevo)
+    if peso_nuevo > peso_anterior:
+        return reparar_aumento(grafo, distancias, predecesores, u, v) > 0
+    return False
+
+
+# Mide el costo por actualización de la reparación contra recalcular Dijkstra completo
+# en una malla sintética grande, y comprueba que ambas dan las mismas distancias
+def benchmark(num_nodos=100000, grado=4, actualizaciones=200, recalculos=5, semilla=7):
+    grafo = GrafoCSR.desde_diccionario(grafo_aleatorio(num_nodos, grado, semilla))
+    grafo.entrantes()
+    origen = 0
+    distancias, predecesores = dijkstra(grafo, origen)
+    rng = random.Random(semilla)
+
+    tiempos = {'aumento': [], 'disminucion': [], 'eliminacion': [], 'insercion': []}
+    for _ in range(actualizaciones):
+        tipo = rng.choice(list(tiempos))
+        if tipo == 'insercion':
+            # Inserción modelada como una arista existente que se retira (sin medir) y vuelve a entrar
+            k = rng.randrange(grafo.num_aristas())
+            u = bisect_right(grafo.offsets, k) - 1
+            peso_retirado, grafo.pesos[k] = grafo.pesos[k], math.inf
+            reparar_arbol(grafo, distancias, predecesores, u, grafo.vecinos[k], peso_retirado, math.inf)
+            peso_anterior, peso_nuevo = math.inf, rng.uniform(1.0, 50.0)
+        elif tipo == 'disminucion':
+            k = rng.randrange(grafo.num_aristas())
+            peso_anterior = grafo.pesos[k]
+        else:
+            # Aumentos y eliminaciones sobre aristas del árbol, que son las que obligan a reparar
+            x = rng.randrange(num_nodos)
+            if predecesores[x] == -1:
+                continue
+            k = grafo.posicion_arista(predecesores[x], x)
+            peso_anterior = grafo.pesos[k]
+        if tipo == 'aumento':
+            peso_nuevo = peso_anterior * rng.uniform(1.5, 5.0)
+        elif tipo == 'disminucion':
+            peso_nuevo = peso_anterior * rng.uniform(0.1, 0.7)
+        elif tipo == 'eliminacion':
+            peso_nuevo = math.inf
+        if peso_anterior == peso_nuevo:
+            continue
+        u = bisect_right(grafo.offsets, k) - 1
+        v = grafo.vecinos[k]
+        grafo.pesos[k] = peso_nuevo
+
+        inicio = time.perf_counter()
+        reparar_arbol(grafo, distancias, predecesores, u, v, peso_anterior, peso_nuevo)
+        tiempos[tipo].append(time.perf_counter() - inicio)
+
+    tiempos_completo = []
+    for _ in range(recalculos):
+        inicio = time.perf_counter()
+        referencia, _ = dijkstra(grafo, origen)
+        tiempos_completo.append(time.perf_counter() - inicio)
+    assert all(a == b or math.isclose(a, b) for a, b in zip(distancias, referencia))
+
+    completo_ms = sum(tiempos_completo) / len(tiempos_completo) * 1000
+    print(f"Malla de {num_nodos} nodos y {grafo.num_aristas()} aristas")
+    print(f"Dijkstra completo: {completo_ms:.2f} ms por actualización")
+    for tipo, muestras in tiempos.items():
+        if muestras:
+            promedio_ms = sum(muestras) / len(muestras) * 1000
+            print(f"  {tipo:<12} {len(muestras):>4} eventos  {promedio_ms:8.3f} ms  "
+                  f"({completo_ms / max(promedio_ms, 1e-6):.0f}x más rápido)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,208 @@
+import heapq
+import math
+import random
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from motor_rutas import dijkstra
+from rutas_ancho import grafo_red_aleatorio, tiempo_esperado
+
+# K rutas más cortas (algoritmo de Yen) y planificador de reparto de un archivo grande entre
+# varias rutas a la vez.
+#
+# Yen parte de la ruta más corta y, para cada nodo de la última ruta aceptada, busca una
+# "ruta desviada": mismo prefijo hasta ese nodo y un tramo nuevo que evita las aristas que
+# ya usan las rutas aceptadas con ese prefijo. Las búsquedas de los tramos son A* con la
+# distancia exacta hasta el destino en el grafo sin restricciones como heurística (se
+# calcula una vez por consulta con Dijkstra sobre el grafo inverso), así cada tramo explora
+# poco más que la propia ruta en lugar de medio grafo.
+
+MAX_RUTAS_CACHE = 256  # pares (origen, destino) guardados en CacheKRutas
+
+
+# Distancia desde cada nodo hasta destino (Dijkstra sobre las aristas de entrada)
+def distancias_hacia(grafo, destino):
+    offsets, origenes, posiciones = grafo.entrantes()
+    pesos = grafo.pesos
+    n = grafo.num_nodos()
+    distancias = array('d', [math.inf]) * n
+    distancias[destino] = 0.0
+    monticulo = [(0.0, destino)]
+    while monticulo:
+        distancia, nodo = heapq.heappop(monticulo)
+        if distancia > distancias[nodo]:
+            continue
+        for j in range(offsets[nodo], offsets[nodo + 1]):
+            origen = origenes[j]
+            nueva = distancia + pesos[posiciones[j]]
+            if nueva < distancias[origen]:
+                distancias[origen] = nueva
+                heapq.heappush(monticulo, (nueva, origen))
+    return distancias
+
+
+# A* de origen a destino sin pasar por nodos_prohibidos ni por las aristas (posiciones del
+# CSR) de aristas_prohibidas. Devuelve (costo, [índices]) o (inf, [])
+def _tramo(grafo, origen, destino, heuristica, nodos_prohibidos, aristas_prohibidas):
+    offsets, vecinos, pesos = grafo.offsets, grafo.vecinos, grafo.pesos
+    distancias = {origen: 0.0}
+    predecesores = {origen: -1}
+    cerrados = set()
+    monticulo = [(heuristica[origen], 0.0, origen)]
+    while monticulo:
+        _, distancia, nodo = heapq.heappop(monticulo)
+        if nodo in cerrados:
+            continue
+        if nodo == destino:
+            ruta = [nodo]
+            while predecesores[nodo] != -1:
+                nodo = predecesores[nodo]
+                ruta.append(nodo)
+            ruta.reverse()
+            return distancia, ruta
+        cerrados.add(nodo)
+        for k in range(offsets[nodo], offsets[nodo + 1]):
+            vecino = vecinos[k]
+            if vecino in nodos_prohibidos or k in aristas_prohibidas or heuristica[vecino] == math.inf:
+                continue
+            nueva = distancia + pesos[k]
+            if nueva < distancias.get(vecino, math.inf):
+                distancias[vecino] = nueva
+                predecesores[vecino] = nodo
+                heapq.heappush(monticulo, (nueva + heuristica[vecino], nueva, vecino))
+    return math.inf, []
+
+
+# Posiciones en el CSR de las aristas consecutivas de una ruta
+def _aristas_ruta(grafo, ruta):
+    return [grafo.posicion_arista(u, v) for u, v in zip(ruta, ruta[1:])]
+
+
+# Hasta k rutas simples de origen a destino en orden de latencia: [(latencia, [índices])]
+def k_rutas_mas_cortas(grafo, origen, destino, k):
+    heuristica = distancias_hacia(grafo, destino)
+    if heuristica[origen] == math.inf or k < 1:
+        return []
+    costo, ruta = _tramo(grafo, origen, destino, heuristica, set(), set())
+    aceptadas = [(costo, ruta)]
+    candidatas = []
+    vistas = {tuple(ruta)}
+    pesos = grafo.pesos
+
+    while len(aceptadas) < k:
+        _, ultima = aceptadas[-1]
+        costo_prefijo = 0.0
+        for i in range(len(ultima) - 1):
+            desvio = ultima[i]
+            prefijo = ultima[:i + 1]
+            aristas_prohibidas = set()
+            for _, ruta in aceptadas:
+                if ruta[:i + 1] == prefijo and len(ruta) > i + 1:
+                    aristas_prohibidas.add(grafo.posicion_arista(ruta[i], ruta[i + 1]))
+            costo_tramo, tramo = _tramo(grafo, desvio, destino, heuristica,
+                                        set(prefijo[:-1]), aristas_prohibidas)
+            if tramo:
+                completa = prefijo[:-1] + tramo
+                if tuple(completa) not in vistas:
+                    vistas.add(tuple(completa))
+                    heapq.heappush(candidatas, (costo_prefijo + costo_tramo, completa))
+            costo_prefijo += pesos[grafo.posicion_arista(ultima[i], ultima[i + 1])]
+        if not candidatas:
+            break
+        aceptadas.append(heapq.heappop(candidatas))
+    return aceptadas
+
+
+# Caché de k rutas por (origen, destino, versión del grafo). Si se piden menos rutas de las
+# que ya hay guardadas se devuelven las primeras sin recalcular
+class CacheKRutas:
+    def __init__(self, max_entradas=MAX_RUTAS_CACHE):
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()  # (origen, destino, versión) -> (k pedido, rutas)
+        self.aciertos = 0
+        self.fallos = 0
+        self.lock = threading.Lock()
+
+    def rutas(self, grafo, version, origen, destino, k):
+        clave = (origen, destino, version)
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            # Si Yen devolvió menos de las pedidas, no hay más rutas: también sirve para k mayores
+            if entrada is not None and (entrada[0] >= k or len(entrada[1]) < entrada[0]):
+                self.entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1][:k]
+            self.fallos += 1
+        rutas = k_rutas_mas_cortas(grafo, origen, destino, k)
+        with self.lock:
+            self.entradas[clave] = (k, rutas)
+            self.entradas.move_to_end(clave)
+            while len(self.entradas) > self.max_entradas:
+                self.entradas.popitem(last=False)
+        return rutas
+
+
+# Reparte tamano_bytes entre las rutas candidatas (sobre un GrafoRed) en proporción al ancho
+# de banda de cada una. Si varias rutas comparten un enlace, su capacidad se divide entre
+# ellas. Se prueba con las 1, 2, ..., n mejores candidatas y se queda el reparto que termina
+# antes. Devuelve {'tiempo_s', 'rutas': [(ruta, latencia_ms, ancho_mbps, bytes)], 'tiempo_una_ruta_s'}
+def planificar_reparto(grafo, rutas, tamano_bytes):
+    if not rutas:
+        return {'tiempo_s': math.inf, 'rutas': [], 'tiempo_una_ruta_s': math.inf}
+    aristas = [_aristas_ruta(grafo, ruta) for _, ruta in rutas]
+    mejor = None
+    for n in range(1, len(rutas) + 1):
+        uso = {}
+        for posiciones in aristas[:n]:
+            for k in posiciones:
+                uso[k] = uso.get(k, 0) + 1
+        anchos = [min((grafo.anchos[k] / uso[k] for k in posiciones), default=math.inf)
+                  for posiciones in aristas[:n]]
+        total = sum(anchos)
+        plan = []
+        tiempo = 0.0
+        for (latencia, ruta), ancho in zip(rutas[:n], anchos):
+            parte = tamano_bytes * ancho / total if total != math.inf else tamano_bytes / n
+            plan.append((ruta, latencia, ancho, parte))
+            tiempo = max(tiempo, tiempo_esperado(latencia, ancho, parte))
+        if n == 1:
+            tiempo_una_ruta = tiempo
+        if mejor is None or tiempo < mejor[0]:
+            mejor = (tiempo, plan)
+    return {'tiempo_s': mejor[0], 'rutas': mejor[1], 'tiempo_una_ruta_s': tiempo_una_ruta}
+
+
+# Latencia de consulta para k = 1..16 en un grafo de 10k nodos, sin caché y con caché
+def benchmark(num_nodos=10000, consultas=20, valores_k=(1, 2, 4, 8, 16)):
+    grafo = grafo_red_aleatorio(num_nodos)
+    rnd = random.Random(3)
+    pares = [(rnd.randrange(num_nodos), rnd.randrange(num_nodos)) for _ in range(consultas)]
+    grafo.entrantes()  # el índice inverso se construye una vez por grafo
+
+    inicio = time.perf_counter()
+    for origen, destino in pares:
+        dijkstra(grafo, origen, destino)
+    referencia = (time.perf_counter() - inicio) / consultas
+    print(f"{num_nodos} nodos, {grafo.num_aristas()} aristas; Dijkstra punto a punto: {1000 * referencia:.1f} ms")
+    print(f"{'k':>4} {'sin caché (ms)':>15} {'con caché (ms)':>15} {'rutas':>6} {'reparto 1 GB (s)':>17} {'una ruta (s)':>13}")
+    for k in valores_k:
+        cache = CacheKRutas()
+        inicio = time.perf_counter()
+        resultados = [cache.rutas(grafo, 0, origen, destino, k) for origen, destino in pares]
+        sin_cache = (time.perf_counter() - inicio) / consultas
+        inicio = time.perf_counter()
+        for origen, destino in pares:
+            cache.rutas(grafo, 0, origen, destino, k)
+        con_cache = (time.perf_counter() - inicio) / consultas
+        planes = [planificar_reparto(grafo, rutas, 1024 ** 3) for rutas in resultados if rutas]
+        promedio_rutas = sum(len(rutas) for rutas in resultados) / consultas
+        reparto = sum(plan['tiempo_s'] for plan in planes) / len(planes)
+        una_ruta = sum(plan['tiempo_una_ruta_s'] for plan in planes) / len(planes)
+        print(f"{k:>4} {1000 * sin_cache:15.1f} {1000 * con_cache:15.4f} {promedio_rutas:6.1f} "
+              f"{reparto:17.2f} {una_ruta:13.2f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -1,17 +1,42 @@
 import socket
 import os
+import sys
+import json
 import logging
+import selectors
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from transferencia import receive_to_file, receive_range, preallocate
+from protocolo import (FRAME_FILE, FRAME_END, FRAME_ACK, FRAME_QUERY, FRAME_STATUS, FRAME_RANGE,
+                       FRAME_HELLO, FRAME_DIGEST, ACK_OK, ACK_ERROR, ACK_CORRUPT, ProtocolError,
+                       pack_frame, read_frame, is_framed, pack_bitmap)
+from compresion import CODEC_NONE, CODEC_NAMES, available_codecs, receive_compressed
+from integridad import CHECKSUM_NONE, CHECKSUM_CRC32, CHECKSUM_NAMES, available_checksums, new_checksum
+from almacen_metricas import AlmacenMetricas
 
 # Configuración
 IP = '0.0.0.0'
 PORT = 5001
-BUFFER_SIZE = 4096  # 4KB
+BUFFER_SIZE = 4096  # 4KB (cabecera y ruta original)
+DATA_BUFFER_SIZE = None  # None = autoajustado según el socket; o un tamaño fijo en bytes
+WRITE_MODE = 'pwrite'  # 'pwrite' (recv_into + os.pwrite) o 'mmap' (recv_into directo al archivo mapeado)
+FAST_PATH = True  # el servidor concurrente usa save_file_fast en lugar de save_file
 LOG_FILE = 'server_log.txt'
+METRICS_FILE = 'server_metrics.bin'  # velocidad y tamaño de cada archivo recibido (ver almacen_metricas.py)
+
+# Configuración del modo concurrente
+MAX_WORKERS = 32  # hilos que reciben archivos a la vez
+MAX_CONNECTIONS = 256  # conexiones en curso + en cola; al llegar al límite se deja de aceptar
+LISTEN_BACKLOG = 1024  # cola del sistema operativo para ráfagas de conexiones
+CONNECTION_TIMEOUT = 60  # segundos sin datos antes de abandonar una conexión
 
 # Configurar logging
 logging.basicConfig(filename=LOG_FILE, level=logging.INFO, 
                    format='%(asctime)s - %(message)s')
+# Las métricas se escriben en lotes desde un hilo de fondo; registrarlas no frena la recepción
+metrics = AlmacenMetricas(METRICS_FILE)
 
 def save_file(conn, address):
     try:
@@ -19,6 +44,7 @@ def save_file(conn, address):
         file_info = conn.recv(BUFFER_SIZE).decode()
         file_name, file_size = file_info.split('<SEPARATOR>')
         file_size = int(file_size)
+        start_time = time.time()
         
         # Crear directorio de recibidos si no existe
         if not os.path.exists('recibidos'):
@@ -35,11 +61,15 @@ def save_file(conn, address):
                     break
                 f.write(data)
                 received += len(data)
+        if received < file_size:
+            logging.error(f"Transferencia incompleta de {file_name} desde {address}: {received}/{file_size} bytes")
+            return False
         
         # Registrar la transferencia
         log_msg = f"Recibido {file_name} de {address} - Tamaño: {file_size/1024:.2f} KB"
         print(log_msg)
         logging.info(log_msg)
+        metrics.registrar_transferencia(address[0], file_size, time.time() - start_time)
         
         return True
         
@@ -47,6 +77,346 @@ def save_file(conn, address):
         logging.error(f"Error con {address}: {str(e)}")
         return False
 
+# Igual que save_file pero sin reservar memoria por chunk: recv_into sobre un buffer
+# reutilizado y escritura con os.pwrite o en un archivo mapeado en memoria
+def save_file_fast(conn, address):
+    try:
+        # Recibir primero el nombre y tamaño del archivo
+        file_info = conn.recv(BUFFER_SIZE).decode()
+        file_name, file_size = file_info.split('<SEPARATOR>')
+        file_size = int(file_size)
+        start_time = time.time()
+
+        os.makedirs('recibidos', exist_ok=True)
+        file_path = os.path.join('recibidos', file_name)
+
+        received = receive_to_file(conn, file_path, file_size, DATA_BUFFER_SIZE, WRITE_MODE)
+        if received < file_size:
+            logging.error(f"Transferencia incompleta de {file_name} desde {address}: {received}/{file_size} bytes")
+            return False
+
+        log_msg = f"Recibido {file_name} de {address} - Tamaño: {file_size/1024:.2f} KB"
+        print(log_msg)
+        logging.info(log_msg)
+        metrics.registrar_transferencia(address[0], file_size, time.time() - start_time)
+
+        return True
+
+    except Exception as e:
+        logging.error(f"Error con {address}: {str(e)}")
+        return False
+
+# Registro de rangos completos de un archivo que llega en paralelo. Se guarda junto al archivo
+# (nombre + '.manifest.json') después de cada rango, así una transferencia interrumpida se
+# reanuda pidiendo solo los rangos que faltan; al completarse el manifiesto se borra.
+class RangeManifest:
+    def __init__(self, file_path, total, range_size):
+        self.file_path = file_path
+        self.manifest_path = file_path + '.manifest.json'
+        self.total = total
+        self.range_size = range_size
+        self.range_count = max(1, -(-total // range_size))
+        self.completed = set()
+        self.checksums = {}  # índice del rango -> suma verificada (hex), para reanudar con garantías
+        self.lock = threading.Lock()
+        self.start_time = time.time()  # para la velocidad de la transferencia en las métricas
+
+        previous = None
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                previous = json.load(f)
+        preallocate(file_path, total)
+        if previous and previous['total'] == total and previous['range_size'] == range_size:
+            self.completed = set(previous['completed'])
+            self.checksums = {int(index): digest for index, digest in previous.get('checksums', {}).items()}
+        else:
+            self._save()
+
+    def is_complete(self):
+        return len(self.completed) == self.range_count
+
+    # Un rango solo es válido si coincide exactamente con la partición del manifiesto
+    def is_valid_range(self, index, offset, size):
+        if not 0 <= index < self.range_count or offset != index * self.range_size:
+            return False
+        return size == min(self.range_size, self.total - offset)
+
+    def mark(self, index, digest=b""):
+        with self.lock:
+            self.completed.add(index)
+            if digest:
+                self.checksums[index] = digest.hex()
+            if self.is_complete():
+                if os.path.exists(self.manifest_path):
+                    os.remove(self.manifest_path)
+            else:
+                self._save()
+
+    def _save(self):
+        temporal = self.manifest_path + '.tmp'
+        with open(temporal, 'w') as f:
+            json.dump({'total': self.total, 'range_size': self.range_size,
+                       'completed': sorted(self.completed), 'checksums': self.checksums}, f)
+        os.replace(temporal, self.manifest_path)
+
+# Manifiestos abiertos, compartidos por todas las conexiones que envían rangos del mismo archivo
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+def get_manifest(file_path, total=None, range_size=None):
+    with _manifests_lock:
+        manifest = _manifests.get(file_path)
+        if manifest is not None and (total is None or (manifest.total, manifest.range_size) == (total, range_size)):
+            return manifest
+        if total is None:
+            # Rango sin QUERY previo en este proceso (p. ej. tras reiniciar el servidor)
+            manifest_path = file_path + '.manifest.json'
+            if not os.path.exists(manifest_path):
+                return None
+            with open(manifest_path) as f:
+                previous = json.load(f)
+            total, range_size = previous['total'], previous['range_size']
+        manifest = RangeManifest(file_path, total, range_size)
+        _manifests[file_path] = manifest
+        return manifest
+
+# Solo el nombre base, para que el cliente no pueda escribir fuera de 'recibidos'
+def received_path(name):
+    os.makedirs('recibidos', exist_ok=True)
+    return os.path.join('recibidos', os.path.basename(name.decode()))
+
+# Lee la trama DIGEST que sigue a los datos y la compara con la suma calculada al recibir.
+# Devuelve (coincide, suma del servidor); sin suma negociada no hay trama que leer
+def verify_digest(conn, frame, checksum):
+    if checksum is None:
+        return True, b""
+    digest_frame = read_frame(conn)
+    if digest_frame is None or digest_frame.frame_type != FRAME_DIGEST or digest_frame.file_id != frame.file_id:
+        raise ProtocolError("Se esperaba la suma de verificación de los datos")
+    digest = checksum.digest()
+    return digest == digest_frame.name, digest
+
+# Rango de un archivo en paralelo: se escribe en su posición dentro del archivo reservado y
+# solo se marca como completo si su suma coincide. Devuelve (bytes, estado del ACK, suma)
+def save_range(conn, address, frame, checksum_algorithm=CHECKSUM_NONE):
+    file_path = received_path(frame.name)
+    manifest = get_manifest(file_path)
+    if manifest is None:
+        raise ProtocolError(f"Rango de {file_path} sin transferencia iniciada")
+    if not manifest.is_valid_range(frame.file_id, frame.offset, frame.size):
+        # No se reciben los datos: la sesión se corta después del ACK de error
+        logging.error(f"Rango {frame.file_id} de {file_path} inválido desde {address}: "
+                      f"desplazamiento {frame.offset}, {frame.size} bytes")
+        return 0, ACK_ERROR, b""
+    checksum = new_checksum(checksum_algorithm) if checksum_algorithm else None
+    received = receive_range(conn, file_path, frame.offset, frame.size, DATA_BUFFER_SIZE, checksum)
+    if received < frame.size:
+        logging.error(f"Rango {frame.file_id} de {file_path} incompleto desde {address}: {received}/{frame.size} bytes")
+        return received, ACK_ERROR, b""
+    ok, digest = verify_digest(conn, frame, checksum)
+    if not ok:
+        logging.error(f"Rango {frame.file_id} de {file_path} corrupto desde {address}: la suma no coincide")
+        return received, ACK_CORRUPT, digest
+    manifest.mark(frame.file_id, digest)
+    if manifest.is_complete():
+        # Solo la conexión que saca el manifiesto registra el archivo, aunque terminen dos rangos a la vez
+        with _manifests_lock:
+            finished = _manifests.pop(file_path, None) is manifest
+        if finished:
+            log_msg = f"Recibido {os.path.basename(file_path)} de {address} en rangos - Tamaño: {manifest.total/1024:.2f} KB"
+            print(log_msg)
+            logging.info(log_msg)
+            metrics.registrar_transferencia(address[0], manifest.total, time.time() - manifest.start_time)
+    return received, ACK_OK, digest
+
+# Sesión con el protocolo de tramas: recibe archivos hasta la trama FRAME_END (o el cierre)
+# y confirma cada uno con un ACK en cuanto termina, sin esperar al resto de la sesión
+def handle_session(conn, address):
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # los ACK salen en cuanto se generan
+    files = 0
+    checksum_algorithm = CHECKSUM_NONE
+    while True:
+        frame = read_frame(conn)
+        if frame is None or frame.frame_type == FRAME_END:
+            break
+        if frame.frame_type == FRAME_HELLO:
+            # Negociación: se responde con los códecs que ambos conocen y la suma a usar
+            codecs = [codec for codec in frame.name if codec in available_codecs()]
+            checksum_algorithm = frame.flags
+            if checksum_algorithm and checksum_algorithm not in available_checksums():
+                checksum_algorithm = CHECKSUM_CRC32
+            conn.sendall(pack_frame(FRAME_HELLO, name=bytes(codecs), flags=checksum_algorithm))
+            continue
+        if frame.frame_type == FRAME_QUERY:
+            # Inicio (o reanudación) de un archivo en rangos: se responde qué rangos ya están
+            if frame.size <= 0:
+                raise ProtocolError(f"Consulta de rangos inválida: rangos de {frame.size} bytes")
+            manifest = get_manifest(received_path(frame.name), frame.total, frame.size)
+            with manifest.lock:
+                bitmap = pack_bitmap(manifest.completed, manifest.range_count)
+            conn.sendall(pack_frame(FRAME_STATUS, size=manifest.range_count, name=bitmap))
+            continue
+        if frame.frame_type == FRAME_RANGE:
+            received, status, digest = save_range(conn, address, frame, checksum_algorithm)
+            conn.sendall(pack_frame(FRAME_ACK, frame.file_id, received, digest, flags=status))
+            if status == ACK_ERROR:
+                break
+            continue
+        if frame.frame_type != FRAME_FILE:
+            raise ProtocolError(f"Trama inesperada: {frame.frame_type}")
+
+        file_path = received_path(frame.name)
+        file_name = os.path.basename(file_path)
+
+        checksum = new_checksum(checksum_algorithm) if checksum_algorithm else None
+        start_time = time.time()
+        if frame.flags == CODEC_NONE:
+            received = receive_to_file(conn, file_path, frame.size, DATA_BUFFER_SIZE, WRITE_MODE, checksum)
+        elif frame.flags in available_codecs():
+            received = receive_compressed(conn, file_path, frame.size, frame.flags, checksum)
+        else:
+            raise ProtocolError(f"Códec de compresión no negociado: {frame.flags}")
+        if received < frame.size:
+            logging.error(f"Transferencia incompleta de {file_name} desde {address}: {received}/{frame.size} bytes")
+            conn.sendall(pack_frame(FRAME_ACK, frame.file_id, received, flags=ACK_ERROR))
+            break
+        # Se verifica la suma antes de confirmar; un archivo corrupto no se conserva
+        ok, digest = verify_digest(conn, frame, checksum)
+        if not ok:
+            logging.error(f"Archivo {file_name} corrupto desde {address}: la suma "
+                          f"{CHECKSUM_NAMES[checksum_algorithm]} no coincide")
+            os.remove(file_path)
+            conn.sendall(pack_frame(FRAME_ACK, frame.file_id, received, digest, flags=ACK_CORRUPT))
+            continue
+        conn.sendall(pack_frame(FRAME_ACK, frame.file_id, received, digest, flags=ACK_OK))
+        files += 1
+        metrics.registrar_transferencia(address[0], frame.size, time.time() - start_time)
+
+        log_msg = (f"Recibido {file_name} de {address} - Tamaño: {frame.size/1024:.2f} KB - "
+                   f"Compresión: {CODEC_NAMES[frame.flags]} - "
+                   f"Suma {CHECKSUM_NAMES[checksum_algorithm]}: {digest.hex() or '-'}")
+        print(log_msg)
+        logging.info(log_msg)
+    return files
+
+# Atiende una conexión completa: recibe el archivo, responde y cierra
+# Las conexiones que empiezan con la cabecera del protocolo de tramas se atienden como sesión;
+# el resto se trata con el formato original "nombre<SEPARATOR>tamaño"
+def handle_connection(conn, addr):
+    try:
+        if is_framed(conn):
+            handle_session(conn, addr)
+            return
+        receive = save_file_fast if FAST_PATH else save_file
+        if receive(conn, addr):
+            conn.sendall(b"Archivo recibido exitosamente")
+        else:
+            conn.sendall(b"Error al recibir el archivo")
+    except Exception as e:
+        logging.error(f"Error con {addr}: {str(e)}")
+    finally:
+        conn.close()
+
+# Servidor concurrente: un selector acepta conexiones y un grupo de hilos las atiende.
+# Cuando hay MAX_CONNECTIONS conexiones activas deja de aceptar (las nuevas esperan en la
+# cola del sistema operativo) y el cierre deja terminar las transferencias en curso.
+class ConcurrentFileServer:
+    def __init__(self, ip=IP, port=PORT, max_workers=MAX_WORKERS, max_connections=MAX_CONNECTIONS):
+        self.ip = ip
+        self.port = port
+        self.max_connections = max_connections
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.selector = selectors.DefaultSelector()
+        self.active_connections = 0
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.ready = threading.Event()
+        # Par de sockets para despertar al selector cuando termina una conexión o se pide cerrar
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.wakeup_r.setblocking(False)
+
+    def serve_forever(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind((self.ip, self.port))
+            s.listen(LISTEN_BACKLOG)
+            s.setblocking(False)
+            self.port = s.getsockname()[1]
+            print(f"[*] Servidor concurrente escuchando en {self.ip}:{self.port}")
+            logging.info(f"Servidor concurrente iniciado en {self.ip}:{self.port}")
+
+            self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+            accepting = False
+            self.ready.set()
+            try:
+                while not self.stopping.is_set():
+                    # Contrapresión: solo se escucha el socket mientras haya cupo
+                    with self.lock:
+                        has_room = self.active_connections < self.max_connections
+                    if has_room and not accepting:
+                        self.selector.register(s, selectors.EVENT_READ)
+                        accepting = True
+                    elif not has_room and accepting:
+                        self.selector.unregister(s)
+                        accepting = False
+
+                    for key, _ in self.selector.select(timeout=1.0):
+                        if key.fileobj is self.wakeup_r:
+                            try:
+                                self.wakeup_r.recv(1024)
+                            except BlockingIOError:
+                                pass
+                        else:
+                            self._accept(s)
+            except KeyboardInterrupt:
+                print("\nCerrando servidor...")
+                logging.info("Servidor detenido por el usuario")
+            finally:
+                # Cierre ordenado: no se aceptan más conexiones y se esperan las que están en curso
+                if accepting:
+                    self.selector.unregister(s)
+                self.executor.shutdown(wait=True)
+                self.selector.close()
+                self.wakeup_r.close()
+                self.wakeup_w.close()
+                logging.info("Servidor concurrente detenido (transferencias en curso completadas)")
+
+    # Acepta todas las conexiones pendientes que quepan (útil en ráfagas)
+    def _accept(self, s):
+        while True:
+            with self.lock:
+                if self.active_connections >= self.max_connections:
+                    return
+            try:
+                conn, addr = s.accept()
+            except BlockingIOError:
+                return
+            conn.setblocking(True)
+            conn.settimeout(CONNECTION_TIMEOUT)
+            with self.lock:
+                self.active_connections += 1
+            future = self.executor.submit(handle_connection, conn, addr)
+            future.add_done_callback(self._connection_done)
+
+    def _connection_done(self, future):
+        with self.lock:
+            self.active_connections -= 1
+        self._wakeup()
+
+    def _wakeup(self):
+        try:
+            self.wakeup_w.send(b"x")
+        except OSError:
+            pass
+
+    # Pide el cierre desde otro hilo; serve_forever termina cuando se drenan las transferencias
+    def shutdown(self):
+        self.stopping.set()
+        self._wakeup()
+
+def start_concurrent_server():
+    ConcurrentFileServer().serve_forever()
+
 def start_server():
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -60,12 +430,7 @@ def start_server():
                 conn, addr = s.accept()
                 print(f"\nConexión establecida con {addr}")
                 
-                if save_file(conn, addr):
-                    conn.sendall(b"Archivo recibido exitosamente")
-                else:
-                    conn.sendall(b"Error al recibir el archivo")
-                    
-                conn.close()
+                handle_connection(conn, addr)
                 
             except KeyboardInterrupt:
                 print("\nCerrando servidor...")
@@ -76,4 +441,8 @@ def start_server():
                 continue
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    # Modo concurrente por defecto; con --secuencial se usa el servidor original de una conexión a la vez
+    if "--secuencial" in sys.argv:
+        start_server()
+    else:
+        start_concurrent_server()
\ No newline at end of file
@@ -0,0 +1,331 @@
+import heapq
+import itertools
+import math
+import random
+import sys
+import time
+from motor_rutas import dijkstra, reconstruir_ruta
+from rutas_ancho import GrafoRed, grafo_red_aleatorio, tiempo_esperado
+
+# Simulador de red de eventos discretos con contención en los enlaces. Cada enlace tiene la
+# capacidad (Mbps) de los anchos de banda de automatizacionv2.py y del script de Kruskal, y
+# las transferencias que lo cruzan a la vez se la reparten con equidad max-min: cada flujo
+# recibe la parte justa de su enlace más cargado y lo que un flujo no puede usar (porque está
+# limitado en otro enlace) se reparte entre los demás. Cada sentido de un enlace es un recurso
+# aparte (enlaces full duplex), igual que las dos aristas dirigidas del GrafoRed.
+#
+# Las llegadas se recorren ordenadas y los demás eventos (fin de datos y liberación del hilo)
+# van en un montículo por tiempo virtual. Las tasas solo cambian cuando un flujo entra o sale, y entonces no se rehace el
+# reparto de toda la red: un reparto es max-min si y solo si cada flujo tiene un cuello de
+# botella (una arista llena en la que ningún otro flujo tiene más tasa). Se recalculan los
+# flujos que entran y, por rondas, solo los que pierden su cuello de botella por el cambio;
+# el resto conserva su tasa. En cada evento se tocan así unos pocos flujos aunque haya miles
+# activos. Los bytes pendientes de cada flujo se actualizan de forma perezosa al cambiarle
+# la tasa, y su evento de fin lleva una versión: si la tasa cambia se encola otro y el viejo
+# se descarta al salir.
+#
+# Un flujo ocupa los enlaces desde que empieza hasta que termina de enviar sus datos y
+# termina `latencia` después (el mismo modelo que tiempo_esperado cuando no hay contención).
+
+EPSILON = 1e-9  # eventos a menos de esto se procesan juntos, con un solo recálculo
+TOLERANCIA = 1e-9  # margen relativo al comparar tasas y al decidir si una arista está llena
+FIN_DATOS, LIBERAR = 0, 1
+
+
+class SimuladorRed:
+    def __init__(self, grafo):
+        self.grafo = grafo  # GrafoRed: latencias en pesos y Mbps en anchos, por arista dirigida
+        self.capacidad = [ancho * 1e6 / 8 for ancho in grafo.anchos]  # bytes/s por arista
+        self.arboles = {}  # origen -> predecesores del árbol de menor latencia
+        self.rutas = {}  # (origen, destino) -> (latencia_ms, [nodos], [aristas])
+        self.recalculos = 0
+        self.flujos_recalculados = 0
+
+    # Enlaces no dirigidos (n1, n2, ancho[, latencia]) como los de automatizacionv2.py
+    @classmethod
+    def desde_enlaces(cls, enlaces):
+        return cls(GrafoRed.desde_enlaces(enlaces))
+
+    @classmethod
+    def desde_diccionarios(cls, latencias, anchos):
+        return cls(GrafoRed.desde_diccionarios(latencias, anchos))
+
+    # (latencia_ms, [nodos], [aristas]) entre dos índices; la de menor latencia si no se da una
+    # ruta fija. (inf, [], []) si no hay ruta
+    def ruta(self, origen, destino, nodos=None):
+        if nodos is None:
+            clave = (origen, destino)
+            if clave in self.rutas:
+                return self.rutas[clave]
+            if origen not in self.arboles:
+                self.arboles[origen] = dijkstra(self.grafo, origen)[1]
+            nodos = reconstruir_ruta(self.arboles[origen], origen, destino)
+            resultado = self.rutas[clave] = self._aristas(nodos)
+            return resultado
+        return self._aristas(nodos)
+
+    def _aristas(self, nodos):
+        if not nodos:
+            return math.inf, [], []
+        latencia = 0.0
+        aristas = []
+        for u, v in zip(nodos, nodos[1:]):
+            k = self.grafo.posicion_arista(u, v)
+            if k == -1:
+                return math.inf, [], []
+            latencia += self.grafo.pesos[k]
+            aristas.append(k)
+        return latencia, nodos, aristas
+
+    # Simula flujos [{'origen', 'destino', 'tamano_bytes', 'llegada_s'?, 'ruta'?}] con nombres
+    # de nodos ('ruta' fija el camino; si no, el de menor latencia). Con `trabajadores` solo
+    # hay tantos flujos a la vez y los demás esperan ordenados por `prioridad` ("tamano" o
+    # "llegada"), como en la cola de la interfaz. Devuelve por flujo
+    # {'inicio_s', 'fin_s', 'latencia_ms', 'ruta', 'tasa_media_mbps'} (fin_s inf si no hay ruta)
+    def simular(self, flujos, trabajadores=None, prioridad="tamano"):
+        indices = self.grafo.indices
+        n = len(flujos)
+        aristas = [None] * n
+        latencias = [math.inf] * n
+        rutas = [[] for _ in range(n)]
+        for i, flujo in enumerate(flujos):
+            origen = indices.get(flujo['origen'])
+            destino = indices.get(flujo['destino'])
+            if origen is None or destino is None:
+                continue
+            fija = flujo.get('ruta')
+            if fija:
+                if any(nodo not in indices for nodo in fija):
+                    continue
+                fija = [indices[nodo] for nodo in fija]
+            latencias[i], nodos, aristas[i] = self.ruta(origen, destino, fija)
+            rutas[i] = [self.grafo.nombres[nodo] for nodo in nodos]
+
+        capacidad = self.capacidad
+        flujos_arista = [set() for _ in capacidad]  # flujos activos que cruzan cada arista
+        carga = [0.0] * len(capacidad)  # suma de las tasas de esos flujos
+        pendiente = [0.0] * n  # bytes por enviar al instante `ultimo`
+        tasa = [0.0] * n  # bytes/s
+        ultimo = [0.0] * n
+        version = [0] * n
+        inicio = [math.inf] * n
+        fin = [math.inf] * n
+
+        llegadas = sorted(range(n), key=lambda i: flujos[i].get('llegada_s', 0.0))
+        siguiente = 0
+        eventos = []  # (tiempo, secuencia, tipo, flujo, versión)
+        secuencia = itertools.count()
+        en_espera = []
+        libres = trabajadores if trabajadores else math.inf
+
+        def empezar(i, reloj, nuevos):
+            inicio[i] = reloj
+            if aristas[i] is None or latencias[i] == math.inf:
+                return 0
+            if not aristas[i]:  # origen == destino
+                fin[i] = reloj
+                return 0
+            pendiente[i] = flujos[i]['tamano_bytes']
+            ultimo[i] = reloj
+            nuevos.append(i)
+            return 1
+
+        while True:
+            reloj = min(eventos[0][0] if eventos else math.inf,
+                        flujos[llegadas[siguiente]].get('llegada_s', 0.0) if siguiente < n else math.inf)
+            if reloj == math.inf:
+                break
+            tocadas = set()
+            nuevos = []
+            while eventos and eventos[0][0] <= reloj + EPSILON:
+                tiempo, _, tipo, i, v = heapq.heappop(eventos)
+                if tipo == LIBERAR:
+                    libres += 1
+                elif v == version[i]:
+                    for k in aristas[i]:
+                        flujos_arista[k].discard(i)
+                        # sin flujos la carga vuelve a cero exacto y no arrastra redondeos
+                        carga[k] = carga[k] - tasa[i] if flujos_arista[k] else 0.0
+                    tocadas.update(aristas[i])
+                    tasa[i] = 0.0
+                    version[i] += 1
+                    fin[i] = tiempo + latencias[i] / 1000
+                    if trabajadores:
+                        heapq.heappush(eventos, (fin[i], next(secuencia), LIBERAR, i, 0))
+            while siguiente < n and flujos[llegadas[siguiente]].get('llegada_s', 0.0) <= reloj + EPSILON:
+                i = llegadas[siguiente]
+                siguiente += 1
+                clave = flujos[i]['tamano_bytes'] if prioridad == "tamano" else flujos[i].get('llegada_s', 0.0)
+                heapq.heappush(en_espera, (clave, i))
+            while libres and en_espera:
+                _, i = heapq.heappop(en_espera)
+                libres -= empezar(i, reloj, nuevos)
+            for i in nuevos:
+                for k in aristas[i]:
+                    flujos_arista[k].add(i)
+            if tocadas or nuevos:
+                self._recalcular(reloj, tocadas, nuevos, aristas, flujos_arista, carga, pendiente, tasa, ultimo,
+                                 version, eventos, secuencia)
+
+        resultados = []
+        for i, flujo in enumerate(flujos):
+            datos = fin[i] - inicio[i] - latencias[i] / 1000
+            resultados.append({
+                'inicio_s': inicio[i], 'fin_s': fin[i], 'latencia_ms': latencias[i], 'ruta': rutas[i],
+                'tasa_media_mbps': flujo['tamano_bytes'] * 8 / 1e6 / datos if 0 < datos < math.inf else 0.0,
+            })
+        return resultados
+
+    # Reparto max-min incremental. Se parte de los flujos nuevos y se repite:
+    #  1. llenado progresivo de los flujos incluidos con los demás fijos: se fija primero la
+    #     arista con menor parte justa (capacidad libre / flujos sin fijar), sus flujos reciben
+    #     esa parte y se descuenta de las demás aristas que cruzan. Las partes nunca bajan al
+    #     fijar flujos, así que basta un montículo con entradas perezosas
+    #  2. comprobación de cuellos de botella en las aristas cuya carga cambió: se agregan los
+    #     flujos de fuera que se quedaron sin cuello y los de fuera que superan la tasa de un
+    #     flujo incluido en la arista donde este se fijó
+    # hasta que no cambia nada
+    def _recalcular(self, reloj, tocadas, nuevos, aristas, flujos_arista, carga, pendiente, tasa, ultimo,
+                    version, eventos, secuencia):
+        capacidad = self.capacidad
+        incluidos = set(nuevos)
+        cambiadas = set(tocadas)
+        originales = {}  # tasa de cada flujo incluido antes del recálculo
+        cuellos = {}  # flujo incluido -> arista donde se fijó
+        while True:
+            if incluidos:
+                libre = {}
+                sin_fijar = {}
+                for i in incluidos:
+                    for k in aristas[i]:
+                        if k not in libre:
+                            libre[k] = capacidad[k] - carga[k]
+                            sin_fijar[k] = 0
+                        libre[k] += tasa[i]
+                        sin_fijar[k] += 1
+                monticulo = [((resto if resto > 0 else 0.0) / sin_fijar[k], k) for k, resto in libre.items()]
+                heapq.heapify(monticulo)
+                cuellos = {}
+                while monticulo:
+                    parte, k = heapq.heappop(monticulo)
+                    cantidad = sin_fijar[k]
+                    resto = libre[k]
+                    if not cantidad or parte != (resto if resto > 0 else 0.0) / cantidad:
+                        continue
+                    for i in flujos_arista[k]:
+                        if i in cuellos or i not in incluidos:
+                            continue
+                        cuellos[i] = k
+                        vieja = tasa[i]
+                        if parte != vieja:
+                            originales.setdefault(i, vieja)
+                            tasa[i] = parte
+                            for otra in aristas[i]:
+                                carga[otra] += parte - vieja
+                            cambiadas.update(aristas[i])
+                        for otra in aristas[i]:
+                            if otra != k:
+                                resto = libre[otra] = libre[otra] - parte
+                                quedan = sin_fijar[otra] = sin_fijar[otra] - 1
+                                if quedan:
+                                    heapq.heappush(monticulo, ((resto if resto > 0 else 0.0) / quedan, otra))
+                    sin_fijar[k] = 0
+
+            agregar = set()
+            for i, k in cuellos.items():
+                techo = tasa[i] * (1 + TOLERANCIA)
+                for j in flujos_arista[k]:
+                    if tasa[j] > techo and j not in incluidos:
+                        agregar.add(j)
+            maximos = {}
+            for k in cambiadas:
+                for i in flujos_arista[k]:
+                    if i not in incluidos and i not in agregar and not self._tiene_cuello(
+                            i, aristas, flujos_arista, carga, tasa, maximos):
+                        agregar.add(i)
+            if not agregar:
+                break
+            incluidos |= agregar
+            cambiadas = set()
+
+        self.recalculos += 1
+        self.flujos_recalculados += len(incluidos)
+        for i, vieja in originales.items():
+            nueva = tasa[i]
+            if nueva == vieja:
+                continue
+            pendiente[i] = max(0.0, pendiente[i] - vieja * (reloj - ultimo[i]))
+            ultimo[i] = reloj
+            version[i] += 1
+            if nueva > 0:
+                heapq.heappush(eventos, (reloj + pendiente[i] / nueva, next(secuencia), FIN_DATOS, i, version[i]))
+
+    # Un flujo tiene cuello de botella si alguna arista de su ruta está llena y ningún flujo de
+    # esa arista tiene más tasa que él; si todos lo tienen, el reparto es el max-min
+    def _tiene_cuello(self, i, aristas, flujos_arista, carga, tasa, maximos):
+        techo = tasa[i] * (1 + TOLERANCIA)
+        for k in aristas[i]:
+            if carga[k] >= self.capacidad[k] * (1 - TOLERANCIA):
+                maximo = maximos.get(k)
+                if maximo is None:
+                    maximo = maximos[k] = max(tasa[j] for j in flujos_arista[k])
+                if maximo <= techo:
+                    return True
+        return False
+
+
+# Flujos de prueba: `origenes` servidores elegidos al azar envían a destinos al azar, con
+# tamaños log-uniformes entre tamano_min y tamano_max y llegadas de Poisson cada `intervalo_s` de media
+# (0 = todos a la vez)
+def flujos_aleatorios(grafo, cantidad, origenes=50, intervalo_s=0.05, tamano_min=100 * 1024,
+                      tamano_max=10 * 1024 ** 2, semilla=42):
+    rnd = random.Random(semilla)
+    nombres = grafo.nombres
+    servidores = rnd.sample(nombres, min(origenes, len(nombres)))
+    llegada = 0.0
+    flujos = []
+    for _ in range(cantidad):
+        if intervalo_s > 0:
+            llegada += rnd.expovariate(1 / intervalo_s)
+        flujos.append({'origen': rnd.choice(servidores), 'destino': rnd.choice(nombres),
+                       'tamano_bytes': int(math.exp(rnd.uniform(math.log(tamano_min), math.log(tamano_max)))),
+                       'llegada_s': llegada})
+    return flujos
+
+
+# 100 000 flujos sobre una topología de unos 10 000 enlaces: tiempo real de la simulación,
+# tamaño medio de los recálculos frente a los flujos activos y cuánto se alarga el lote
+# respecto al modelo sin contención (cada transferencia con todo el ancho de su ruta)
+def benchmark(num_nodos=5000, cantidad=100000, intervalo_s=0.05):
+    grafo = grafo_red_aleatorio(num_nodos)
+    simulador = SimuladorRed(grafo)
+    flujos = flujos_aleatorios(grafo, cantidad, intervalo_s=intervalo_s)
+    print(f"{num_nodos} nodos, {grafo.num_aristas() // 2} enlaces, {cantidad} flujos "
+          f"(uno cada {1000 * intervalo_s:g} ms de media)")
+
+    inicio = time.perf_counter()
+    resultados = simulador.simular(flujos)
+    transcurrido = time.perf_counter() - inicio
+    terminados = [r for r in resultados if r['fin_s'] != math.inf]
+    print(f"  simulación: {transcurrido:.2f} s reales, {simulador.recalculos} recálculos, "
+          f"{simulador.flujos_recalculados / max(1, simulador.recalculos):.1f} flujos por recálculo")
+
+    sin_contencion = []
+    for flujo, resultado in zip(flujos, resultados):
+        if resultado['fin_s'] == math.inf:
+            continue
+        nodos = [grafo.indices[nodo] for nodo in resultado['ruta']]
+        cuello = min((grafo.anchos[grafo.posicion_arista(u, v)] for u, v in zip(nodos, nodos[1:])), default=math.inf)
+        sin_contencion.append(tiempo_esperado(resultado['latencia_ms'], cuello, flujo['tamano_bytes']))
+    sin_contencion.sort()
+    duraciones = sorted(r['fin_s'] - r['inicio_s'] for r in terminados)
+    fin_lote = max(r['fin_s'] for r in terminados)
+    print(f"  {len(terminados)} flujos terminados en {fin_lote:.0f} s simulados, "
+          f"{sum(duraciones) / fin_lote:.0f} flujos activos de media")
+    for nombre, valores in (("con contención", duraciones), ("sin contención", sin_contencion)):
+        print(f"  duración {nombre}: mediana {valores[len(valores) // 2]:.2f} s, "
+              f"p99 {valores[int(0.99 * len(valores))]:.2f} s, máxima {valores[-1]:.2f} s")
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    benchmark(*(tipo(valor) for tipo, valor in zip((int, int, float), argumentos)))
@@ -0,0 +1,255 @@
+import mmap
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Ruta rápida para mover archivos por el socket sin copias innecesarias:
+#  - el cliente usa socket.sendfile (sendfile(2) en Linux: el kernel copia del archivo al socket)
+#  - el servidor usa recv_into sobre un bytearray reutilizado por hilo y escribe con os.pwrite,
+#    o recibe directamente dentro de un archivo mapeado en memoria
+
+MIN_BUFFER_SIZE = 64 * 1024  # 64KB
+MAX_BUFFER_SIZE = 4 * 1024 * 1024  # 4MB
+
+_buffers = threading.local()
+
+
+# Tamaño de buffer para los datos: el configurado, o uno autoajustado a partir del buffer
+# del socket en el kernel, acotado entre MIN_BUFFER_SIZE y MAX_BUFFER_SIZE y al tamaño del archivo
+def tune_buffer_size(sock, file_size, configured=None, option=socket.SO_RCVBUF):
+    if configured:
+        return configured
+    try:
+        kernel_size = sock.getsockopt(socket.SOL_SOCKET, option)
+    except OSError:
+        kernel_size = MIN_BUFFER_SIZE
+    size = max(MIN_BUFFER_SIZE, min(MAX_BUFFER_SIZE, kernel_size))
+    if file_size:
+        size = min(size, file_size)
+    return size
+
+
+# Buffer reutilizable del hilo actual (solo crece, así no se reserva memoria en cada recv)
+def thread_buffer(size):
+    buffer = getattr(_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(size)
+        _buffers.buffer = buffer
+    return memoryview(buffer)
+
+
+# Envía file_size bytes del archivo abierto `f` (a partir de offset) por el socket.
+# Con `checksum` (ver integridad.py) cada bloque se suma en el mismo bucle que lo envía:
+# con sendfile se suma el bloque desde el archivo mapeado en memoria (ya en la caché de
+# páginas) y luego el kernel lo copia al socket
+def send_file_data(sock, f, file_size, buffer_size=None, use_sendfile=True, offset=0, checksum=None):
+    if file_size == 0:
+        return 0
+    if use_sendfile and checksum is None:
+        return sock.sendfile(f, offset, file_size)
+    if use_sendfile:
+        return _sendfile_with_checksum(sock, f, file_size, offset, checksum)
+    f.seek(offset)
+    buffer_size = tune_buffer_size(sock, file_size, buffer_size, socket.SO_SNDBUF)
+    view = thread_buffer(buffer_size)[:buffer_size]
+    sent = 0
+    while sent < file_size:
+        n = f.readinto(view[:min(buffer_size, file_size - sent)])
+        if not n:
+            break
+        if checksum is not None:
+            checksum.update(view[:n])
+        sock.sendall(view[:n])
+        sent += n
+    return sent
+
+
+def _sendfile_with_checksum(sock, f, file_size, offset, checksum, block_size=MAX_BUFFER_SIZE):
+    sent = 0
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            while sent < file_size:
+                length = min(block_size, file_size - sent)
+                checksum.update(view[offset + sent:offset + sent + length])
+                n = sock.sendfile(f, offset + sent, length)
+                if not n:
+                    break
+                sent += n
+        finally:
+            view.release()
+    return sent
+
+
+# Recibe hasta `size` bytes del socket y los guarda en `path`.
+# mode='pwrite': recv_into sobre el buffer del hilo + os.pwrite; el buffer se duplica
+#                mientras cada recv lo llene por completo (autoajuste)
+# mode='mmap':   el archivo se reserva con su tamaño final y se recibe directo en el mapeo
+# Devuelve los bytes recibidos (menos que size si el cliente cerró antes de tiempo).
+# Con `checksum` se suma cada bloque recibido
+def receive_to_file(conn, path, size, buffer_size=None, mode="pwrite", checksum=None):
+    chunk = tune_buffer_size(conn, size, buffer_size)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    received = 0
+    try:
+        if size == 0:
+            return 0
+        if mode == "mmap":
+            os.ftruncate(fd, size)
+            with mmap.mmap(fd, size) as mapped:
+                view = memoryview(mapped)
+                try:
+                    while received < size:
+                        n = conn.recv_into(view[received:received + chunk])
+                        if not n:
+                            break
+                        if checksum is not None:
+                            checksum.update(view[received:received + n])
+                        received += n
+                finally:
+                    view.release()
+            if received < size:
+                os.ftruncate(fd, received)
+            return received
+
+        return _receive_into_fd(conn, fd, 0, size, chunk, buffer_size is None, checksum)
+    finally:
+        os.close(fd)
+
+
+# Recibe un rango de `length` bytes y lo escribe en `offset` dentro de un archivo ya
+# reservado (no se trunca, así varios rangos pueden llegar en paralelo por distintas conexiones)
+def receive_range(conn, path, offset, length, buffer_size=None, checksum=None):
+    chunk = tune_buffer_size(conn, length, buffer_size)
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        return _receive_into_fd(conn, fd, offset, length, chunk, buffer_size is None, checksum)
+    finally:
+        os.close(fd)
+
+
+# Reserva el archivo con su tamaño final sin borrar lo que ya tenga (para reanudar)
+def preallocate(path, size):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)
+        if hasattr(os, "posix_fallocate") and size:
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass  # el sistema de archivos no lo soporta; ftruncate es suficiente
+    finally:
+        os.close(fd)
+
+
+# recv_into sobre el buffer del hilo + escritura en la posición; el buffer se duplica
+# mientras cada recv lo llene por completo (si autotune está activo)
+def _receive_into_fd(conn, fd, offset, length, chunk, autotune, checksum=None):
+    view = thread_buffer(chunk)
+    received = 0
+    while received < length:
+        n = conn.recv_into(view[:min(chunk, length - received)])
+        if not n:
+            break
+        if checksum is not None:
+            checksum.update(view[:n])
+        _write_at(fd, view[:n], offset + received)
+        received += n
+        if autotune and n == chunk and chunk < MAX_BUFFER_SIZE:
+            chunk = min(chunk * 2, MAX_BUFFER_SIZE)
+            view = thread_buffer(chunk)
+    return received
+
+
+def _write_at(fd, data, offset):
+    while len(data):
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, data, offset)
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)  # sin pwrite (Windows)
+            written = os.write(fd, data)
+        data = data[written:]
+        offset += written
+
+
+# Ruta original (chunks de 4KB en bytes nuevos) para comparar
+def _legacy_send(sock, path):
+    with open(path, "rb") as f:
+        while True:
+            bytes_read = f.read(4096)
+            if not bytes_read:
+                break
+            sock.sendall(bytes_read)
+
+
+def _legacy_receive(conn, path, size):
+    with open(path, "wb") as f:
+        received = 0
+        while received < size:
+            data = conn.recv(min(4096, size - received))
+            if not data:
+                break
+            f.write(data)
+            received += len(data)
+
+
+# Compara la ruta original con la rápida enviando un archivo grande por loopback
+def benchmark(size_mb=1024):
+    folder = tempfile.mkdtemp(prefix="transferencia_")
+    source = os.path.join(folder, "origen.bin")
+    target = os.path.join(folder, "destino.bin")
+    size = size_mb * 1024 * 1024
+    block = os.urandom(1024 * 1024)
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+    variants = {
+        "original (4KB)": (lambda s: _legacy_send(s, source),
+                           lambda c: _legacy_receive(c, target, size)),
+        "sendfile + pwrite": (lambda s: _send_fast(s, source, size),
+                              lambda c: receive_to_file(c, target, size, mode="pwrite")),
+        "sendfile + mmap": (lambda s: _send_fast(s, source, size),
+                            lambda c: receive_to_file(c, target, size, mode="mmap")),
+    }
+    try:
+        print(f"Archivo de {size_mb} MB por loopback")
+        for name, (send, receive) in variants.items():
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+                server.bind(("127.0.0.1", 0))
+                server.listen(1)
+
+                def serve():
+                    conn, _ = server.accept()
+                    with conn:
+                        receive(conn)
+                        conn.sendall(b"OK")
+
+                thread = threading.Thread(target=serve)
+                thread.start()
+                start = time.perf_counter()
+                with socket.create_connection(server.getsockname()) as s:
+                    send(s)
+                    s.recv(2)
+                elapsed = time.perf_counter() - start
+                thread.join()
+            assert os.path.getsize(target) == size
+            print(f"  {name:<20} {elapsed:7.2f} s  {size_mb / elapsed:8.1f} MB/s")
+    finally:
+        for path in (source, target):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(folder)
+
+
+def _send_fast(sock, path, size):
+    with open(path, "rb") as f:
+        send_file_data(sock, f, size)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)